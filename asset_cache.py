@@ -0,0 +1,64 @@
+"""
+Cache disque des ressources préparées
+Les ressources dérivées d'un fichier uploadé (logo redimensionné, ...) sont
+indexées par l'empreinte du contenu et les réglages qui les produisent, et
+conservées entre les exécutions dans la limite du budget disque (scratch_space)
+"""
+import os
+import hashlib
+from typing import Optional, Dict
+from constants import CACHE_SETTINGS
+
+# Empreintes déjà calculées, par (chemin, mtime, taille)
+_digest_cache: Dict[tuple, str] = {}
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> Optional[str]:
+    """
+    Empreinte SHA-256 du contenu d'un fichier, lue par blocs
+
+    Args:
+        path: Chemin du fichier
+        chunk_size: Taille des blocs de lecture (octets)
+
+    Returns:
+        str: Empreinte hexadécimale ou None si le fichier est illisible
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key in _digest_cache:
+        return _digest_cache[key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    _digest_cache[key] = digest.hexdigest()
+    return _digest_cache[key]
+
+
+def cache_path(namespace: str, key: str, extension: str) -> str:
+    """
+    Chemin d'une entrée du cache (le répertoire est créé si besoin)
+
+    Args:
+        namespace: Catégorie de ressource ('logo', ...)
+        key: Clé de l'entrée (empreinte et réglages)
+        extension: Extension du fichier
+
+    Returns:
+        str: Chemin de l'entrée
+    """
+    directory = os.path.join(CACHE_SETTINGS['dir'], namespace)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{key}{extension}")
+    # Entrée consultée = récemment utilisée (ordre d'éviction LRU de scratch_space)
+    if os.path.exists(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    return path
@@ -0,0 +1,173 @@
+"""
+Module de préparation de la bande son
+=====================================
+L'audio uploadé est décodé une seule fois en PCM à la fréquence de sortie ;
+volume, fondus et découpe/complément de silence sont appliqués en opérations
+NumPy vectorisées, puis la piste est encodée en AAC prête à être multiplexée
+par copie de flux. Le résultat est mis en cache disque par empreinte du
+fichier et réglages.
+
+Fonctions principales :
+- decode_pcm : Décode un fichier audio en PCM float32
+- mix_soundtrack : Applique volume, fondus, découpe et silence final
+- prepare_soundtrack : Piste AAC prête au multiplexage (avec cache)
+"""
+import os
+import hashlib
+import subprocess
+import numpy as np
+import streamlit as st
+from typing import Optional
+from constants import COMPOSITION_SETTINGS
+from asset_cache import file_digest, cache_path
+from ffmpeg_utils import ffmpeg_base_command
+from video_probe import probe_audio
+
+
+def decode_pcm(audio_path: str, sample_rate: int, channels: int = 2) -> Optional[np.ndarray]:
+    """
+    Décode un fichier audio en PCM float32
+
+    Args:
+        audio_path: Chemin de l'audio
+        sample_rate: Fréquence d'échantillonnage de sortie
+        channels: Nombre de canaux de sortie
+
+    Returns:
+        np.ndarray: Échantillons (n, channels) ou None si échec
+    """
+    cmd = ffmpeg_base_command() + [
+        '-i', audio_path,
+        '-map', '0:a:0', '-vn',
+        '-f', 'f32le', '-acodec', 'pcm_f32le',
+        '-ac', str(channels), '-ar', str(sample_rate),
+        'pipe:1'
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True)
+    except OSError:
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, channels).copy()
+
+
+def mix_soundtrack(
+    pcm: np.ndarray,
+    sample_rate: int,
+    volume: float = 1.0,
+    fade_in: float = 0.0,
+    fade_out: float = 0.0,
+    main_duration: Optional[float] = None,
+    total_duration: Optional[float] = None
+) -> np.ndarray:
+    """
+    Applique volume, fondus, découpe et silence final (mêmes règles que la composition)
+
+    L'audio est coupé à la durée du montage principal, le fondu de sortie se
+    termine sur la fin effective de l'audio, puis du silence complète jusqu'à
+    la durée totale (tagline comprise).
+
+    Args:
+        pcm: Échantillons (n, canaux), modifiés en place
+        sample_rate: Fréquence d'échantillonnage
+        volume: Gain linéaire
+        fade_in: Durée du fondu d'entrée (secondes)
+        fade_out: Durée du fondu de sortie (secondes)
+        main_duration: Durée du montage principal (None = tout l'audio)
+        total_duration: Durée totale de la vidéo (None = durée effective)
+
+    Returns:
+        np.ndarray: Échantillons mixés (n_total, canaux)
+    """
+    n_effective = len(pcm)
+    if main_duration is not None:
+        n_effective = min(n_effective, int(round(main_duration * sample_rate)))
+    pcm = pcm[:n_effective]
+
+    pcm *= volume
+
+    n_fade_in = min(int(round(fade_in * sample_rate)), n_effective)
+    if n_fade_in > 0:
+        pcm[:n_fade_in] *= np.linspace(0.0, 1.0, n_fade_in, endpoint=False, dtype=np.float32)[:, None]
+
+    n_fade_out = min(int(round(fade_out * sample_rate)), n_effective)
+    if n_fade_out > 0:
+        pcm[n_effective - n_fade_out:] *= np.linspace(1.0, 0.0, n_fade_out, dtype=np.float32)[:, None]
+
+    np.clip(pcm, -1.0, 1.0, out=pcm)
+
+    n_total = n_effective if total_duration is None else int(round(total_duration * sample_rate))
+    if n_total > n_effective:
+        pcm = np.concatenate([pcm, np.zeros((n_total - n_effective, pcm.shape[1]), dtype=np.float32)])
+    return pcm[:n_total]
+
+
+def prepare_soundtrack(
+    audio_path: str,
+    volume: float = 1.0,
+    fade_in: float = 0.0,
+    fade_out: float = 0.0,
+    main_duration: Optional[float] = None,
+    total_duration: Optional[float] = None
+) -> Optional[str]:
+    """
+    Prépare la bande son mixée, encodée en AAC et prête au multiplexage
+
+    Args:
+        audio_path: Chemin de l'audio uploadé
+        volume: Gain linéaire
+        fade_in: Durée du fondu d'entrée
+        fade_out: Durée du fondu de sortie
+        main_duration: Durée du montage principal
+        total_duration: Durée totale de la vidéo (tagline comprise)
+
+    Returns:
+        str: Chemin de la piste préparée ou None si échec
+    """
+    digest = file_digest(audio_path)
+    if digest is None:
+        return None
+
+    sample_rate = COMPOSITION_SETTINGS['audio_sample_rate']
+    bitrate = COMPOSITION_SETTINGS['audio_bitrate']
+    settings = (f"{sample_rate}|{bitrate}|{volume:.3f}|{fade_in:.3f}|{fade_out:.3f}|"
+                f"{main_duration or 0:.3f}|{total_duration or 0:.3f}")
+    key = f"{digest}_{hashlib.sha256(settings.encode()).hexdigest()[:16]}"
+    output_path = cache_path('audio', key, '.m4a')
+    if os.path.exists(output_path):
+        st.info("🎵 Bande son déjà préparée (cache)")
+        return output_path
+
+    # Mono conservé en mono : le passage en stéréo l'atténuerait de 3 dB
+    audio_info = probe_audio(audio_path)
+    channels = min(max(audio_info['channels'], 1), 2) if audio_info and audio_info.get('channels') else 2
+    pcm = decode_pcm(audio_path, sample_rate, channels)
+    if pcm is None:
+        st.warning("⚠️ Décodage de la bande son impossible")
+        return None
+
+    mixed = mix_soundtrack(pcm, sample_rate, volume, fade_in, fade_out, main_duration, total_duration)
+
+    # Écriture atomique : une exécution concurrente ne lit jamais un fichier partiel
+    tmp_path = f"{output_path}.{os.getpid()}.tmp.m4a"
+    cmd = ffmpeg_base_command() + [
+        '-f', 'f32le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0',
+        '-c:a', 'aac', '-b:a', bitrate,
+        '-movflags', '+faststart',
+        tmp_path
+    ]
+    try:
+        result = subprocess.run(cmd, input=mixed.tobytes(), capture_output=True)
+    except OSError as e:
+        st.warning(f"⚠️ Encodage de la bande son impossible: {e}")
+        return None
+    if result.returncode != 0 or not os.path.exists(tmp_path):
+        st.warning(f"⚠️ Encodage de la bande son échoué: {result.stderr.decode(errors='ignore').strip()[-300:]}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    os.replace(tmp_path, output_path)
+    st.success(f"🎵 Bande son préparée: {len(mixed) / sample_rate:.1f}s")
+    return output_path
@@ -0,0 +1,104 @@
+"""
+Benchmark de la composition finale : chaîne MoviePy vs graphe ffmpeg en une passe
+
+Génère des clips intermédiaires synthétiques (1080x1920, 30 fps), un logo,
+une bande son et une tagline, puis chronomètre create_final_video_ultra_safe
+avec chacun des deux backends de composition.
+
+Usage :
+    python benchmarks/bench_composition.py [--clips 6] [--clip-duration 4] [--output-duration 15]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import VIDEO_FORMAT, COMPOSITION_SETTINGS, FFMPEG_BINARIES
+
+
+def _ffmpeg(*args):
+    subprocess.run([FFMPEG_BINARIES['ffmpeg'], '-hide_banner', '-loglevel', 'error', '-y'] + list(args),
+                   check=True)
+
+
+def make_fixtures(work_dir: str, n_clips: int, clip_duration: float) -> dict:
+    """Crée les fichiers d'entrée synthétiques du benchmark"""
+    size = f"{VIDEO_FORMAT['width']}x{VIDEO_FORMAT['height']}"
+    clips = []
+    for i in range(n_clips):
+        path = os.path.join(work_dir, f"clip_{i}.mp4")
+        _ffmpeg('-f', 'lavfi', '-i', f"testsrc2=size={size}:rate={VIDEO_FORMAT['fps']}",
+                '-t', str(clip_duration), '-c:v', 'libx264', '-preset', 'ultrafast',
+                '-pix_fmt', 'yuv420p', path)
+        clips.append(path)
+
+    logo = os.path.join(work_dir, 'logo.png')
+    _ffmpeg('-f', 'lavfi', '-i', 'color=c=red@0.8:size=400x200,format=rgba', '-frames:v', '1', logo)
+
+    audio = os.path.join(work_dir, 'audio.m4a')
+    _ffmpeg('-f', 'lavfi', '-i', 'sine=frequency=440', '-t', '30', '-c:a', 'aac', audio)
+
+    tagline = os.path.join(work_dir, 'tagline.mp4')
+    _ffmpeg('-f', 'lavfi', '-i', 'testsrc=size=1920x1080:rate=25', '-f', 'lavfi', '-i', 'sine=frequency=880',
+            '-t', '3', '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-shortest', tagline)
+
+    return {'clips': clips, 'logo': logo, 'audio': audio, 'tagline': tagline}
+
+
+def run_backend(backend: str, fixtures: dict, output_path: str, output_duration: float) -> float:
+    """Exécute l'assemblage complet avec le backend donné et retourne la durée (s)"""
+    from moviepy.editor import VideoFileClip
+    from video_assembler import create_final_video_ultra_safe
+    from ffmpeg_utils import register_intermediate
+
+    COMPOSITION_SETTINGS['backend'] = backend
+    clips = []
+    for path in fixtures['clips']:
+        clip = VideoFileClip(path)
+        register_intermediate(clip, path)
+        clips.append(clip)
+
+    logo_config = {'logo_path': fixtures['logo'], 'position': 'Haut droite',
+                   'size_percent': 20, 'opacity': 0.5, 'margin': 40, 'vertical_position': 0}
+    audio_config = {'audio_path': fixtures['audio'], 'volume': 0.8,
+                    'fade_in': 1.0, 'fade_out': 1.0, 'adapt_to_audio': False}
+
+    start = time.perf_counter()
+    ok = create_final_video_ultra_safe(
+        clips, output_path, shuffle=False, smart_shuffle=False,
+        logo_config=logo_config, audio_config=audio_config,
+        tagline_path=fixtures['tagline'], output_duration=output_duration
+    )
+    elapsed = time.perf_counter() - start
+    if not ok:
+        raise RuntimeError(f"Échec du backend {backend}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clips', type=int, default=6)
+    parser.add_argument('--clip-duration', type=float, default=4)
+    parser.add_argument('--output-duration', type=float, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixtures = make_fixtures(work_dir, args.clips, args.clip_duration)
+        results = {}
+        for backend in ('moviepy', 'ffmpeg'):
+            output_path = os.path.join(work_dir, f"out_{backend}.mp4")
+            results[backend] = run_backend(backend, fixtures, output_path, args.output_duration)
+
+        print(f"\nClips: {args.clips} x {args.clip_duration}s, sortie: {args.output_duration}s + tagline")
+        for backend, elapsed in results.items():
+            print(f"  {backend:8s} {elapsed:7.2f} s")
+        print(f"  accélération: x{results['moviepy'] / results['ffmpeg']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
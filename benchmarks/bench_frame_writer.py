@@ -0,0 +1,95 @@
+"""
+Benchmark de l'écriture des frames : FFMPEG_VideoWriter de MoviePy vs tube direct (frame_writer)
+
+Envoie les mêmes frames synthétiques (1080x1920, 30 fps) avec le même encodage
+vers le muxer null (sans coût disque) ; les writers sont alternés à chaque tour
+et le meilleur tour est retenu.
+
+Usage :
+    python benchmarks/bench_frame_writer.py [--seconds 5] [--rounds 3] [--codec intermediate|rawvideo]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import VIDEO_FORMAT
+from ffmpeg_utils import intermediate_codec_args
+from frame_writer import open_frame_writer, write_frame, close_frame_writer
+
+
+def make_frames(width: int, height: int, count: int = 8) -> list:
+    """Frames synthétiques (dégradés décalés), coût de génération négligeable"""
+    base = np.add.outer(np.arange(height), np.arange(width)).astype(np.uint8)
+    return [np.ascontiguousarray(np.stack([np.roll(base, 16 * i, axis=1)] * 3, axis=-1))
+            for i in range(count)]
+
+
+def run_moviepy(frames: list, total: int, codec_args: list) -> None:
+    """tobytes() puis écriture bloquante, par frame"""
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+    codec = codec_args[codec_args.index('-c:v') + 1]
+    params = [arg for i, arg in enumerate(codec_args)
+              if arg != '-c:v' and (i == 0 or codec_args[i - 1] != '-c:v')]
+    writer = FFMPEG_VideoWriter(os.devnull, (VIDEO_FORMAT['width'], VIDEO_FORMAT['height']),
+                                VIDEO_FORMAT['fps'], codec=codec, ffmpeg_params=params)
+    for idx in range(total):
+        writer.write_frame(frames[idx % len(frames)])
+    writer.close()
+
+
+def run_direct(frames: list, total: int, codec_args: list) -> int:
+    """Envoi depuis la mémoire de la frame, sans objet bytes intermédiaire"""
+    writer = open_frame_writer(os.devnull, (VIDEO_FORMAT['width'], VIDEO_FORMAT['height']),
+                               VIDEO_FORMAT['fps'], codec_args)
+    for idx in range(total):
+        write_frame(writer, frames[idx % len(frames)])
+    result = close_frame_writer(writer)
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    return result['stalls']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--codec', choices=['intermediate', 'rawvideo'], default='intermediate',
+                        help="rawvideo: mesure l'envoi des frames seul, sans coût d'encodage")
+    args = parser.parse_args()
+
+    if args.codec == 'rawvideo':
+        codec_args = ['-c:v', 'rawvideo', '-pix_fmt', 'rgb24']
+    else:
+        codec_args = intermediate_codec_args(args.seconds)
+    codec_args = codec_args + ['-f', 'null']
+
+    width, height, fps = VIDEO_FORMAT['width'], VIDEO_FORMAT['height'], VIDEO_FORMAT['fps']
+    frames = make_frames(width, height)
+    total = int(args.seconds * fps)
+    megabytes = total * width * height * 3 / 1024 / 1024
+
+    results = {}
+    stalls = {}
+    for _ in range(max(args.rounds, 1)):
+        for name, run in (('moviepy', run_moviepy), ('direct', run_direct)):
+            start = time.perf_counter()
+            stalled = run(frames, total, codec_args)
+            elapsed = time.perf_counter() - start
+            if elapsed < results.get(name, float('inf')):
+                results[name], stalls[name] = elapsed, stalled
+
+    print(f"\nFrames: {total} ({width}x{height}), codec: {args.codec}, meilleur de {args.rounds} tours")
+    for name, elapsed in results.items():
+        stalled = '' if stalls[name] is None else f" · {stalls[name]} attente(s)"
+        print(f"  {name:8s} {total / elapsed:7.1f} fps · {megabytes / elapsed:7.1f} Mo/s · {elapsed:.2f} s{stalled}")
+    print(f"  accélération: x{results['moviepy'] / results['direct']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark des formats intermédiaires : temps d'encodage et de décodage, espace disque, qualité finale
+
+Génère une source synthétique bruitée (1080x1920, 30 fps, grain type caméra),
+lui fait traverser plusieurs générations d'intermédiaires avec chaque format
+de INTERMEDIATE_FORMATS, encode la vidéo finale puis mesure la perte de
+génération (PSNR du dernier intermédiaire) et la qualité finale (SSIM/PSNR)
+par rapport à la source.
+
+Usage :
+    python benchmarks/bench_intermediates.py [--duration 5] [--generations 3] [--formats x264_crf18 ffv1]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import VIDEO_FORMAT, INTERMEDIATE_FORMATS, INTERMEDIATE_SETTINGS, FFMPEG_BINARIES
+
+
+def _ffmpeg(*args) -> str:
+    result = subprocess.run(
+        [FFMPEG_BINARIES['ffmpeg'], '-hide_banner', '-nostdin', '-y'] + list(args),
+        capture_output=True, text=True, check=True
+    )
+    return result.stderr
+
+
+def make_source(work_dir: str, duration: float) -> str:
+    """Crée la source synthétique du benchmark (quasi sans perte)"""
+    size = f"{VIDEO_FORMAT['width']}x{VIDEO_FORMAT['height']}"
+    path = os.path.join(work_dir, 'source.mp4')
+    _ffmpeg('-f', 'lavfi', '-i', f"testsrc2=size={size}:rate={VIDEO_FORMAT['fps']},noise=alls=4:allf=t",
+            '-t', str(duration), '-c:v', 'libx264', '-preset', 'ultrafast', '-qp', '0',
+            '-pix_fmt', 'yuv420p', path)
+    return path
+
+
+def measure_quality(final_path: str, source_path: str) -> dict:
+    """SSIM et PSNR moyens par rapport à la source (frames alignées par numéro)"""
+    stderr = _ffmpeg('-i', final_path, '-i', source_path, '-lavfi',
+                     '[0:v]setpts=N/FRAME_RATE/TB,split[a][b];[1:v]setpts=N/FRAME_RATE/TB,split[c][d];'
+                     '[a][c]ssim;[b][d]psnr', '-f', 'null', '-')
+    ssim = re.search(r'SSIM .*All:([\d.]+)', stderr)
+    psnr = re.search(r'PSNR .*average:([\d.]+|inf)', stderr)
+    return {
+        'ssim': float(ssim.group(1)) if ssim else float('nan'),
+        'psnr': float(psnr.group(1)) if psnr else float('nan')
+    }
+
+
+def run_format(name: str, source_path: str, work_dir: str, duration: float, generations: int) -> dict:
+    """Fait passer la source par `generations` intermédiaires puis encode la vidéo finale"""
+    from crop_planner import compute_crop_window
+    from ffmpeg_extractor import build_extraction_command
+    from ffmpeg_utils import final_encoding_args, get_intermediate_format, run_ffmpeg
+
+    INTERMEDIATE_SETTINGS['format'] = name
+    fmt = get_intermediate_format(duration)
+    crop = compute_crop_window(VIDEO_FORMAT['width'], VIDEO_FORMAT['height'])
+
+    encode_time = decode_time = 0.0
+    size_bytes = 0
+    current = source_path
+    for generation in range(generations):
+        output = os.path.join(work_dir, f"{name}_gen{generation}{fmt['extension']}")
+        start = time.perf_counter()
+        success, stderr = run_ffmpeg(build_extraction_command(current, 0, duration, crop, output))
+        encode_time += time.perf_counter() - start
+        if not success:
+            raise RuntimeError(f"Échec de l'encodage {name}: {stderr.strip()[-300:]}")
+
+        start = time.perf_counter()
+        _ffmpeg('-i', output, '-f', 'null', '-')
+        decode_time += time.perf_counter() - start
+
+        size_bytes = os.path.getsize(output)
+        if current != source_path:
+            os.remove(current)
+        current = output
+
+    intermediate_quality = measure_quality(current, source_path)
+
+    final_path = os.path.join(work_dir, f"{name}_final.mp4")
+    _ffmpeg('-i', current, *final_encoding_args(), final_path)
+    os.remove(current)
+
+    final_quality = measure_quality(final_path, source_path)
+    os.remove(final_path)
+    return {
+        'encode': encode_time / generations,
+        'decode': decode_time / generations,
+        'size_mb': size_bytes / 1024 / 1024,
+        'intermediate_psnr': intermediate_quality['psnr'],
+        **final_quality
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--generations', type=int, default=3)
+    parser.add_argument('--formats', nargs='+', default=list(INTERMEDIATE_FORMATS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_path = make_source(work_dir, args.duration)
+        results = {name: run_format(name, source_path, work_dir, args.duration, args.generations)
+                   for name in args.formats}
+
+    print(f"\nSource: {args.duration}s 1080x1920, {args.generations} génération(s) d'intermédiaires")
+    print(f"  {'format':14s} {'encodage':>9s} {'décodage':>9s} {'disque':>9s} "
+          f"{'PSNR inter.':>11s} {'SSIM final':>10s} {'PSNR final':>10s}")
+    for name, r in results.items():
+        print(f"  {name:14s} {r['encode']:8.2f}s {r['decode']:8.2f}s {r['size_mb']:6.0f} MB "
+              f"{r['intermediate_psnr']:11.2f} {r['ssim']:10.4f} {r['psnr']:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
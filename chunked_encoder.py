@@ -0,0 +1,198 @@
+"""
+Module d'encodage final par segments parallèles
+===============================================
+Découpe le montage principal en COMPOSITION_SETTINGS['chunks'] segments de
+durées proches, encodés en parallèle (un processus ffmpeg par segment, mêmes
+paramètres d'encodage, GOP fermés) puis joints par le démultiplexeur concat
+en copie de flux. La bande son préparée est multiplexée sur le résultat.
+
+Les coupures entre segments tombent sur des frontières de clips : chaque
+segment commence par une image clé sur un changement de plan, où l'encodeur
+en placerait une de toute façon, et la reprise du contrôle de débit n'est
+pas visible aux raccords.
+
+Fonctions principales :
+- plan_chunks : Répartit les clips du montage en segments
+- encode_in_chunks : Encode le montage principal par segments parallèles
+"""
+import os
+import time
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from constants import COMPOSITION_SETTINGS, VIDEO_FORMAT, PROGRESS_SETTINGS
+from ffmpeg_utils import ffmpeg_base_command, run_ffmpeg, final_encoding_args
+from ffmpeg_composer import build_composition_command
+from ffmpeg_concat import concat_with_demuxer
+from video_probe import probe_video
+from encode_progress import progress_reporter, emit_metrics
+from scratch_space import scratch_path
+
+
+def plan_chunks(plan: Dict, chunks: int) -> List[Dict]:
+    """
+    Répartit les clips du montage en segments consécutifs de durées proches
+
+    Args:
+        plan: Plan issu de plan_composition
+        chunks: Nombre de segments souhaité
+
+    Returns:
+        List[Dict]: Plans de composition des segments (liste vide si un seul segment)
+    """
+    main_duration = plan['main_duration']
+    chunks = min(
+        chunks,
+        len(plan['inputs']),
+        int(main_duration // COMPOSITION_SETTINGS['min_chunk_seconds'])
+    )
+    if chunks <= 1:
+        return []
+
+    target = main_duration / chunks
+    segments = []
+    current = {'inputs': [], 'durations': [], 'start': 0.0}
+    offset = 0.0
+    for path, duration in zip(plan['inputs'], plan['durations']):
+        if offset >= main_duration:
+            break
+        # Coupure sur une frontière de clip dès que le segment atteint sa part
+        if current['inputs'] and sum(current['durations']) >= target and len(segments) < chunks - 1:
+            segments.append(current)
+            current = {'inputs': [], 'durations': [], 'start': offset}
+        current['inputs'].append(path)
+        current['durations'].append(duration)
+        offset += duration
+    segments.append(current)
+
+    for idx, segment in enumerate(segments):
+        end = segments[idx + 1]['start'] if idx + 1 < len(segments) else main_duration
+        segment['main_duration'] = end - segment['start']
+        segment['audio_duration'] = None
+    return segments if len(segments) > 1 else []
+
+
+def _join_chunks(
+    chunk_paths: List[str],
+    output_path: str,
+    main_duration: float,
+    soundtrack_path: Optional[str]
+) -> bool:
+    """Joint les segments par copie de flux et multiplexe la bande son"""
+    work_dir = os.path.dirname(os.path.abspath(output_path))
+    if not soundtrack_path:
+        return concat_with_demuxer(chunk_paths, output_path, work_dir)
+
+    joined_path = scratch_path("chunks_joined", '.mp4')
+    try:
+        if not concat_with_demuxer(chunk_paths, joined_path, work_dir):
+            return False
+        cmd = ffmpeg_base_command() + [
+            '-i', joined_path,
+            '-i', soundtrack_path,
+            '-map', '0:v:0', '-map', '1:a:0',
+            '-c', 'copy',
+            '-t', f"{main_duration:.3f}",
+            '-movflags', '+faststart',
+            output_path
+        ]
+        success, stderr = run_ffmpeg(cmd)
+        if not success:
+            st.warning(f"⚠️ Multiplexage de la bande son échoué: {stderr.strip()[-300:]}")
+        return success and os.path.exists(output_path)
+    finally:
+        if os.path.exists(joined_path):
+            os.remove(joined_path)
+
+
+def encode_in_chunks(
+    plan: Dict,
+    output_path: str,
+    logo_config: Optional[Dict] = None,
+    soundtrack_path: Optional[str] = None,
+    crf: Optional[float] = None
+) -> bool:
+    """
+    Encode le montage principal par segments parallèles joints par copie de flux
+
+    Args:
+        plan: Plan issu de plan_composition
+        output_path: Vidéo à écrire (montage principal, sans tagline)
+        logo_config: Configuration du logo
+        soundtrack_path: Bande son déjà mixée (prepare_soundtrack)
+        crf: Qualité constante imposée (taille cible), sinon celle du profil final
+
+    Returns:
+        bool: True si la vidéo a été écrite (False: encoder en une passe)
+    """
+    segments = plan_chunks(plan, COMPOSITION_SETTINGS['chunks'])
+    if not segments:
+        return False
+
+    # Cœurs répartis entre les encodeurs ; mêmes paramètres pour tous les segments
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+    encoding_args = final_encoding_args(threads, crf) + ['-flags', '+cgop']
+    fps = VIDEO_FORMAT['fps']
+    durations = ', '.join(f"{seg['main_duration']:.1f}s" for seg in segments)
+    st.info(f"🧩 Encodage final en {len(segments)} segments parallèles ({durations})")
+
+    chunk_paths = [scratch_path(f"final_chunk_{idx}", '.mp4') for idx in range(len(segments))]
+    frames_done = [0] * len(segments)
+    report = progress_reporter("Encodage final", plan['main_duration'] * fps)
+    start = time.perf_counter()
+
+    def encode(idx: int):
+        cmd = build_composition_command(
+            segments[idx], chunk_paths[idx], logo_config, encoding_args=encoding_args
+        )
+
+        def progress(frames: int, final: bool = False) -> None:
+            frames_done[idx] = frames
+
+        return run_ffmpeg(cmd, progress=progress)
+
+    try:
+        # Les encodeurs tournent dans des processus ffmpeg ; la progression
+        # cumulée est affichée depuis le thread de la session Streamlit
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+            futures = [executor.submit(encode, idx) for idx in range(len(segments))]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=PROGRESS_SETTINGS['update_interval'])
+                report(sum(frames_done))
+            results = [future.result() for future in futures]
+
+        for idx, (success, stderr) in enumerate(results):
+            if not success or not os.path.exists(chunk_paths[idx]):
+                st.warning(f"⚠️ Segment {idx + 1} non encodé: {stderr.strip()[-300:]}")
+                return False
+        report(int(plan['main_duration'] * fps), True)
+
+        if not _join_chunks(chunk_paths, output_path, plan['main_duration'], soundtrack_path):
+            return False
+
+        # Raccords sans trou ni recouvrement : durée identique au montage prévu
+        info = probe_video(output_path)
+        if not info or abs(info['duration'] - plan['main_duration']) > 2.0 / fps:
+            st.warning(f"⚠️ Durée des segments joints incorrecte "
+                       f"({info['duration'] if info else 0:.2f}s / {plan['main_duration']:.2f}s)")
+            os.remove(output_path)
+            return False
+
+        elapsed = time.perf_counter() - start
+        emit_metrics({
+            'stage': 'final_encode',
+            'time': time.time(),
+            'mode': 'chunks',
+            'chunks': len(segments),
+            'threads_per_chunk': threads,
+            'duration': round(plan['main_duration'], 3),
+            'elapsed': round(elapsed, 3),
+            'pid': os.getpid()
+        })
+        st.success(f"✅ {len(segments)} segments encodés et joints en {elapsed:.1f}s")
+        return True
+    finally:
+        for path in chunk_paths:
+            if os.path.exists(path):
+                os.remove(path)
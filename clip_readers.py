@@ -0,0 +1,192 @@
+"""
+Module des clips paresseux et du pool de lecteurs vidéo
+=======================================================
+Le rendu d'un segment produit un descripteur léger (fichier intermédiaire,
+bornes dans la source, plan de crop) au lieu d'un VideoFileClip : aucun
+processus ffmpeg de lecture ne reste ouvert entre l'extraction et
+l'assemblage. Quand un clip MoviePy est nécessaire, il est ouvert à la
+demande depuis un pool borné (READER_POOL_SETTINGS['max_open'] lecteurs
+inactifs au plus, les moins récemment utilisés sont fermés en premier).
+
+Fonctions principales :
+- make_clip_descriptor : Descripteur d'un clip rendu
+- acquire_reader / release_reader : Emprunt et restitution d'un lecteur du pool
+- open_reader : Lecteur emprunté le temps d'un bloc with
+- close_readers : Ferme les lecteurs du pool
+- reader_metrics : Lecteurs et processus ffmpeg ouverts
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from moviepy.editor import VideoFileClip
+from constants import READER_POOL_SETTINGS
+
+# Lecteurs ouverts par chemin, du moins au plus récemment utilisé
+_readers: 'OrderedDict[str, Dict]' = OrderedDict()
+_lock = threading.RLock()
+_counters = {'opened': 0, 'reused': 0, 'evicted': 0, 'peak_open': 0}
+
+
+def make_clip_descriptor(
+    path: str,
+    segment: Dict,
+    duration: float,
+    method: str = 'encode',
+    bounds: Optional[Tuple[float, float]] = None
+) -> Dict:
+    """
+    Descripteur d'un clip rendu (aucun lecteur ouvert)
+
+    Args:
+        path: Fichier intermédiaire du clip
+        segment: Segment planifié (source, bornes, crop), non modifié
+        duration: Durée du fichier intermédiaire
+        method: Mode de rendu ('copy', 'encode' ou 'moviepy')
+        bounds: Bornes réellement rendues dans la source (défaut: celles du segment)
+
+    Returns:
+        Dict: {'path', 'source_path', 'start', 'end', 'planned_duration',
+            'duration', 'crop', 'method'}
+    """
+    start, end = bounds or (segment['start'], segment['end'])
+    return {
+        'path': path,
+        'source_path': segment['source_path'],
+        'start': start,
+        'end': end,
+        'planned_duration': segment['end'] - segment['start'],
+        'duration': duration,
+        'crop': segment['crop'],
+        'method': method
+    }
+
+
+def is_clip_descriptor(clip) -> bool:
+    """Indique si un clip est un descripteur (et non un clip MoviePy)"""
+    return isinstance(clip, dict) and 'path' in clip
+
+
+def _evict_idle(max_open: int) -> None:
+    """Ferme les lecteurs inactifs les moins récemment utilisés au-delà de max_open"""
+    for path in list(_readers):
+        if len(_readers) <= max_open:
+            break
+        entry = _readers[path]
+        if entry['users'] > 0:
+            continue
+        del _readers[path]
+        _counters['evicted'] += 1
+        try:
+            entry['clip'].close()
+        except Exception:
+            pass
+
+
+def acquire_reader(path: str) -> VideoFileClip:
+    """
+    Emprunte un lecteur du pool (ouvert à la demande)
+
+    Le lecteur reste dans le pool après restitution pour être réutilisé ;
+    les lecteurs empruntés ne sont jamais fermés par l'éviction.
+
+    Args:
+        path: Fichier vidéo (intermédiaire sans audio)
+
+    Returns:
+        VideoFileClip: Lecteur du fichier
+    """
+    with _lock:
+        entry = _readers.get(path)
+        if entry is not None:
+            _readers.move_to_end(path)
+            entry['users'] += 1
+            _counters['reused'] += 1
+            return entry['clip']
+
+        _evict_idle(READER_POOL_SETTINGS['max_open'] - 1)
+        clip = VideoFileClip(path, audio=False)
+        _readers[path] = {'clip': clip, 'users': 1}
+        _counters['opened'] += 1
+        _counters['peak_open'] = max(_counters['peak_open'], len(_readers))
+        return clip
+
+
+def release_reader(path: str) -> None:
+    """
+    Restitue un lecteur emprunté
+
+    Args:
+        path: Fichier vidéo du lecteur
+    """
+    with _lock:
+        entry = _readers.get(path)
+        if entry is None:
+            return
+        entry['users'] = max(entry['users'] - 1, 0)
+        _evict_idle(READER_POOL_SETTINGS['max_open'])
+
+
+@contextmanager
+def open_reader(path: str):
+    """
+    Lecteur emprunté le temps d'un bloc with
+
+    Args:
+        path: Fichier vidéo
+
+    Yields:
+        VideoFileClip: Lecteur du fichier
+    """
+    clip = acquire_reader(path)
+    try:
+        yield clip
+    finally:
+        release_reader(path)
+
+
+def close_readers(path: Optional[str] = None) -> int:
+    """
+    Ferme les lecteurs du pool (même empruntés : fin de tâche)
+
+    Args:
+        path: Ne fermer que le lecteur de ce fichier (défaut: tous)
+
+    Returns:
+        int: Nombre de lecteurs fermés
+    """
+    with _lock:
+        paths = [path] if path is not None else list(_readers)
+        closed = 0
+        for p in paths:
+            entry = _readers.pop(p, None)
+            if entry is None:
+                continue
+            try:
+                entry['clip'].close()
+            except Exception:
+                pass
+            closed += 1
+        return closed
+
+
+def reader_metrics() -> Dict[str, int]:
+    """
+    Lecteurs et processus ffmpeg ouverts par le pool
+
+    Returns:
+        Dict[str, int]: open_readers, in_use, ffmpeg_processes, opened, reused, evicted, peak_open
+    """
+    with _lock:
+        processes = 0
+        for entry in _readers.values():
+            reader = getattr(entry['clip'], 'reader', None)
+            proc = getattr(reader, 'proc', None)
+            if proc is not None and proc.poll() is None:
+                processes += 1
+        return {
+            'open_readers': len(_readers),
+            'in_use': sum(1 for entry in _readers.values() if entry['users'] > 0),
+            'ffmpeg_processes': processes,
+            **_counters
+        }
@@ -2,6 +2,7 @@
 Constantes et configurations pour Upload Video Mixer
 """
 import os
+import tempfile
 
 # Détection de l'environnement (pour compatibilité)
 IS_RAILWAY = False
@@ -100,4 +101,185 @@ EAST_DNN_PARAMS = {
 INPAINT_PARAMS = {
     'radius': 3,
     'padding': 5
-}
\ No newline at end of file
+}
+
+# Binaires ffmpeg (surchargeables par variables d'environnement)
+FFMPEG_BINARIES = {
+    'ffmpeg': os.environ.get('FFMPEG_BINARY', 'ffmpeg'),
+    'ffprobe': os.environ.get('FFPROBE_BINARY', 'ffprobe')
+}
+
+# Formats des clips intermédiaires (extraction ffmpeg, matérialisation MoviePy)
+# Les formats sans perte en intra seule évitent la perte de génération entre
+# les passes, au prix de l'espace disque. Pas de Matroska (horodatages au
+# 1/1000 s : le filtre fps duplique ou perd des frames lors des réextractions)
+# ni de NUT (durée arrêtée au dernier horodatage, une frame de moins par clip).
+# Comparer les formats avec benchmarks/bench_intermediates.py
+INTERMEDIATE_FORMATS = {
+    'x264_crf18': {  # Compact, avec perte (ancien format)
+        'codec': 'libx264',
+        'preset': 'ultrafast',
+        'args': ['-crf', '18'],
+        'pix_fmt': 'yuv420p',
+        'extension': '.mp4'
+    },
+    'x264_lossless': {  # H.264 sans perte, une image clé par frame
+        'codec': 'libx264',
+        'preset': 'ultrafast',
+        'args': ['-qp', '0', '-g', '1'],
+        'pix_fmt': 'yuv420p',
+        'extension': '.mp4'
+    },
+    'ffv1': {  # FFV1 sans perte, intra seule
+        'codec': 'ffv1',
+        'args': ['-level', '3', '-g', '1', '-slices', '4'],
+        'pix_fmt': 'yuv420p',
+        'extension': '.mov'
+    },
+    'raw': {  # Non compressé, réservé aux clips courts
+        'codec': 'rawvideo',
+        'args': [],
+        'pix_fmt': 'yuv420p',
+        'extension': '.avi',
+        'max_duration': 6.0,
+        'fallback': 'x264_lossless'
+    }
+}
+
+INTERMEDIATE_SETTINGS = {
+    'format': os.environ.get('INTERMEDIATE_FORMAT', 'x264_crf18')
+}
+
+# Découpe par copie de flux (sources déjà au format cible)
+STREAM_COPY_SETTINGS = {
+    'enabled': True,
+    'codec': 'h264',
+    'pix_fmt': 'yuv420p',
+    'fps_tolerance': 0.01,
+    'keyframe_tolerance': 0.25  # Allongement max (s) d'une borne vers l'image clé extérieure
+}
+
+# Composition finale : 'ffmpeg' (un seul graphe de filtres, un seul encodage)
+# ou 'moviepy' (chaîne historique avec matérialisations successives)
+COMPOSITION_SETTINGS = {
+    'backend': os.environ.get('COMPOSITION_BACKEND', 'ffmpeg'),
+    'audio_sample_rate': 44100,
+    'audio_bitrate': '128k',
+    # Encodage final en segments parallèles joints par copie de flux (1 = une seule passe)
+    'chunks': int(os.environ.get('FINAL_ENCODE_CHUNKS', '1')),
+    'min_chunk_seconds': 5.0
+}
+
+# Cache disque des ressources préparées (logo, ...), conservé entre les exécutions
+CACHE_SETTINGS = {
+    'dir': os.environ.get('ASSET_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'upload_video_mixer_cache'))
+}
+
+# Aperçu brouillon : même plan de montage, rendu basse résolution en quelques secondes
+DRAFT_SETTINGS = {
+    'width': 360,
+    'height': 640,
+    'fps': 12
+}
+
+# Suivi de l'encodage : intervalle minimal entre deux mises à jour de l'interface
+# et fichier JSONL optionnel recevant les mesures (frames, fps, ETA)
+PROGRESS_SETTINGS = {
+    'update_interval': 0.5,
+    'metrics_path': os.environ.get('ENCODE_METRICS_PATH')
+}
+
+# Espace de travail : un répertoire par tâche sous 'dir', budget disque total
+# (tâches + cache) avec éviction LRU du cache, répertoire rapide optionnel
+# (tmpfs, ex: /dev/shm) pour les fichiers intermédiaires de courte durée
+SCRATCH_SETTINGS = {
+    'dir': os.environ.get('SCRATCH_DIR', os.path.join(tempfile.gettempdir(), 'upload_video_mixer_jobs')),
+    'fast_dir': os.environ.get('SCRATCH_FAST_DIR'),
+    'fast_min_free_mb': 512,
+    'budget_mb': int(os.environ.get('SCRATCH_BUDGET_MB', '8192')),
+    'budget_check_seconds': 30,  # Intervalle min entre deux parcours du disque hors création de tâche
+    'orphan_max_age_hours': 24
+}
+
+# Pool de lecteurs vidéo : nombre max de VideoFileClip (processus ffmpeg) ouverts et inactifs
+READER_POOL_SETTINGS = {
+    'max_open': int(os.environ.get('READER_POOL_MAX_OPEN', '4'))
+}
+
+# Import des vidéos : acceptée telle quelle, remuxée en MP4 par copie de flux,
+# ou transcodée (codec non copiable, cadence variable, vidéo illisible)
+INGEST_SETTINGS = {
+    'accept_formats': ('mp4', 'mov'),
+    'copy_codecs': ('h264', 'hevc'),
+    'copy_pix_fmts': ('yuv420p', 'yuvj420p'),
+    'mp4_audio_codecs': ('aac', 'mp3', 'ac3', 'eac3', 'alac'),
+    'vfr_tolerance': 0.01  # Écart relatif max entre cadence moyenne et cadence nominale
+}
+
+# Stockage des vidéos uploadées par empreinte du contenu, partagé entre sessions :
+# écriture par blocs, import (remux/transcodage) et métadonnées conservés,
+# objets non référencés évincés au-delà du budget
+UPLOAD_STORE_SETTINGS = {
+    'dir': os.environ.get('UPLOAD_STORE_DIR', os.path.join(tempfile.gettempdir(), 'upload_video_mixer_store')),
+    'chunk_size': 8 * 1024 * 1024,
+    'budget_mb': int(os.environ.get('UPLOAD_STORE_BUDGET_MB', '16384'))
+}
+
+# Pipeline import → analyse → rendu : files bornées entre les étapes (contre-pression)
+PIPELINE_SETTINGS = {
+    'queue_size': int(os.environ.get('PIPELINE_QUEUE_SIZE', '1'))
+}
+
+# Rendu des clips en parallèle : processus de rendu et threads par processus
+# (ffmpeg et OpenCV) ; 1 processus = rendu séquentiel dans le processus principal
+_CPU_COUNT = os.cpu_count() or 1
+RENDER_POOL_SETTINGS = {
+    'workers': int(os.environ.get('RENDER_WORKERS', str(min(4, max(1, _CPU_COUNT // 2))))),
+    'threads_per_worker': int(os.environ.get('RENDER_WORKER_THREADS', '0'))  # 0 = cœurs / processus
+}
+
+# Profils d'encodage vidéo nommés : codec, preset, qualité constante (crf) ou
+# débit (bitrate), threads (0 = choix de ffmpeg), tune et GOP optionnels.
+# Comparables sur la machine courante : python encoder_profiles.py benchmark <clip>
+ENCODER_PROFILES = {
+    'railway_fast': {'codec': 'libx264', 'preset': 'ultrafast', 'bitrate': '4000k', 'threads': 2},
+    'balanced': {'codec': 'libx264', 'preset': 'fast', 'bitrate': VIDEO_FORMAT['bitrate'], 'threads': 4},
+    'quality': {'codec': 'libx264', 'preset': 'medium', 'bitrate': VIDEO_FORMAT['bitrate'], 'threads': 8},
+    'max_quality': {'codec': 'libx264', 'preset': 'slow', 'bitrate': '8000k', 'threads': 8},
+    'railway_lean': {'codec': 'libx264', 'preset': 'ultrafast', 'bitrate': '3000k', 'threads': 2},
+    'railway_lean_long': {'codec': 'libx264', 'preset': 'ultrafast', 'bitrate': '2000k', 'threads': 2},
+    'ingest': {'codec': 'libx264', 'preset': 'fast', 'crf': 23, 'threads': 0},
+    'draft': {'codec': 'libx264', 'preset': 'ultrafast', 'crf': 32, 'threads': 0},
+    # Candidats à qualité constante, à départager par le benchmark
+    'crf_veryfast': {'codec': 'libx264', 'preset': 'veryfast', 'crf': 21, 'threads': 0, 'gop': 60},
+    'crf_medium': {'codec': 'libx264', 'preset': 'medium', 'crf': 20, 'threads': 0, 'gop': 60},
+    'crf_film': {'codec': 'libx264', 'preset': 'medium', 'crf': 20, 'threads': 0, 'tune': 'film', 'gop': 60}
+}
+
+# Profil utilisé par chaque étape (surchargeable : ENCODER_PROFILE_<ÉTAPE>, ex: ENCODER_PROFILE_FINAL)
+# legacy_final_* : ancien assemblage create_final_video selon la durée (≤30s, ≤60s, au-delà)
+_DEFAULT_STAGE_PROFILES = {
+    'final': 'railway_fast' if IS_RAILWAY else 'balanced',
+    'ingest': 'ingest',
+    'draft': 'draft',
+    'legacy_final_short': 'railway_lean' if IS_RAILWAY else 'max_quality',
+    'legacy_final': 'railway_lean_long' if IS_RAILWAY else 'max_quality',
+    'legacy_final_long': 'railway_lean_long' if IS_RAILWAY else 'quality'
+}
+ENCODER_STAGES = {
+    stage: os.environ.get(f"ENCODER_PROFILE_{stage.upper()}", profile)
+    for stage, profile in _DEFAULT_STAGE_PROFILES.items()
+}
+
+# Encodage à taille cible : quelques extraits du montage encodés à plusieurs CRF,
+# modèle débit = f(CRF) ajusté, puis un seul encodage final au CRF qui tient le budget
+TARGET_SIZE_SETTINGS = {
+    'max_mb': float(os.environ.get('TARGET_SIZE_MB', '0')),  # 0 = débit du profil final
+    'margin': 0.95,  # Part du budget visée (erreur du modèle, en-têtes du conteneur)
+    'samples': 3,
+    'sample_seconds': 2.0,
+    'workers': int(os.environ.get('TARGET_SIZE_WORKERS', '2')),  # Encodages d'extraits simultanés
+    'crf_values': (20, 26, 32),
+    'crf_min': 16,
+    'crf_max': 40
+}
@@ -0,0 +1,87 @@
+"""
+Module de calcul du cadrage vertical 9:16
+Calcule la fenêtre de crop (indépendamment du moteur de rendu) à partir
+des dimensions source et des régions de visages détectées
+"""
+from typing import List, Dict, Optional
+from constants import VIDEO_FORMAT
+
+
+def compute_crop_window(
+    orig_w: int,
+    orig_h: int,
+    face_regions: Optional[List[Dict]] = None
+) -> Dict:
+    """
+    Calcule la fenêtre de crop pour passer au format vertical 9:16
+
+    Args:
+        orig_w: Largeur de la source
+        orig_h: Hauteur de la source
+        face_regions: Régions de visages pour le crop intelligent
+
+    Returns:
+        Dict: Fenêtre de crop {'x', 'y', 'width', 'height'} en pixels source
+    """
+    target_ratio = VIDEO_FORMAT['ratio']
+    orig_ratio = orig_w / orig_h
+
+    # Si déjà au bon ratio : pas de crop, simple resize
+    if abs(orig_ratio - target_ratio) < 0.1:
+        return {'x': 0, 'y': 0, 'width': orig_w, 'height': orig_h}
+
+    # Si horizontal (plus large que haut)
+    if orig_ratio > target_ratio:
+        new_width = int(orig_h * target_ratio)
+
+        # Centrer sur les visages si disponibles
+        if face_regions:
+            face_centers_x = [(r['x'] + r['width'] // 2) for r in face_regions]
+            avg_x = sum(face_centers_x) // len(face_centers_x)
+            x_start = avg_x - new_width // 2
+            x_start = max(0, min(x_start, orig_w - new_width))
+        else:
+            x_start = (orig_w - new_width) // 2
+
+        return {'x': int(x_start), 'y': 0, 'width': new_width, 'height': orig_h}
+
+    # Si trop vertical
+    new_height = int(orig_w / target_ratio)
+
+    # Garder les visages dans le cadre
+    if face_regions:
+        face_tops = [r['y'] for r in face_regions]
+        face_bottoms = [r['y'] + r['height'] for r in face_regions]
+        min_y = min(face_tops)
+        max_y = max(face_bottoms)
+
+        face_center_y = (min_y + max_y) // 2
+        y_start = face_center_y - new_height // 2
+
+        if y_start < 0:
+            y_start = 0
+        elif y_start + new_height > orig_h:
+            y_start = orig_h - new_height
+
+        if max_y - min_y > new_height * 0.8:
+            y_start = max(0, min_y - int(new_height * 0.1))
+    else:
+        y_start = (orig_h - new_height) // 2
+
+    return {'x': 0, 'y': int(y_start), 'width': orig_w, 'height': new_height}
+
+
+def is_full_frame(crop: Dict, orig_w: int, orig_h: int) -> bool:
+    """
+    Indique si la fenêtre de crop couvre toute l'image source
+
+    Args:
+        crop: Fenêtre de crop
+        orig_w: Largeur de la source
+        orig_h: Hauteur de la source
+
+    Returns:
+        bool: True si aucun crop n'est nécessaire
+    """
+    return (crop['x'] == 0 and crop['y'] == 0 and
+            crop['width'] == orig_w and crop['height'] == orig_h)
@@ -0,0 +1,146 @@
+"""
+Module d'aperçu brouillon
+=========================
+Rend le plan de montage (segments planifiés par plan_timeline) directement
+depuis les vidéos sources, en basse résolution et basse cadence, en une
+seule passe ffmpeg rapide. L'utilisateur juge la sélection des clips en
+quelques secondes avant de lancer l'encodage final avec le même plan.
+
+Le brouillon reprend le recadrage, l'ordre, les durées, le logo et la bande
+son ; la suppression du texte et la tagline ne sont pas rendues.
+
+Fonctions principales :
+- build_draft_command : Construit la commande ffmpeg du brouillon
+- render_draft : Rend l'aperçu brouillon d'un plan de montage
+"""
+import os
+import streamlit as st
+from typing import List, Dict, Optional
+from constants import VIDEO_FORMAT, DRAFT_SETTINGS
+from ffmpeg_utils import ffmpeg_base_command, run_ffmpeg
+from encoder_profiles import encoder_args
+from logo_overlay import logo_size, logo_position
+from audio_prep import prepare_soundtrack
+from encode_progress import progress_reporter
+
+
+def build_draft_command(
+    planned_segments: List[Dict],
+    output_path: str,
+    logo_config: Optional[Dict] = None,
+    soundtrack_path: Optional[str] = None
+) -> List[str]:
+    """
+    Construit la commande ffmpeg du brouillon (sources → montage basse résolution)
+
+    Args:
+        planned_segments: Segments planifiés dans l'ordre du montage
+        output_path: Chemin de l'aperçu
+        logo_config: Configuration du logo
+        soundtrack_path: Bande son déjà mixée (prepare_soundtrack)
+
+    Returns:
+        List[str]: Commande ffmpeg
+    """
+    width, height, fps = DRAFT_SETTINGS['width'], DRAFT_SETTINGS['height'], DRAFT_SETTINGS['fps']
+    total_duration = sum(seg['end'] - seg['start'] for seg in planned_segments)
+
+    cmd = ffmpeg_base_command()
+    filters = []
+
+    # Chaque segment est lu directement dans sa source (seek avant l'entrée)
+    for idx, seg in enumerate(planned_segments):
+        cmd += ['-ss', f"{seg['start']:.3f}", '-t', f"{seg['end'] - seg['start']:.3f}",
+                '-i', seg['source_path']]
+        crop = seg['crop']
+        filters.append(
+            f"[{idx}:v]crop={crop['width']}:{crop['height']}:{crop['x']}:{crop['y']},"
+            f"scale={width}:{height}:flags=fast_bilinear,setsar=1,fps={fps},format=yuv420p,"
+            f"setpts=PTS-STARTPTS[v{idx}]"
+        )
+    n_clips = len(planned_segments)
+    concat_inputs = ''.join(f"[v{idx}]" for idx in range(n_clips))
+    filters.append(f"{concat_inputs}concat=n={n_clips}:v=1:a=0[main]")
+    video_label = 'main'
+    next_input = n_clips
+
+    # Logo à l'échelle du brouillon (mêmes règles de taille et de position)
+    if logo_config and logo_config.get('logo_path'):
+        scale = width / VIDEO_FORMAT['width']
+        logo_width, logo_height = logo_size(logo_config['logo_path'], logo_config.get('size_percent', 20))
+        x, y = logo_position(logo_config.get('position', "Haut gauche"), logo_width,
+                             logo_config.get('margin', 40), logo_config.get('vertical_position', 10))
+        cmd += ['-i', logo_config['logo_path']]
+        filters.append(
+            f"[{next_input}:v]scale={max(2, int(logo_width * scale))}:{max(2, int(logo_height * scale))},"
+            f"format=rgba,colorchannelmixer=aa={logo_config.get('opacity', 0.5):.3f}[logo]"
+        )
+        filters.append(
+            f"[{video_label}][logo]overlay=x={int(x * scale)}:y={int(y * scale)}:format=auto,"
+            f"format=yuv420p[withlogo]"
+        )
+        video_label = 'withlogo'
+        next_input += 1
+
+    audio_map = ['-an']
+    if soundtrack_path:
+        cmd += ['-i', soundtrack_path]
+        audio_map = ['-map', f"{next_input}:a:0", '-c:a', 'copy']
+
+    cmd += ['-filter_complex', ';'.join(filters), '-map', f"[{video_label}]"] + audio_map
+
+    cmd += encoder_args('draft') + [
+        '-movflags', '+faststart',
+        '-t', f"{total_duration:.3f}",
+        output_path
+    ]
+    return cmd
+
+
+def render_draft(
+    planned_segments: List[Dict],
+    output_path: str,
+    logo_config: Optional[Dict] = None,
+    audio_config: Optional[Dict] = None
+) -> bool:
+    """
+    Rend l'aperçu brouillon d'un plan de montage
+
+    Args:
+        planned_segments: Segments planifiés (plan_timeline)
+        output_path: Chemin de l'aperçu
+        logo_config: Configuration du logo
+        audio_config: Configuration audio
+
+    Returns:
+        bool: True si l'aperçu a été créé
+    """
+    if not planned_segments:
+        st.error("❌ Aucun segment planifié pour l'aperçu")
+        return False
+
+    total_duration = sum(seg['end'] - seg['start'] for seg in planned_segments)
+
+    # Bande son mixée à la durée du plan (cache partagé avec les rendus suivants)
+    soundtrack_path = None
+    if audio_config and audio_config.get('audio_path'):
+        soundtrack_path = prepare_soundtrack(
+            audio_config['audio_path'],
+            volume=audio_config.get('volume', 1.0),
+            fade_in=audio_config.get('fade_in', 0),
+            fade_out=audio_config.get('fade_out', 0),
+            main_duration=total_duration,
+            total_duration=total_duration
+        )
+
+    cmd = build_draft_command(planned_segments, output_path, logo_config, soundtrack_path)
+    report = progress_reporter("Aperçu brouillon", total_duration * DRAFT_SETTINGS['fps'])
+    success, stderr = run_ffmpeg(cmd, progress=report)
+
+    if not success or not os.path.exists(output_path):
+        st.error(f"❌ Aperçu brouillon échoué: {stderr.strip()[-500:]}")
+        return False
+
+    st.success(f"⚡ Aperçu brouillon prêt: {total_duration:.1f}s en "
+               f"{DRAFT_SETTINGS['width']}x{DRAFT_SETTINGS['height']} {DRAFT_SETTINGS['fps']} fps")
+    return True
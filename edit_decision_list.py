@@ -0,0 +1,374 @@
+"""
+Module de la liste de décisions de montage (EDL)
+================================================
+Contrat sérialisable (JSON) entre l'analyse et le rendu : pour chaque clip,
+la source, les points d'entrée et de sortie, la fenêtre de crop et le plan
+de suppression du texte, dans l'ordre du montage ; puis les réglages
+globaux (durée, logo, audio, tagline, qualité du resize).
+
+Une EDL peut être enregistrée, rechargée, comparée à une autre et rendue
+sans nouvelle analyse, dans l'interface ou dans un autre processus :
+
+    python edit_decision_list.py render plan.json sortie.mp4
+    python edit_decision_list.py diff ancien.json nouveau.json
+
+Fonctions principales :
+- build_edl : Construit l'EDL d'un plan de montage
+- save_edl / load_edl : Enregistre et recharge une EDL
+- edl_digest : Empreinte du contenu d'une EDL (cache)
+- diff_edl : Différences lisibles entre deux EDL
+- edl_segments : Segments planifiés à rendre
+- render_edl : Rend une EDL en vidéo finale
+"""
+import os
+import json
+import hashlib
+import argparse
+import datetime
+import numpy as np
+import streamlit as st
+from typing import List, Dict, Optional
+from constants import VIDEO_FORMAT
+from timeline_planner import check_coverage
+
+EDL_VERSION = 1
+
+# Champs d'un clip conservés dans l'EDL
+_CLIP_FIELDS = (
+    'render_id', 'source_path', 'source_size', 'start', 'end', 'crop', 'face_regions',
+    'video_index', 'clip_index', 'score', 'has_target_face', 'repeat'
+)
+
+# Réglages globaux comparés par diff_edl
+_GLOBAL_FIELDS = ('format', 'output_duration', 'use_lanczos', 'max_size_mb', 'logo', 'audio', 'tagline')
+
+
+def _jsonable(value):
+    """Convertit les types NumPy (visages, scores) en types JSON"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def build_edl(
+    planned_segments: List[Dict],
+    output_duration: Optional[float] = None,
+    logo_config: Optional[Dict] = None,
+    audio_config: Optional[Dict] = None,
+    tagline_path: Optional[str] = None,
+    use_lanczos: bool = False,
+    remove_text_method: Optional[str] = None,
+    max_size_mb: Optional[float] = None
+) -> Dict:
+    """
+    Construit l'EDL d'un plan de montage
+
+    Args:
+        planned_segments: Segments planifiés (plan_timeline), dans l'ordre du montage
+        output_duration: Durée de sortie souhaitée
+        logo_config: Configuration du logo
+        audio_config: Configuration audio
+        tagline_path: Chemin de la tagline
+        use_lanczos: Utiliser Lanczos pour le resize
+        remove_text_method: Méthode de suppression du texte ('crop', 'inpaint' ou None)
+        max_size_mb: Taille maximale de la vidéo finale en Mo (None: TARGET_SIZE_SETTINGS)
+
+    Returns:
+        Dict: EDL sérialisable
+    """
+    clips = []
+    for order, segment in enumerate(planned_segments):
+        clip = {field: segment[field] for field in _CLIP_FIELDS if field in segment}
+        clip['order'] = order
+        clip['text_removal'] = remove_text_method
+        clips.append(_jsonable(clip))
+
+    return {
+        'version': EDL_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'format': {key: VIDEO_FORMAT[key] for key in ('width', 'height', 'fps', 'bitrate')},
+        'output_duration': output_duration,
+        'use_lanczos': use_lanczos,
+        'max_size_mb': max_size_mb,
+        'clips': clips,
+        **_jsonable(edl_settings(logo_config, audio_config, tagline_path))
+    }
+
+
+def edl_settings(
+    logo_config: Optional[Dict] = None,
+    audio_config: Optional[Dict] = None,
+    tagline_path: Optional[str] = None
+) -> Dict:
+    """
+    Réglages globaux de rendu d'une EDL (modifiables sans nouvelle analyse)
+
+    Args:
+        logo_config: Configuration du logo
+        audio_config: Configuration audio
+        tagline_path: Chemin de la tagline
+
+    Returns:
+        Dict: {'logo', 'audio', 'tagline'}
+    """
+    return {
+        'logo': dict(logo_config) if logo_config and logo_config.get('logo_path') else None,
+        'audio': dict(audio_config) if audio_config and audio_config.get('audio_path') else None,
+        'tagline': tagline_path if tagline_path and os.path.exists(tagline_path) else None
+    }
+
+
+def edl_digest(edl: Dict) -> str:
+    """
+    Empreinte du contenu d'une EDL (hors date de création)
+
+    Args:
+        edl: EDL
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    content = {key: value for key, value in edl.items() if key != 'created'}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def save_edl(edl: Dict, path: str) -> str:
+    """
+    Enregistre une EDL en JSON (écriture atomique)
+
+    Args:
+        edl: EDL
+        path: Chemin du fichier
+
+    Returns:
+        str: Chemin du fichier écrit
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(edl, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_edl(path_or_json: str) -> Optional[Dict]:
+    """
+    Recharge une EDL depuis un fichier ou une chaîne JSON et la valide
+
+    Args:
+        path_or_json: Chemin du fichier ou contenu JSON
+
+    Returns:
+        Dict: EDL ou None si invalide
+    """
+    try:
+        if os.path.exists(path_or_json):
+            with open(path_or_json) as f:
+                edl = json.load(f)
+        else:
+            edl = json.loads(path_or_json)
+    except (OSError, ValueError) as e:
+        st.error(f"❌ EDL illisible: {str(e)}")
+        return None
+
+    if not isinstance(edl, dict) or edl.get('version') != EDL_VERSION or not edl.get('clips'):
+        st.error(f"❌ EDL invalide ou de version non supportée (attendu: {EDL_VERSION})")
+        return None
+
+    missing = sorted({clip['source_path'] for clip in edl['clips'] if not os.path.exists(clip['source_path'])})
+    if missing:
+        st.error(f"❌ Sources introuvables: {', '.join(os.path.basename(p) for p in missing)}")
+        return None
+    return edl
+
+
+def _describe_clip(clip: Dict) -> str:
+    """Description courte d'un clip de l'EDL"""
+    return f"{os.path.basename(clip['source_path'])} {clip['start']:.2f}s → {clip['end']:.2f}s"
+
+
+def diff_edl(old: Dict, new: Dict) -> List[str]:
+    """
+    Différences lisibles entre deux EDL
+
+    Args:
+        old: EDL de référence
+        new: EDL comparée
+
+    Returns:
+        List[str]: Différences (vide si les montages sont identiques)
+    """
+    changes = []
+    for field in _GLOBAL_FIELDS:
+        if old.get(field) != new.get(field):
+            changes.append(f"{field}: {old.get(field)} → {new.get(field)}")
+
+    old_clips, new_clips = old.get('clips', []), new.get('clips', [])
+    for order in range(max(len(old_clips), len(new_clips))):
+        before = old_clips[order] if order < len(old_clips) else None
+        after = new_clips[order] if order < len(new_clips) else None
+        if before is None:
+            changes.append(f"clip {order + 1} ajouté: {_describe_clip(after)}")
+        elif after is None:
+            changes.append(f"clip {order + 1} retiré: {_describe_clip(before)}")
+        else:
+            differing = [field for field in ('source_path', 'start', 'end', 'crop', 'text_removal')
+                         if before.get(field) != after.get(field)]
+            if differing:
+                changes.append(f"clip {order + 1} modifié ({', '.join(differing)}): "
+                               f"{_describe_clip(before)} ⇒ {_describe_clip(after)}")
+    return changes
+
+
+def edl_segments(edl: Dict) -> List[Dict]:
+    """
+    Segments planifiés d'une EDL, dans l'ordre du montage (copies modifiables)
+
+    Args:
+        edl: EDL
+
+    Returns:
+        List[Dict]: Segments au format de plan_timeline
+    """
+    segments = []
+    for clip in sorted(edl['clips'], key=lambda c: c['order']):
+        segment = dict(clip)
+        segment.setdefault('face_regions', [])
+        segment.setdefault('video_index', 0)
+        segment.setdefault('clip_index', clip['order'])
+        segments.append(segment)
+    return segments
+
+
+def render_key(segment: Dict, use_lanczos: bool = False) -> tuple:
+    """
+    Clé d'un rendu de segment : deux segments de même clé donnent le même clip
+
+    Args:
+        segment: Segment planifié ou clip de l'EDL
+        use_lanczos: Utiliser Lanczos pour le resize
+
+    Returns:
+        tuple: Source, bornes, crop, suppression du texte et qualité du resize
+    """
+    return (
+        segment['source_path'], round(segment['start'], 3), round(segment['end'], 3),
+        tuple(sorted(segment['crop'].items())), segment.get('text_removal'), bool(use_lanczos)
+    )
+
+
+def render_edl(
+    edl: Dict,
+    output_path: str,
+    text_net=None,
+    output_dir: Optional[str] = None,
+    prerendered: Optional[Dict[tuple, Dict]] = None
+) -> bool:
+    """
+    Rend une EDL en vidéo finale (chaque clip distinct n'est rendu qu'une fois)
+
+    Args:
+        edl: EDL
+        output_path: Chemin de la vidéo finale
+        text_net: Modèle de détection de texte (chargé si l'EDL en a besoin)
+        output_dir: Répertoire des clips intermédiaires
+        prerendered: Clips déjà rendus pendant l'analyse, par render_key (pipeline)
+
+    Returns:
+        bool: True si la vidéo a été créée
+    """
+    from video_assembler import create_final_video_ultra_safe
+    from scratch_space import current_job
+    from render_pool import render_segments
+
+    output_dir = output_dir or current_job()
+    segments = edl_segments(edl)
+    use_lanczos = edl.get('use_lanczos', False)
+
+    # Fichier du modèle de texte (déjà présent si l'application l'a chargé),
+    # chargé par les processus de rendu
+    model_path = None
+    if any(seg.get('text_removal') for seg in segments):
+        from text_detector import download_east_model
+        model_path = download_east_model(output_dir)
+
+    prerendered = prerendered or {}
+    reused = 0
+    rendered = {}
+    pending = {}
+    for segment in segments:
+        render_id = segment.get('render_id', segment['order'])
+        if render_id in rendered or render_id in pending:
+            continue
+        ready = prerendered.get(render_key(segment, use_lanczos))
+        if ready and os.path.exists(ready['path']):
+            rendered[render_id] = ready
+            reused += 1
+        else:
+            pending[render_id] = segment
+
+    # Clips distincts rendus en parallèle, assemblés ensuite dans l'ordre de l'EDL
+    results = render_segments(
+        list(pending.values()),
+        output_dir,
+        use_lanczos=use_lanczos,
+        text_net=text_net,
+        text_model_path=model_path
+    )
+    rendered.update(zip(pending.keys(), results))
+    clips = [
+        rendered[segment.get('render_id', segment['order'])]
+        for segment in segments
+        if rendered[segment.get('render_id', segment['order'])] is not None
+    ]
+
+    if not clips:
+        st.error("❌ Aucun clip de l'EDL n'a pu être rendu")
+        return False
+    if reused:
+        st.info(f"⏩ {reused}/{len(rendered)} clip(s) déjà rendus pendant l'analyse")
+    check_coverage(clips, 1 / edl['format']['fps'])
+
+    return create_final_video_ultra_safe(
+        clips,
+        output_path,
+        shuffle=False,  # Ordre fixé par l'EDL
+        smart_shuffle=False,
+        logo_config=edl.get('logo'),
+        audio_config=edl.get('audio'),
+        tagline_path=edl.get('tagline'),
+        output_duration=edl.get('output_duration'),
+        max_size_mb=edl.get('max_size_mb')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendu et comparaison de listes de décisions de montage")
+    commands = parser.add_subparsers(dest='command', required=True)
+    render = commands.add_parser('render', help="Rend une EDL en vidéo finale")
+    render.add_argument('edl')
+    render.add_argument('output')
+    render.add_argument('--max-size-mb', type=float, help="Taille maximale de la vidéo (0 = sans limite)")
+    diff = commands.add_parser('diff', help="Compare deux EDL")
+    diff.add_argument('old')
+    diff.add_argument('new')
+    args = parser.parse_args()
+
+    if args.command == 'render':
+        edl = load_edl(args.edl)
+        if edl and args.max_size_mb is not None:
+            edl['max_size_mb'] = args.max_size_mb
+        raise SystemExit(0 if edl and render_edl(edl, os.path.abspath(args.output)) else 1)
+
+    with open(args.old) as f_old, open(args.new) as f_new:
+        changes = diff_edl(json.load(f_old), json.load(f_new))
+    print('\n'.join(changes) if changes else "EDL identiques")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Module de suivi de l'encodage
+=============================
+Transforme le nombre de frames écrites par l'encodeur (sortie -progress de
+ffmpeg ou barre proglog de MoviePy) en progression, vitesse d'encodage et
+temps restant estimé. Les mises à jour de l'interface sont espacées
+(PROGRESS_SETTINGS['update_interval']) pour ne pas ralentir l'encodage ;
+chaque mise à jour est aussi émise comme mesure structurée.
+
+Fonctions principales :
+- progress_reporter : Rapporteur de progression (barre Streamlit + mesures)
+- moviepy_progress_logger : Logger proglog à passer à write_videofile
+"""
+import os
+import json
+import time
+import streamlit as st
+from typing import Callable, Dict
+from proglog import ProgressBarLogger
+from constants import PROGRESS_SETTINGS
+
+
+def format_eta(seconds: float) -> str:
+    """
+    Formate un temps restant
+
+    Args:
+        seconds: Durée en secondes
+
+    Returns:
+        str: Durée lisible (ex: "1m05s")
+    """
+    seconds = int(round(max(seconds, 0)))
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def emit_metrics(record: Dict) -> None:
+    """
+    Ajoute une mesure au flux JSONL configuré (PROGRESS_SETTINGS['metrics_path'])
+
+    Args:
+        record: Mesure à écrire
+    """
+    path = PROGRESS_SETTINGS['metrics_path']
+    if not path:
+        return
+    try:
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    except OSError:
+        pass
+
+
+def progress_reporter(
+    label: str,
+    total_frames: int,
+    progress_bar=None,
+    progress_text=None
+) -> Callable[[int, bool], None]:
+    """
+    Crée un rapporteur de progression appelé avec le nombre de frames écrites
+
+    Args:
+        label: Nom de l'étape (ex: "Encodage final")
+        total_frames: Nombre de frames attendues
+        progress_bar: Barre st.progress (créée si absente)
+        progress_text: Zone st.empty pour le texte (créée si absente)
+
+    Returns:
+        Callable[[int, bool], None]: Rapporteur ; report(frames, final=True) force l'affichage
+    """
+    if progress_bar is None:
+        progress_bar = st.progress(0)
+    if progress_text is None:
+        progress_text = st.empty()
+
+    total_frames = max(int(total_frames), 1)
+    start = time.perf_counter()
+    state = {'last_update': 0.0, 'last_frames': -1}
+
+    def report(frames: int, final: bool = False) -> None:
+        now = time.perf_counter()
+        if frames == state['last_frames']:
+            return
+        if not final and now - state['last_update'] < PROGRESS_SETTINGS['update_interval']:
+            return
+        state['last_update'], state['last_frames'] = now, frames
+
+        elapsed = now - start
+        frames = min(frames, total_frames)
+        # Vitesse estimée seulement après un intervalle complet (sinon non significative)
+        measured = elapsed >= PROGRESS_SETTINGS['update_interval']
+        fps = frames / elapsed if measured else 0.0
+        eta = (total_frames - frames) / fps if fps > 0 else None
+        percent = int(100 * frames / total_frames)
+
+        progress_bar.progress(percent)
+        message = f"🎞️ {label}: {frames}/{total_frames} frames ({percent}%)"
+        if measured:
+            message += f" · {fps:.0f} fps"
+        if eta is not None and frames < total_frames:
+            message += f" · reste ~{format_eta(eta)}"
+        progress_text.text(message)
+
+        emit_metrics({
+            'stage': label,
+            'time': time.time(),
+            'elapsed': round(elapsed, 3),
+            'frames': frames,
+            'total_frames': total_frames,
+            'fps': round(fps, 2),
+            'eta': round(eta, 1) if eta is not None else None,
+            'pid': os.getpid()
+        })
+
+    return report
+
+
+class _ProglogReporter(ProgressBarLogger):
+    """Relaie la barre des frames vidéo de MoviePy ('t') vers un rapporteur"""
+
+    def __init__(self, report: Callable[[int, bool], None]):
+        super().__init__(logged_bars=None)
+        self.report = report
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if bar == 't' and attr == 'index':
+            total = self.bars[bar].get('total')
+            self.report(value + 1, total is not None and value + 1 >= total)
+
+
+def moviepy_progress_logger(
+    label: str,
+    duration: float,
+    fps: float,
+    progress_bar=None,
+    progress_text=None
+) -> ProgressBarLogger:
+    """
+    Logger proglog à passer à write_videofile(logger=...)
+
+    Args:
+        label: Nom de l'étape
+        duration: Durée de la vidéo écrite
+        fps: Cadence d'encodage
+        progress_bar: Barre st.progress existante
+        progress_text: Zone st.empty existante
+
+    Returns:
+        ProgressBarLogger: Logger relié à la barre de progression
+    """
+    report = progress_reporter(label, int(round(duration * fps)), progress_bar, progress_text)
+    return _ProglogReporter(report)
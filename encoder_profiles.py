@@ -0,0 +1,214 @@
+"""
+Module des profils d'encodage
+=============================
+Les réglages d'encodage vidéo (codec, preset, crf ou débit, threads, tune,
+GOP) sont des profils nommés (ENCODER_PROFILES) ; chaque étape (encodage
+final, import, brouillon...) utilise le profil que lui attribue
+ENCODER_STAGES, surchargeable par variable d'environnement.
+
+Le benchmark encode un clip de référence avec chaque profil sur la machine
+courante et mesure la vitesse (fps), la taille du fichier et la fidélité
+(SSIM par rapport à la référence), pour choisir les profils sur mesures.
+
+Fonctions principales :
+- stage_profile : Profil (nom, réglages) d'une étape
+- encoder_args : Arguments ffmpeg d'un profil
+- moviepy_encoding_params : Paramètres write_videofile d'un profil
+- benchmark_profiles : Compare les profils sur un clip de référence
+
+Ligne de commande :
+    python encoder_profiles.py list
+    python encoder_profiles.py benchmark reference.mp4 --seconds 10
+"""
+import os
+import re
+import time
+import argparse
+import tempfile
+import subprocess
+import streamlit as st
+from typing import Dict, List, Optional, Tuple
+from constants import ENCODER_PROFILES, ENCODER_STAGES, FFMPEG_BINARIES
+
+
+def stage_profile(stage: str) -> Tuple[str, Dict]:
+    """
+    Profil d'encodage d'une étape (ou profil désigné directement par son nom)
+
+    Args:
+        stage: Étape (ENCODER_STAGES) ou nom de profil (ENCODER_PROFILES)
+
+    Returns:
+        Tuple[str, Dict]: (nom du profil, réglages)
+    """
+    name = ENCODER_STAGES.get(stage, stage)
+    if name not in ENCODER_PROFILES:
+        fallback = 'balanced'
+        st.warning(f"⚠️ Profil d'encodage inconnu '{name}' pour {stage}, profil {fallback} utilisé")
+        name = fallback
+    return name, ENCODER_PROFILES[name]
+
+
+def encoder_args(stage: str, threads: Optional[int] = None, crf: Optional[float] = None) -> List[str]:
+    """
+    Arguments d'encodage vidéo ffmpeg d'un profil
+
+    Args:
+        stage: Étape ou nom de profil
+        threads: Threads de l'encodeur (défaut: ceux du profil, 0 = choix de ffmpeg)
+        crf: Qualité constante imposée à la place de celle ou du débit du profil
+
+    Returns:
+        List[str]: Arguments ffmpeg (codec, preset, tune, qualité, GOP, threads, pixels)
+    """
+    _, profile = stage_profile(stage)
+    args = ['-c:v', profile['codec']]
+    if profile.get('preset'):
+        args += ['-preset', profile['preset']]
+    if profile.get('tune'):
+        args += ['-tune', profile['tune']]
+    if crf is not None:
+        args += ['-crf', f"{crf:g}"]
+    elif profile.get('crf') is not None:
+        args += ['-crf', str(profile['crf'])]
+    elif profile.get('bitrate'):
+        args += ['-b:v', profile['bitrate']]
+    if profile.get('gop'):
+        args += ['-g', str(profile['gop'])]
+    threads = threads or profile.get('threads')
+    if threads:
+        args += ['-threads', str(threads)]
+    return args + ['-pix_fmt', profile.get('pix_fmt', 'yuv420p')]
+
+
+def moviepy_encoding_params(stage: str) -> Dict:
+    """
+    Paramètres d'encodage write_videofile (MoviePy) d'un profil
+
+    Args:
+        stage: Étape ou nom de profil
+
+    Returns:
+        Dict: {'codec', 'preset', 'threads', 'bitrate', 'ffmpeg_params'}
+    """
+    _, profile = stage_profile(stage)
+    ffmpeg_params = []
+    if profile.get('tune'):
+        ffmpeg_params += ['-tune', profile['tune']]
+    if profile.get('crf') is not None:
+        ffmpeg_params += ['-crf', str(profile['crf'])]
+    if profile.get('gop'):
+        ffmpeg_params += ['-g', str(profile['gop'])]
+    ffmpeg_params += ['-pix_fmt', profile.get('pix_fmt', 'yuv420p')]
+    return {
+        'codec': profile['codec'],
+        'preset': profile.get('preset', 'medium'),
+        'threads': profile.get('threads') or None,
+        'bitrate': profile.get('bitrate') if profile.get('crf') is None else None,
+        'ffmpeg_params': ffmpeg_params
+    }
+
+
+def _measure_ssim(reference_path: str, encoded_path: str, seconds: float) -> Optional[float]:
+    """SSIM moyen (toutes composantes) d'un encodage par rapport à la référence"""
+    cmd = [
+        FFMPEG_BINARIES['ffmpeg'], '-hide_banner', '-nostdin',
+        '-i', encoded_path,
+        '-t', f"{seconds:.3f}", '-i', reference_path,
+        '-lavfi', "[0:v]format=yuv420p[enc];[1:v]format=yuv420p[ref];[enc][ref]ssim",
+        '-f', 'null', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    match = re.search(r'All:([\d.]+)', result.stderr)
+    return float(match.group(1)) if match else None
+
+
+def benchmark_profiles(
+    reference_path: str,
+    names: Optional[List[str]] = None,
+    seconds: float = 10.0
+) -> List[Dict]:
+    """
+    Encode un clip de référence avec chaque profil et mesure vitesse, taille et SSIM
+
+    Args:
+        reference_path: Clip de référence
+        names: Profils à comparer (défaut: tous)
+        seconds: Durée encodée depuis le début du clip
+
+    Returns:
+        List[Dict]: {'profile', 'fps', 'elapsed', 'size_mb', 'kbps', 'ssim'} par profil
+            (fps None si l'encodage a échoué)
+    """
+    from ffmpeg_utils import ffmpeg_base_command, run_ffmpeg
+    from video_probe import probe_video
+    from encode_progress import emit_metrics
+
+    info = probe_video(reference_path)
+    if not info:
+        raise ValueError(f"référence illisible: {reference_path}")
+    seconds = min(seconds, info['duration'])
+    frames = int(round(seconds * info['fps']))
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in names or list(ENCODER_PROFILES):
+            output_path = os.path.join(work_dir, f"{name}.mp4")
+            cmd = ffmpeg_base_command() + [
+                '-t', f"{seconds:.3f}", '-i', reference_path,
+                '-map', '0:v:0', '-an'
+            ] + encoder_args(name) + [output_path]
+
+            start = time.perf_counter()
+            success, stderr = run_ffmpeg(cmd)
+            elapsed = time.perf_counter() - start
+            if not success or not os.path.exists(output_path):
+                results.append({'profile': name, 'fps': None, 'elapsed': round(elapsed, 3),
+                                'size_mb': None, 'kbps': None, 'ssim': None,
+                                'error': stderr.strip()[-200:]})
+                continue
+
+            size = os.path.getsize(output_path)
+            result = {
+                'profile': name,
+                'fps': round(frames / elapsed, 1),
+                'elapsed': round(elapsed, 3),
+                'size_mb': round(size / 1024 / 1024, 2),
+                'kbps': round(size * 8 / 1000 / seconds),
+                'ssim': _measure_ssim(reference_path, output_path, seconds)
+            }
+            results.append(result)
+            emit_metrics({'stage': 'encoder_benchmark', 'time': time.time(),
+                          'reference': os.path.basename(reference_path), **result, 'pid': os.getpid()})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profils d'encodage vidéo")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Profils et profil de chaque étape")
+    bench = commands.add_parser('benchmark', help="Compare les profils sur un clip de référence")
+    bench.add_argument('reference')
+    bench.add_argument('--seconds', type=float, default=10.0)
+    bench.add_argument('--profiles', nargs='+', choices=list(ENCODER_PROFILES))
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for stage, name in ENCODER_STAGES.items():
+            print(f"{stage:20s} → {name}")
+        for name in ENCODER_PROFILES:
+            print(f"{name:20s} {' '.join(encoder_args(name))}")
+        return
+
+    print(f"{'profil':20s} {'fps':>8s} {'Mo':>7s} {'kb/s':>7s} {'SSIM':>8s}")
+    for result in benchmark_profiles(args.reference, args.profiles, args.seconds):
+        if result['fps'] is None:
+            print(f"{result['profile']:20s} échec: {result['error']}")
+            continue
+        ssim = f"{result['ssim']:.5f}" if result['ssim'] is not None else '-'
+        print(f"{result['profile']:20s} {result['fps']:8.1f} {result['size_mb']:7.2f} "
+              f"{result['kbps']:7d} {ssim:>8s}")
+
+
+if __name__ == '__main__':
+    main()
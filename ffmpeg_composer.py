@@ -0,0 +1,375 @@
+"""
+Module de composition finale en une passe ffmpeg
+================================================
+Compile tout le montage (liste des clips, concaténation, découpe à la durée
+de sortie, logo en overlay avec opacité, piste audio avec volume et fondus,
+tagline finale) en un seul graphe filter_complex encodé une seule fois.
+
+Fonctions principales :
+- plan_composition : Calcule les durées et la liste des entrées du montage
+- build_composition_command : Construit la commande ffmpeg complète
+- compose_final_video : Exécute la composition et vérifie le résultat
+
+La tagline est ajoutée après coup par copie de flux (tagline_prep) ; le
+graphe ne l'intègre qu'en repli. Le montage principal peut être encodé par
+segments parallèles (chunked_encoder), et à taille cible avec un CRF
+choisi sur des extraits (size_targeting).
+"""
+import os
+import streamlit as st
+from typing import List, Dict, Optional, Tuple
+from constants import VIDEO_FORMAT, COMPOSITION_SETTINGS, TARGET_SIZE_SETTINGS
+from crop_planner import compute_crop_window
+from ffmpeg_utils import ffmpeg_base_command, run_ffmpeg, final_encoding_args
+from video_probe import probe_video, probe_audio
+from logo_overlay import logo_size, logo_position
+from audio_prep import prepare_soundtrack
+from tagline_prep import append_tagline
+from encode_progress import progress_reporter
+
+
+def plan_composition(
+    clip_paths: List[str],
+    output_duration: Optional[float] = None,
+    audio_config: Optional[Dict] = None
+) -> Optional[Dict]:
+    """
+    Calcule la liste des entrées et la durée du montage principal
+
+    Les clips sont ceux du montage déjà planifié (plan_timeline : segments
+    de réserve et répétitions comprises) ; ils sont seulement recoupés à
+    output_duration, ou à la durée de l'audio si adapt_to_audio est activé,
+    jamais bouclés.
+
+    Args:
+        clip_paths: Clips intermédiaires dans l'ordre du montage
+        output_duration: Durée de sortie souhaitée
+        audio_config: Configuration audio
+
+    Returns:
+        Dict: {'inputs', 'durations', 'main_duration', 'audio_duration'} ou None
+    """
+    inputs = []
+    for path in clip_paths:
+        info = probe_video(path)
+        if not info or info['duration'] <= 0:
+            st.warning(f"⚠️ Clip illisible ignoré: {os.path.basename(path)}")
+            continue
+        inputs.append((path, info['duration']))
+
+    if not inputs:
+        return None
+
+    total = sum(d for _, d in inputs)
+    audio_duration = None
+    if audio_config and audio_config.get('audio_path'):
+        audio_info = probe_audio(audio_config['audio_path'])
+        audio_duration = audio_info['duration'] if audio_info else None
+
+    if audio_config and audio_config.get('adapt_to_audio') and audio_duration:
+        target = audio_duration + audio_config.get('extra_seconds', 0)
+    elif output_duration:
+        target = output_duration
+    else:
+        target = total
+
+    if target > total + 1e-3:
+        if audio_config and audio_config.get('adapt_to_audio') and audio_duration:
+            st.warning(f"⚠️ Montage planifié plus court que la cible ({total:.1f}s / {target:.1f}s)")
+        target = total
+
+    # Clips au-delà de la cible : ni décodés ni encodés
+    needed = []
+    covered = 0.0
+    for path, duration in inputs:
+        if covered >= target - 1e-3:
+            break
+        needed.append((path, duration))
+        covered += duration
+    inputs = needed
+
+    return {
+        'inputs': [p for p, _ in inputs],
+        'durations': [d for _, d in inputs],
+        'main_duration': target,
+        'audio_duration': audio_duration
+    }
+
+
+def _logo_filter(
+    logo_index: int,
+    logo_path: str,
+    position: str = "Haut gauche",
+    size_percent: int = 20,
+    opacity: float = 0.5,
+    margin: int = 40,
+    vertical_position: int = 10
+) -> Tuple[str, int, int]:
+    """
+    Filtre de préparation du logo et sa position (mêmes règles qu'add_logo_overlay)
+
+    Returns:
+        Tuple[str, int, int]: (filtre du logo, x, y)
+    """
+    logo_width, logo_height = logo_size(logo_path, size_percent)
+    x, y = logo_position(position, logo_width, margin, vertical_position)
+
+    logo_filter = (
+        f"[{logo_index}:v]scale={logo_width}:{logo_height},format=rgba,"
+        f"colorchannelmixer=aa={opacity:.3f}[logo]"
+    )
+    return logo_filter, x, y
+
+
+def build_composition_command(
+    plan: Dict,
+    output_path: str,
+    logo_config: Optional[Dict] = None,
+    audio_config: Optional[Dict] = None,
+    tagline_path: Optional[str] = None,
+    soundtrack_path: Optional[str] = None,
+    encoding_args: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Construit la commande ffmpeg filter_complex de tout le montage
+
+    Args:
+        plan: Plan issu de plan_composition
+        output_path: Chemin de la vidéo finale
+        logo_config: Configuration du logo
+        audio_config: Configuration audio
+        tagline_path: Chemin de la tagline
+        soundtrack_path: Bande son déjà mixée (prepare_soundtrack), copiée telle quelle
+        encoding_args: Arguments d'encodage vidéo (défaut: final_encoding_args)
+
+    Returns:
+        List[str]: Commande ffmpeg
+    """
+    width, height, fps = VIDEO_FORMAT['width'], VIDEO_FORMAT['height'], VIDEO_FORMAT['fps']
+    sample_rate = COMPOSITION_SETTINGS['audio_sample_rate']
+    main_duration = plan['main_duration']
+
+    cmd = ffmpeg_base_command()
+    filters = []
+
+    # Clips du montage (décalage optionnel dans chaque clip : extraits de size_targeting)
+    offsets = plan.get('offsets') or [0.0] * len(plan['inputs'])
+    for path, offset in zip(plan['inputs'], offsets):
+        if offset > 0:
+            cmd += ['-ss', f"{offset:.3f}"]
+        cmd += ['-i', path]
+    n_clips = len(plan['inputs'])
+    for idx in range(n_clips):
+        filters.append(
+            f"[{idx}:v]scale={width}:{height},setsar=1,fps={fps},format=yuv420p,"
+            f"setpts=PTS-STARTPTS[v{idx}]"
+        )
+    concat_inputs = ''.join(f"[v{idx}]" for idx in range(n_clips))
+    filters.append(f"{concat_inputs}concat=n={n_clips}:v=1:a=0[cat]")
+    filters.append(f"[cat]trim=duration={main_duration:.3f},setpts=PTS-STARTPTS[main]")
+    video_label = 'main'
+    next_input = n_clips
+
+    # Logo en overlay (le logo n'apparaît pas sur la tagline)
+    if logo_config and logo_config.get('logo_path'):
+        cmd += ['-i', logo_config['logo_path']]
+        logo_filter, x, y = _logo_filter(next_input, **logo_config)
+        filters.append(logo_filter)
+        filters.append(f"[{video_label}][logo]overlay=x={x}:y={y}:format=auto,format=yuv420p[withlogo]")
+        video_label = 'withlogo'
+        next_input += 1
+
+    # Tagline
+    tagline_info = probe_video(tagline_path) if tagline_path and os.path.exists(tagline_path) else None
+    tagline_duration = 0.0
+    tagline_index = None
+    if tagline_info:
+        cmd += ['-i', tagline_path]
+        tagline_index = next_input
+        next_input += 1
+        tagline_duration = tagline_info['duration']
+        crop = compute_crop_window(tagline_info['width'], tagline_info['height'])
+        filters.append(
+            f"[{tagline_index}:v]crop={crop['width']}:{crop['height']}:{crop['x']}:{crop['y']},"
+            f"scale={width}:{height},setsar=1,fps={fps},format=yuv420p,setpts=PTS-STARTPTS[tag]"
+        )
+        filters.append(f"[{video_label}][tag]concat=n=2:v=1:a=0[vout]")
+        video_label = 'vout'
+
+    total_duration = main_duration + tagline_duration
+
+    # Audio : bande son (volume, fondus) puis silence pendant la tagline,
+    # sinon son de la tagline après un silence sur le montage
+    audio_label = None
+    audio_map = None
+    if soundtrack_path:
+        cmd += ['-i', soundtrack_path]
+        audio_map = f"{next_input}:a:0"
+        next_input += 1
+    elif audio_config and audio_config.get('audio_path') and plan.get('audio_duration'):
+        cmd += ['-i', audio_config['audio_path']]
+        audio_index = next_input
+        next_input += 1
+        effective = min(plan['audio_duration'], main_duration)
+        fade_in = audio_config.get('fade_in', 0)
+        fade_out = audio_config.get('fade_out', 0)
+        chain = [
+            f"aresample={sample_rate}",
+            f"atrim=duration={effective:.3f}",
+            'asetpts=PTS-STARTPTS',
+            f"volume={audio_config.get('volume', 1.0):.3f}"
+        ]
+        if fade_in > 0:
+            chain.append(f"afade=t=in:st=0:d={fade_in:.3f}")
+        if fade_out > 0:
+            chain.append(f"afade=t=out:st={max(0.0, effective - fade_out):.3f}:d={fade_out:.3f}")
+        chain += ['apad', f"atrim=duration={total_duration:.3f}"]
+        filters.append(f"[{audio_index}:a]" + ','.join(chain) + '[aout]')
+        audio_label = 'aout'
+    elif tagline_info and tagline_info.get('has_audio'):
+        filters.append(
+            f"anullsrc=r={sample_rate}:cl=stereo,atrim=duration={main_duration:.3f}[silence]"
+        )
+        filters.append(
+            f"[{tagline_index}:a]aresample={sample_rate},aformat=channel_layouts=stereo,"
+            f"atrim=duration={tagline_duration:.3f},asetpts=PTS-STARTPTS[tagaudio]"
+        )
+        filters.append("[silence][tagaudio]concat=n=2:v=0:a=1[aout]")
+        audio_label = 'aout'
+
+    cmd += ['-filter_complex', ';'.join(filters), '-map', f"[{video_label}]"]
+    if audio_map:
+        cmd += ['-map', audio_map, '-c:a', 'copy']
+    elif audio_label:
+        cmd += ['-map', f"[{audio_label}]", '-c:a', 'aac',
+                '-b:a', COMPOSITION_SETTINGS['audio_bitrate'], '-ar', str(sample_rate)]
+    else:
+        cmd += ['-an']
+
+    cmd += (encoding_args or final_encoding_args()) + ['-t', f"{total_duration:.3f}", output_path]
+    return cmd
+
+
+def compose_final_video(
+    clip_paths: List[str],
+    output_path: str,
+    output_duration: Optional[float] = None,
+    logo_config: Optional[Dict] = None,
+    audio_config: Optional[Dict] = None,
+    tagline_path: Optional[str] = None,
+    max_size_mb: Optional[float] = None
+) -> bool:
+    """
+    Compose et encode la vidéo finale en une seule passe ffmpeg
+
+    Args:
+        clip_paths: Clips intermédiaires dans l'ordre du montage
+        output_path: Chemin de la vidéo finale
+        output_duration: Durée de sortie souhaitée
+        logo_config: Configuration du logo
+        audio_config: Configuration audio
+        tagline_path: Chemin de la tagline
+        max_size_mb: Taille maximale en Mo (défaut: TARGET_SIZE_SETTINGS, 0 = débit du profil)
+
+    Returns:
+        bool: True si la vidéo a été créée
+    """
+    plan = plan_composition(clip_paths, output_duration, audio_config)
+    if plan is None:
+        st.error("❌ Aucun clip exploitable pour la composition")
+        return False
+
+    st.info(f"🎛️ Composition en une passe: {len(plan['inputs'])} clips, "
+            f"{plan['main_duration']:.1f}s de montage")
+
+    has_soundtrack = bool(audio_config and audio_config.get('audio_path') and plan.get('audio_duration'))
+    tagline_info = probe_video(tagline_path) if tagline_path and os.path.exists(tagline_path) else None
+
+    # Taille cible : CRF choisi sur des extraits, puis un seul encodage final
+    if max_size_mb is None:
+        max_size_mb = TARGET_SIZE_SETTINGS['max_mb']
+    crf = None
+    if max_size_mb and max_size_mb > 0:
+        from size_targeting import choose_crf
+        has_audio = has_soundtrack or bool(tagline_info and tagline_info.get('has_audio'))
+        crf = choose_crf(plan, max_size_mb, logo_config, has_audio,
+                         tagline_path if tagline_info else None)
+
+    # Tagline encodée une fois (cache) puis ajoutée par copie de flux :
+    # seul le montage principal passe par l'encodeur
+    if tagline_info:
+        main_path = f"{os.path.splitext(output_path)[0]}_main.mp4"
+        try:
+            if not _run_composition(plan, main_path, logo_config, audio_config, None,
+                                    has_soundtrack, crf):
+                return False
+            if append_tagline(main_path, tagline_path, output_path,
+                              keep_tagline_audio=not has_soundtrack, crf=crf):
+                return _check_output(output_path, max_size_mb, crf)
+        finally:
+            if os.path.exists(main_path):
+                os.remove(main_path)
+        st.info("ℹ️ Tagline intégrée au graphe de composition")
+
+    if not _run_composition(plan, output_path, logo_config, audio_config,
+                            tagline_path if tagline_info else None, has_soundtrack, crf):
+        return False
+    return _check_output(output_path, max_size_mb, crf)
+
+
+def _run_composition(
+    plan: Dict,
+    output_path: str,
+    logo_config: Optional[Dict],
+    audio_config: Optional[Dict],
+    tagline_path: Optional[str],
+    has_soundtrack: bool,
+    crf: Optional[float] = None
+) -> bool:
+    """Prépare la bande son puis exécute le graphe de composition"""
+    tagline_info = probe_video(tagline_path) if tagline_path else None
+    total_duration = plan['main_duration'] + (tagline_info['duration'] if tagline_info else 0.0)
+
+    # Bande son mixée une fois en amont, puis simplement copiée au multiplexage
+    soundtrack_path = None
+    if has_soundtrack:
+        soundtrack_path = prepare_soundtrack(
+            audio_config['audio_path'],
+            volume=audio_config.get('volume', 1.0),
+            fade_in=audio_config.get('fade_in', 0),
+            fade_out=audio_config.get('fade_out', 0),
+            main_duration=plan['main_duration'],
+            total_duration=total_duration
+        )
+
+    # Montage principal seul : encodage par segments parallèles si configuré
+    if tagline_path is None and COMPOSITION_SETTINGS['chunks'] > 1:
+        from chunked_encoder import encode_in_chunks
+        if encode_in_chunks(plan, output_path, logo_config, soundtrack_path, crf):
+            return True
+        st.info("ℹ️ Encodage final en une passe")
+
+    encoding_args = final_encoding_args(crf=crf) if crf is not None else None
+    cmd = build_composition_command(plan, output_path, logo_config, audio_config,
+                                    tagline_path, soundtrack_path, encoding_args)
+    report = progress_reporter("Encodage final", total_duration * VIDEO_FORMAT['fps'])
+    success, stderr = run_ffmpeg(cmd, progress=report)
+
+    if not success or not os.path.exists(output_path):
+        st.warning(f"⚠️ Composition ffmpeg échouée: {stderr.strip()[-500:]}")
+        return False
+    return True
+
+
+def _check_output(output_path: str, max_size_mb: float = 0, crf: Optional[float] = None) -> bool:
+    """Vérifie la taille de la vidéo finale (et la taille cible si un CRF a été choisi)"""
+    file_size_mb = os.path.getsize(output_path) / 1024 / 1024
+    if file_size_mb < 0.1:
+        st.error(f"❌ Fichier trop petit: {file_size_mb:.2f} MB")
+        return False
+
+    st.success(f"✅ Vidéo composée en une passe: {file_size_mb:.1f} MB")
+    if crf is not None and max_size_mb:
+        from size_targeting import report_target_size
+        report_target_size(output_path, max_size_mb, crf)
+    return True
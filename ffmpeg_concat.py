@@ -0,0 +1,199 @@
+"""
+Module d'assemblage par le démultiplexeur concat de ffmpeg
+==========================================================
+Les clips intermédiaires normalisés partagent les mêmes paramètres de codec :
+ils sont joints par copie de flux (-f concat -c copy), sans réencodage.
+La compatibilité est vérifiée sur les en-têtes de flux (ffprobe) et seuls les
+clips divergents sont réencodés au format intermédiaire.
+
+Fonctions principales :
+- stream_signature : Paramètres de flux qui doivent être identiques pour concaténer
+- find_incompatible_clips : Repère les clips qui divergent de la référence
+- concat_with_demuxer : Joint des fichiers compatibles par copie de flux
+- concat_intermediates : Vérifie, réencode les clips divergents puis concatène
+"""
+import os
+import tempfile
+import streamlit as st
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+from crop_planner import compute_crop_window
+from ffmpeg_utils import ffmpeg_base_command, run_ffmpeg, get_intermediate_format
+from ffmpeg_extractor import extract_clip_ffmpeg
+from video_probe import probe_video
+
+
+def stream_signature(info: Dict) -> Tuple:
+    """
+    Signature des paramètres de flux à faire correspondre pour une copie
+
+    L'empreinte des extradata (SPS/PPS en H.264) garantit que le décodeur
+    peut enchaîner les segments avec l'en-tête du premier fichier.
+
+    Args:
+        info: Métadonnées ffprobe (probe_video)
+
+    Returns:
+        Tuple: Signature comparable
+    """
+    return (
+        info.get('codec'), info.get('profile'), info.get('level'),
+        info.get('width'), info.get('height'), info.get('pix_fmt'),
+        round(info.get('fps', 0), 3), info.get('time_base'),
+        info.get('extradata_hash')
+    )
+
+
+def find_incompatible_clips(paths: List[str]) -> Tuple[Optional[Tuple], List[int]]:
+    """
+    Repère les clips dont la signature diffère de la signature majoritaire
+
+    Args:
+        paths: Clips intermédiaires
+
+    Returns:
+        Tuple: (signature de référence, indices des clips incompatibles)
+    """
+    signatures = []
+    for path in paths:
+        info = probe_video(path)
+        signatures.append(stream_signature(info) if info else None)
+
+    valid = [s for s in signatures if s is not None]
+    if not valid:
+        return None, list(range(len(paths)))
+
+    reference = Counter(valid).most_common(1)[0][0]
+    mismatched = [i for i, s in enumerate(signatures) if s != reference]
+    return reference, mismatched
+
+
+def reencode_to_intermediate(path: str, output_stem: str) -> Optional[str]:
+    """
+    Réencode un clip au format intermédiaire normalisé
+
+    Args:
+        path: Clip à réencoder
+        output_stem: Chemin du clip normalisé, sans extension
+
+    Returns:
+        str: Chemin du clip normalisé ou None si échec
+    """
+    info = probe_video(path)
+    if not info:
+        return None
+    crop = compute_crop_window(info['width'], info['height'])
+    output_path = output_stem + get_intermediate_format(info['duration'])['extension']
+    return extract_clip_ffmpeg(path, 0, info['duration'], crop, output_path)
+
+
+def concat_with_demuxer(paths: List[str], output_path: str, work_dir: str) -> bool:
+    """
+    Joint des fichiers compatibles avec le démultiplexeur concat (copie de flux)
+
+    Args:
+        paths: Fichiers à joindre, dans l'ordre
+        output_path: Fichier de sortie
+        work_dir: Répertoire de la liste de concaténation
+
+    Returns:
+        bool: True si succès
+    """
+    list_fd, list_path = tempfile.mkstemp(prefix='concat_', suffix='.txt', dir=work_dir)
+    try:
+        with os.fdopen(list_fd, 'w') as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = ffmpeg_base_command() + [
+            '-f', 'concat', '-safe', '0',
+            '-i', list_path,
+            '-map', '0',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            output_path
+        ]
+        success, stderr = run_ffmpeg(cmd)
+        if not success:
+            st.warning(f"⚠️ Concaténation par copie échouée: {stderr.strip()[-300:]}")
+        return success and os.path.exists(output_path)
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+
+def concat_intermediates(
+    paths: List[str],
+    output_path: str,
+    work_dir: Optional[str] = None
+) -> Optional[str]:
+    """
+    Concatène des clips intermédiaires sans réencodage
+
+    Les clips dont les en-têtes diffèrent de la référence sont réencodés au
+    format intermédiaire ; si la référence n'est pas elle-même au format
+    intermédiaire (clips copiés d'une source), tous les clips sont alignés
+    sur le format intermédiaire.
+
+    Args:
+        paths: Clips intermédiaires dans l'ordre du montage
+        output_path: Fichier de sortie (l'extension suit celle des clips joints)
+        work_dir: Répertoire de travail (défaut: celui du fichier de sortie)
+
+    Returns:
+        str: Chemin de la vidéo concaténée ou None si échec
+    """
+    if not paths:
+        return None
+    if work_dir is None:
+        work_dir = os.path.dirname(os.path.abspath(output_path))
+
+    paths = list(paths)
+    created = []
+
+    def _normalize(indices: List[int]) -> bool:
+        for i in indices:
+            base = os.path.splitext(os.path.basename(paths[i]))[0]
+            normalized = reencode_to_intermediate(
+                paths[i], os.path.join(work_dir, f"{base}_norm_{i}")
+            )
+            if normalized is None:
+                st.error(f"❌ Clip {i+1}: réencodage impossible")
+                return False
+            paths[i] = normalized
+            created.append(normalized)
+        return True
+
+    try:
+        reference, mismatched = find_incompatible_clips(paths)
+        if mismatched:
+            st.info(f"🔧 {len(mismatched)}/{len(paths)} clip(s) aux paramètres divergents, réencodage")
+            if not _normalize(mismatched):
+                return None
+            reference, mismatched = find_incompatible_clips(paths)
+
+        if mismatched:
+            # La référence vient de clips copiés d'une source : aligner tous
+            # les autres clips sur le format intermédiaire qu'on vient d'encoder
+            intermediate_signature = stream_signature(probe_video(created[-1]))
+            remaining = [i for i, p in enumerate(paths)
+                         if stream_signature(probe_video(p)) != intermediate_signature]
+            if not _normalize(remaining):
+                return None
+            reference, mismatched = find_incompatible_clips(paths)
+            if mismatched:
+                st.warning("⚠️ Paramètres de flux toujours incompatibles")
+                return None
+
+        # Conteneur des clips joints (la vidéo brute ne tient pas dans un MP4)
+        output_path = os.path.splitext(output_path)[0] + os.path.splitext(paths[0])[1]
+        if not concat_with_demuxer(paths, output_path, work_dir):
+            return None
+
+        st.success(f"✅ {len(paths)} clips joints par copie de flux (sans réencodage)")
+        return output_path
+    finally:
+        for path in created:
+            if os.path.exists(path):
+                os.remove(path)
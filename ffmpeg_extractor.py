@@ -0,0 +1,319 @@
+"""
+Module d'extraction native ffmpeg
+=================================
+Chaque segment sélectionné et son plan de crop sont traduits en une seule
+invocation ffmpeg (seek, crop, scale, fps, format de pixels) qui écrit un
+clip intermédiaire normalisé. Les frames ne transitent jamais par Python.
+
+Quand la source est déjà au format cible (1080x1920 H.264 30 fps) et qu'aucune
+transformation spatiale n'est nécessaire, les bornes du segment sont calées
+vers l'extérieur sur les images clés voisines et le segment est copié sans
+réencodage (il contient toujours le segment planifié).
+
+Fonctions principales :
+- needs_python_frame_processing : Indique si un traitement frame par frame est requis
+- build_extraction_command : Construit la commande ffmpeg d'un segment
+- extract_clip_ffmpeg : Extrait un segment vers un fichier intermédiaire
+- can_stream_copy : Indique si la source peut être découpée par copie de flux
+- snap_to_keyframes : Cale les bornes d'un segment sur les images clés extérieures
+- extract_segment : Choisit copie ou réencodage et extrait le segment
+"""
+import os
+import bisect
+import cv2
+import streamlit as st
+from typing import List, Dict, Optional, Tuple
+from constants import VIDEO_FORMAT, STREAM_COPY_SETTINGS
+from crop_planner import is_full_frame
+from ffmpeg_utils import ffmpeg_base_command, intermediate_codec_args, run_ffmpeg
+from video_probe import get_keyframe_times
+
+# Écart (s) sous lequel une image clé est considérée sur la borne demandée
+_KEYFRAME_EPSILON = 1e-3
+
+
+def needs_python_frame_processing(
+    remove_text_method: Optional[str] = None,
+    text_net: Optional[cv2.dnn_Net] = None
+) -> bool:
+    """
+    Indique si le clip nécessite un traitement Python frame par frame
+
+    Args:
+        remove_text_method: Méthode de suppression de texte
+        text_net: Modèle de détection de texte
+
+    Returns:
+        bool: True si les frames doivent passer par Python (suppression de texte)
+    """
+    return bool(remove_text_method) and text_net is not None
+
+
+def build_video_filters(crop: Dict, use_lanczos: bool = False) -> str:
+    """
+    Construit la chaîne de filtres vidéo crop → scale → fps → format
+
+    Args:
+        crop: Fenêtre de crop {'x', 'y', 'width', 'height'}
+        use_lanczos: Utiliser Lanczos pour un resize plus net
+
+    Returns:
+        str: Chaîne de filtres ffmpeg
+    """
+    scale_flags = 'lanczos' if use_lanczos else 'bicubic'
+    return ','.join([
+        f"crop={crop['width']}:{crop['height']}:{crop['x']}:{crop['y']}",
+        f"scale={VIDEO_FORMAT['width']}:{VIDEO_FORMAT['height']}:flags={scale_flags}",
+        'setsar=1',
+        f"fps={VIDEO_FORMAT['fps']}",
+        'format=yuv420p'
+    ])
+
+
+def build_extraction_command(
+    video_path: str,
+    start: float,
+    end: float,
+    crop: Dict,
+    output_path: str,
+    use_lanczos: bool = False
+) -> List[str]:
+    """
+    Construit la commande ffmpeg d'extraction d'un segment
+
+    Args:
+        video_path: Chemin de la vidéo source
+        start: Début du segment (secondes)
+        end: Fin du segment (secondes)
+        crop: Fenêtre de crop en pixels source
+        output_path: Chemin du fichier intermédiaire
+        use_lanczos: Utiliser Lanczos pour le resize
+
+    Returns:
+        List[str]: Commande ffmpeg
+    """
+    return ffmpeg_base_command() + [
+        '-ss', f"{start:.3f}",
+        '-i', video_path,
+        '-t', f"{end - start:.3f}",
+        '-map', '0:v:0',
+        '-vf', build_video_filters(crop, use_lanczos),
+        '-an', '-sn', '-dn',
+    ] + intermediate_codec_args(end - start) + [
+        '-movflags', '+faststart',
+        output_path
+    ]
+
+
+def extract_clip_ffmpeg(
+    video_path: str,
+    start: float,
+    end: float,
+    crop: Dict,
+    output_path: str,
+    use_lanczos: bool = False
+) -> Optional[str]:
+    """
+    Extrait un segment recadré et normalisé en une seule passe ffmpeg
+
+    Args:
+        video_path: Chemin de la vidéo source
+        start: Début du segment (secondes)
+        end: Fin du segment (secondes)
+        crop: Fenêtre de crop en pixels source
+        output_path: Chemin du fichier intermédiaire
+        use_lanczos: Utiliser Lanczos pour le resize
+
+    Returns:
+        str: Chemin du clip intermédiaire ou None si échec
+    """
+    cmd = build_extraction_command(video_path, start, end, crop, output_path, use_lanczos)
+    success, stderr = run_ffmpeg(cmd)
+
+    if not success or not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        st.warning(f"⚠️ Extraction ffmpeg échouée: {stderr.strip()[-300:]}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return None
+
+    return output_path
+
+
+def can_stream_copy(source_info: Optional[Dict], crop: Dict) -> bool:
+    """
+    Indique si un segment peut être découpé par copie de flux
+
+    Args:
+        source_info: Métadonnées ffprobe de la source
+        crop: Fenêtre de crop prévue
+
+    Returns:
+        bool: True si la source est déjà au format cible sans transformation
+    """
+    if not STREAM_COPY_SETTINGS['enabled'] or not source_info:
+        return False
+
+    fps_tolerance = STREAM_COPY_SETTINGS['fps_tolerance']
+    return (
+        source_info.get('codec') == STREAM_COPY_SETTINGS['codec'] and
+        source_info.get('pix_fmt') == STREAM_COPY_SETTINGS['pix_fmt'] and
+        source_info.get('rotation', 0) == 0 and
+        source_info.get('width') == VIDEO_FORMAT['width'] and
+        source_info.get('height') == VIDEO_FORMAT['height'] and
+        abs(source_info.get('fps', 0) - VIDEO_FORMAT['fps']) <= fps_tolerance and
+        abs(source_info.get('r_fps', 0) - VIDEO_FORMAT['fps']) <= fps_tolerance and
+        is_full_frame(crop, source_info['width'], source_info['height'])
+    )
+
+
+def _outer_keyframe(
+    keyframes: List[float],
+    t: float,
+    tolerance: float,
+    after: bool = False
+) -> Optional[float]:
+    """Image clé extérieure la plus proche de t (avant, ou après si after) dans la tolérance"""
+    if after:
+        idx = bisect.bisect_left(keyframes, t - _KEYFRAME_EPSILON)
+        candidate = keyframes[idx] if idx < len(keyframes) else None
+    else:
+        idx = bisect.bisect_right(keyframes, t + _KEYFRAME_EPSILON)
+        candidate = keyframes[idx - 1] if idx > 0 else None
+    if candidate is None or abs(candidate - t) > tolerance:
+        return None
+    return candidate
+
+
+def snap_to_keyframes(
+    start: float,
+    end: float,
+    keyframes: List[float],
+    source_duration: float,
+    tolerance: Optional[float] = None
+) -> Optional[Tuple[float, float]]:
+    """
+    Cale les bornes d'un segment sur les images clés extérieures
+
+    Les bornes ne sont déplacées que vers l'extérieur : le début sur l'image
+    clé précédente, la fin sur l'image clé suivante (GOP fermé) ou sur la fin
+    du fichier. Le segment copié contient toujours le segment planifié, au
+    plus allongé de la tolérance de chaque côté.
+
+    Args:
+        start: Début demandé
+        end: Fin demandée
+        keyframes: Instants des images clés triés
+        source_duration: Durée de la source
+        tolerance: Allongement maximal de chaque borne (défaut: STREAM_COPY_SETTINGS)
+
+    Returns:
+        Tuple[float, float]: Bornes calées ou None si aucune image clé assez proche
+    """
+    if tolerance is None:
+        tolerance = STREAM_COPY_SETTINGS['keyframe_tolerance']
+    if not keyframes:
+        return None
+
+    snapped_start = _outer_keyframe(keyframes, start, tolerance)
+    if snapped_start is None:
+        return None
+
+    if source_duration - end <= tolerance:
+        snapped_end = source_duration
+    else:
+        snapped_end = _outer_keyframe(keyframes, end, tolerance, after=True)
+        if snapped_end is None:
+            return None
+
+    if snapped_end <= snapped_start:
+        return None
+    return snapped_start, snapped_end
+
+
+def build_stream_copy_command(
+    video_path: str,
+    start: float,
+    end: Optional[float],
+    output_path: str,
+    reorder_delay: float = 0.0
+) -> List[str]:
+    """
+    Construit la commande ffmpeg de découpe par copie de flux
+
+    En copie, ffmpeg coupe sur les DTS : le délai de réordonnancement des
+    B-frames est retranché pour que l'image clé de fin ne soit pas incluse.
+
+    Args:
+        video_path: Chemin de la vidéo source
+        start: Début du segment (image clé)
+        end: Fin du segment (None = jusqu'à la fin du fichier)
+        output_path: Chemin du fichier intermédiaire
+        reorder_delay: Délai de réordonnancement à retrancher (secondes)
+
+    Returns:
+        List[str]: Commande ffmpeg
+    """
+    duration_args = []
+    if end is not None:
+        duration_args = ['-t', f"{end - start - reorder_delay:.6f}"]
+
+    return ffmpeg_base_command() + [
+        '-ss', f"{start:.6f}",
+        '-i', video_path,
+    ] + duration_args + [
+        '-map', '0:v:0',
+        '-c:v', 'copy',
+        '-an', '-sn', '-dn',
+        '-avoid_negative_ts', 'make_zero',
+        '-movflags', '+faststart',
+        output_path
+    ]
+
+
+def extract_segment(
+    video_path: str,
+    start: float,
+    end: float,
+    crop: Dict,
+    output_path: str,
+    use_lanczos: bool = False,
+    source_info: Optional[Dict] = None
+) -> Optional[Dict]:
+    """
+    Extrait un segment par copie de flux si possible, sinon par réencodage
+
+    Args:
+        video_path: Chemin de la vidéo source
+        start: Début du segment (secondes)
+        end: Fin du segment (secondes)
+        crop: Fenêtre de crop en pixels source
+        output_path: Chemin du fichier intermédiaire (un flux copié est
+            toujours placé dans un conteneur MP4)
+        use_lanczos: Utiliser Lanczos pour le resize
+        source_info: Métadonnées ffprobe de la source
+
+    Returns:
+        Dict: {'path', 'method' ('copy' ou 'encode'), 'start', 'end'} ou None si échec
+    """
+    if can_stream_copy(source_info, crop):
+        copy_path = os.path.splitext(output_path)[0] + '.mp4'
+        snapped = snap_to_keyframes(
+            start, end, get_keyframe_times(video_path), source_info['duration']
+        )
+        if snapped:
+            copy_start, copy_end = snapped
+            until_eof = copy_end >= source_info['duration']
+            reorder_delay = (source_info.get('has_b_frames', 0) + 0.5) / source_info['fps']
+            cmd = build_stream_copy_command(
+                video_path, copy_start, None if until_eof else copy_end,
+                copy_path, reorder_delay
+            )
+            success, stderr = run_ffmpeg(cmd)
+            if success and os.path.exists(copy_path) and os.path.getsize(copy_path) > 0:
+                return {'path': copy_path, 'method': 'copy', 'start': copy_start, 'end': copy_end}
+            st.warning(f"⚠️ Copie de flux échouée, réencodage: {stderr.strip()[-300:]}")
+
+    path = extract_clip_ffmpeg(video_path, start, end, crop, output_path, use_lanczos)
+    if path is None:
+        return None
+    return {'path': path, 'method': 'encode', 'start': start, 'end': end}
@@ -0,0 +1,169 @@
+"""
+Utilitaires d'exécution ffmpeg
+Centralise l'appel aux binaires ffmpeg/ffprobe, les paramètres d'encodage
+des fichiers intermédiaires et de la vidéo finale, et le suivi des clips
+adossés à un intermédiaire
+"""
+import subprocess
+import tempfile
+import weakref
+from typing import Callable, List, Tuple, Optional, Dict
+from constants import FFMPEG_BINARIES, INTERMEDIATE_FORMATS, INTERMEDIATE_SETTINGS, VIDEO_FORMAT
+from encoder_profiles import encoder_args
+
+
+# Limite de threads des commandes ffmpeg (processus du pool de rendu)
+_thread_limit = {'threads': None}
+
+
+def limit_threads(threads: Optional[int]) -> None:
+    """
+    Limite les threads des commandes ffmpeg construites par ce processus
+
+    Args:
+        threads: Nombre de threads (None pour le réglage automatique de ffmpeg)
+    """
+    _thread_limit['threads'] = threads
+
+
+def ffmpeg_base_command() -> List[str]:
+    """
+    Début de commande ffmpeg commun (silencieux, écrasement autorisé)
+
+    Returns:
+        List[str]: Arguments de base
+    """
+    cmd = [FFMPEG_BINARIES['ffmpeg'], '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+    if _thread_limit['threads']:
+        cmd += ['-filter_threads', str(_thread_limit['threads']), '-threads', str(_thread_limit['threads'])]
+    return cmd
+
+
+def get_intermediate_format(duration: Optional[float] = None) -> Dict:
+    """
+    Format intermédiaire configuré pour un clip de la durée donnée
+
+    Les formats limités en durée (vidéo brute) cèdent la place à leur
+    format de repli au-delà de max_duration.
+
+    Args:
+        duration: Durée du clip (None = inconnue)
+
+    Returns:
+        Dict: Format intermédiaire (INTERMEDIATE_FORMATS)
+    """
+    name = INTERMEDIATE_SETTINGS['format']
+    fmt = INTERMEDIATE_FORMATS.get(name, INTERMEDIATE_FORMATS['x264_crf18'])
+    max_duration = fmt.get('max_duration')
+    if max_duration and (duration is None or duration > max_duration):
+        fmt = INTERMEDIATE_FORMATS[fmt['fallback']]
+    return fmt
+
+
+def intermediate_codec_args(duration: Optional[float] = None) -> List[str]:
+    """
+    Arguments d'encodage vidéo des fichiers intermédiaires normalisés
+
+    Args:
+        duration: Durée du clip (choix du format, voir get_intermediate_format)
+
+    Returns:
+        List[str]: Arguments ffmpeg (codec, preset, qualité, format de pixels)
+    """
+    fmt = get_intermediate_format(duration)
+    args = ['-c:v', fmt['codec']]
+    if fmt.get('preset'):
+        args += ['-preset', fmt['preset']]
+    if _thread_limit['threads']:
+        args += ['-threads', str(_thread_limit['threads'])]
+    return args + fmt['args'] + ['-pix_fmt', fmt['pix_fmt']]
+
+
+def final_encoding_args(threads: Optional[int] = None, crf: Optional[float] = None) -> List[str]:
+    """
+    Arguments d'encodage de la vidéo finale (profil de l'étape 'final')
+
+    Args:
+        threads: Threads de l'encodeur (défaut: ceux du profil)
+        crf: Qualité constante à la place du débit du profil (encodage à taille cible)
+
+    Returns:
+        List[str]: Arguments ffmpeg (même profil que l'encodage MoviePy)
+    """
+    return encoder_args('final', threads, crf) + ['-r', str(VIDEO_FORMAT['fps']), '-movflags', '+faststart']
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    progress: Optional[Callable[[int, bool], None]] = None
+) -> Tuple[bool, str]:
+    """
+    Exécute une commande ffmpeg
+
+    Args:
+        cmd: Commande complète
+        progress: Appelé avec (frames écrites, fin) à chaque bloc de la sortie -progress
+
+    Returns:
+        Tuple[bool, str]: (succès, sortie d'erreur)
+    """
+    if progress is not None:
+        return _run_ffmpeg_with_progress(cmd, progress)
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        return result.returncode == 0, result.stderr
+    except OSError as e:
+        return False, str(e)
+
+
+def _run_ffmpeg_with_progress(cmd: List[str], progress: Callable[[int, bool], None]) -> Tuple[bool, str]:
+    """Exécute ffmpeg en lisant les blocs clé=valeur de -progress sur sa sortie standard"""
+    # stderr part dans un fichier : un tube plein bloquerait ffmpeg pendant la lecture de stdout
+    cmd = cmd[:1] + ['-progress', 'pipe:1', '-nostats'] + cmd[1:]
+    try:
+        with tempfile.TemporaryFile(mode='w+') as stderr_file:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, text=True)
+            frames = 0
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if key == 'frame' and value.isdigit():
+                    frames = int(value)
+                elif key == 'progress':
+                    progress(frames, value == 'end')
+            process.wait()
+            stderr_file.seek(0)
+            return process.returncode == 0, stderr_file.read()
+    except OSError as e:
+        return False, str(e)
+
+
+# Clips MoviePy chargés tels quels depuis un intermédiaire. Registre à clés
+# faibles : les copies produites par les transformations MoviePy (resize,
+# fl_image, ...) n'y figurent pas et ne sont donc pas prises pour le fichier.
+_intermediate_clips = weakref.WeakKeyDictionary()
+
+
+def register_intermediate(clip, path: str, method: str = 'encode') -> None:
+    """
+    Enregistre un clip comme lecture directe d'un fichier intermédiaire
+
+    Args:
+        clip: Clip MoviePy chargé depuis le fichier
+        path: Chemin du fichier intermédiaire
+        method: Mode d'extraction ('copy' ou 'encode')
+    """
+    _intermediate_clips[clip] = {'path': path, 'method': method}
+
+
+def get_intermediate_path(clip) -> Optional[str]:
+    """
+    Retourne le fichier intermédiaire d'un clip s'il en est la lecture directe
+
+    Args:
+        clip: Clip MoviePy
+
+    Returns:
+        str: Chemin de l'intermédiaire ou None
+    """
+    entry = _intermediate_clips.get(clip)
+    return entry['path'] if entry else None
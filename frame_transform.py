@@ -0,0 +1,106 @@
+"""
+Module de transformation des frames (crop + resize fusionnés)
+=============================================================
+Remplace la chaîne MoviePy clip.crop(...) puis clip.resize(...) (ou un
+fl_image de resize Lanczos) par une seule opération par frame : la fenêtre
+de crop est une vue de la frame source (aucune copie), redimensionnée par un
+seul cv2.resize écrit dans un tampon de sortie réutilisé d'une frame à
+l'autre. Aucun appel Streamlit n'est fait par frame : une frame invalide
+lève une exception, signalée une fois par l'appelant.
+
+La fenêtre de crop peut être fixe (dict) ou varier au cours du temps
+(fonction t → dict, ex: recadrage qui suit un visage). Les interpolations
+sont celles du rendu ffmpeg (bicubique, ou Lanczos).
+
+Fonctions principales :
+- crop_view : Vue d'une fenêtre de crop dans une frame
+- make_frame_transformer : Crée la fonction crop + resize d'un format de sortie
+- apply_crop_resize : Applique crop + resize à un clip MoviePy
+"""
+import cv2
+import numpy as np
+from typing import Callable, Dict, Tuple, Union
+
+CropWindow = Union[Dict, Callable[[float], Dict]]
+
+
+def crop_view(frame: np.ndarray, crop: Dict) -> np.ndarray:
+    """
+    Vue (sans copie) d'une fenêtre de crop, ramenée dans les limites de la frame
+
+    Args:
+        frame: Frame source (hauteur, largeur, canaux)
+        crop: Fenêtre {'x', 'y', 'width', 'height'}
+
+    Returns:
+        np.ndarray: Vue de la fenêtre dans la frame
+    """
+    frame_h, frame_w = frame.shape[:2]
+    x = min(max(int(crop['x']), 0), frame_w - 1)
+    y = min(max(int(crop['y']), 0), frame_h - 1)
+    return frame[y:min(y + int(crop['height']), frame_h), x:min(x + int(crop['width']), frame_w)]
+
+
+def make_frame_transformer(
+    output_size: Tuple[int, int],
+    use_lanczos: bool = False
+) -> Callable[[np.ndarray, Dict], np.ndarray]:
+    """
+    Crée la fonction crop + resize vers un format de sortie
+
+    La frame retournée est le tampon de sortie, réécrit à l'appel suivant :
+    elle doit être consommée (encodée) avant de demander la frame suivante,
+    ce que fait l'écriture MoviePy.
+
+    Args:
+        output_size: Taille de sortie (largeur, hauteur)
+        use_lanczos: Interpolation Lanczos (sinon bicubique)
+
+    Returns:
+        Callable: transform(frame, crop) → frame au format de sortie
+    """
+    width, height = output_size
+    interpolation = cv2.INTER_LANCZOS4 if use_lanczos else cv2.INTER_CUBIC
+    state = {'buffer': None}
+
+    def transform(frame: np.ndarray, crop: Dict) -> np.ndarray:
+        if not isinstance(frame, np.ndarray) or frame.ndim != 3:
+            raise ValueError(f"frame invalide: {getattr(frame, 'shape', type(frame))}")
+
+        window = crop_view(frame, crop)
+        shape = (height, width, frame.shape[2])
+        buffer = state['buffer']
+        if buffer is None or buffer.shape != shape or buffer.dtype != frame.dtype:
+            buffer = state['buffer'] = np.empty(shape, dtype=frame.dtype)
+
+        if window.shape[:2] == (height, width):
+            np.copyto(buffer, window)
+        else:
+            cv2.resize(window, (width, height), dst=buffer, interpolation=interpolation)
+        return buffer
+
+    return transform
+
+
+def apply_crop_resize(
+    clip,
+    crop: CropWindow,
+    output_size: Tuple[int, int],
+    use_lanczos: bool = False
+):
+    """
+    Applique crop + resize à un clip MoviePy en une seule opération par frame
+
+    Args:
+        clip: Clip MoviePy source
+        crop: Fenêtre fixe {'x', 'y', 'width', 'height'} ou fonction t → fenêtre
+        output_size: Taille de sortie (largeur, hauteur)
+        use_lanczos: Interpolation Lanczos (sinon bicubique)
+
+    Returns:
+        Clip MoviePy au format de sortie
+    """
+    transform = make_frame_transformer(output_size, use_lanczos)
+    if callable(crop):
+        return clip.fl(lambda get_frame, t: transform(get_frame(t), crop(t)), apply_to=[])
+    return clip.fl_image(lambda frame: transform(frame, crop))
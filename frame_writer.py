@@ -0,0 +1,187 @@
+"""
+Module d'écriture des frames vers l'encodeur
+============================================
+Le FFMPEG_VideoWriter de MoviePy convertit chaque frame en bytes
+(tobytes) avant de l'écrire sur l'entrée standard de ffmpeg : un nouvel
+objet de ~6 Mo par frame 1080×1920.
+
+Ici, une frame uint8 contiguë est envoyée à ffmpeg directement depuis la
+mémoire NumPy (protocole buffer, tube non bufferisé), sans objet bytes
+intermédiaire ; les autres frames sont d'abord converties dans un tampon
+unique réutilisé.
+
+Les statistiques (débit, temps passé dans le tube, attentes) sont
+retournées à la fermeture et émises comme mesure structurée ; une attente
+est une écriture bloquée plus d'un intervalle de frame (encodeur en retard).
+
+Fonctions principales :
+- open_frame_writer : Démarre ffmpeg (entrée rawvideo RGB)
+- write_frame : Envoie une frame à ffmpeg
+- close_frame_writer : Termine l'encodage et retourne les statistiques
+- write_clip_frames : Écrit les frames d'un clip MoviePy dans un fichier
+
+Benchmark contre le writer MoviePy : benchmarks/bench_frame_writer.py
+"""
+import os
+import time
+import tempfile
+import subprocess
+import numpy as np
+from typing import Dict, List, Tuple
+from ffmpeg_utils import ffmpeg_base_command
+from encode_progress import emit_metrics
+
+
+def _write_all(stream, data: memoryview) -> None:
+    """Écrit tout un tampon sur un flux non bufferisé (écritures partielles possibles)"""
+    while data:
+        written = stream.write(data)
+        data = data[written:]
+
+
+def open_frame_writer(
+    path: str,
+    size: Tuple[int, int],
+    fps: float,
+    codec_args: List[str]
+) -> Dict:
+    """
+    Démarre ffmpeg (entrée rawvideo RGB sur un tube non bufferisé)
+
+    Args:
+        path: Fichier vidéo à écrire
+        size: Taille des frames (largeur, hauteur)
+        fps: Cadence
+        codec_args: Arguments d'encodage ffmpeg (ex: intermediate_codec_args())
+
+    Returns:
+        Dict: État du writer (à passer aux autres fonctions)
+    """
+    width, height = size
+    cmd = ffmpeg_base_command() + [
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f"{width}x{height}", '-r', str(fps),
+        '-i', 'pipe:0', '-an'
+    ] + codec_args + [path]
+
+    # stderr dans un fichier : un tube plein bloquerait ffmpeg pendant l'écriture
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_file, bufsize=0)
+
+    return {
+        'path': path,
+        'process': process,
+        'stderr': stderr_file,
+        'shape': (height, width, 3),
+        'buffer': None,
+        'error': None,
+        'stall_threshold': 1.0 / fps,
+        'start': time.perf_counter(),
+        'stats': {'frames': 0, 'bytes': 0, 'write_time': 0.0, 'stalls': 0, 'stall_time': 0.0}
+    }
+
+
+def write_frame(writer: Dict, frame: np.ndarray) -> None:
+    """
+    Envoie une frame à ffmpeg
+
+    Une frame uint8 contiguë est envoyée depuis sa mémoire, sans copie ; une
+    autre frame (réelle, vue non contiguë) est convertie dans un tampon réutilisé.
+
+    Args:
+        writer: État du writer
+        frame: Frame hauteur×largeur×3 (uint8, ou réelle dans [0, 255])
+    """
+    if writer['error'] is not None:
+        raise OSError(f"ffmpeg arrêté: {writer['error']}")
+    if frame.shape != writer['shape']:
+        raise ValueError(f"frame {frame.shape}, attendu {writer['shape']}")
+    if frame.dtype != np.uint8 or not frame.flags['C_CONTIGUOUS']:
+        if writer['buffer'] is None:
+            writer['buffer'] = np.empty(writer['shape'], dtype=np.uint8)
+        np.copyto(writer['buffer'], frame, casting='unsafe')
+        frame = writer['buffer']
+
+    stats = writer['stats']
+    start = time.perf_counter()
+    try:
+        _write_all(writer['process'].stdin, memoryview(frame).cast('B'))
+    except OSError as e:
+        # ffmpeg arrêté : l'erreur est remontée et détaillée à la fermeture
+        writer['error'] = str(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stats['write_time'] += elapsed
+        # Écriture bloquée plus d'un intervalle de frame : le tube est plein
+        if elapsed > writer['stall_threshold']:
+            stats['stalls'] += 1
+            stats['stall_time'] += elapsed
+    stats['bytes'] += frame.nbytes
+    stats['frames'] += 1
+
+
+def close_frame_writer(writer: Dict) -> Dict:
+    """
+    Termine l'encodage et retourne les statistiques
+
+    Args:
+        writer: État du writer
+
+    Returns:
+        Dict: {'success', 'error', 'frames', 'bytes', 'elapsed', 'mb_per_s', 'pipe_mb_per_s',
+               'stalls', 'stall_time'}
+    """
+    process = writer['process']
+    try:
+        process.stdin.close()
+    except OSError:
+        pass
+    returncode = process.wait()
+
+    writer['stderr'].seek(0)
+    stderr = writer['stderr'].read().decode(errors='replace').strip()
+    writer['stderr'].close()
+
+    stats = writer['stats']
+    elapsed = time.perf_counter() - writer['start']
+    megabytes = stats['bytes'] / 1024 / 1024
+    success = returncode == 0 and writer['error'] is None and os.path.exists(writer['path'])
+    result = {
+        'success': success,
+        'error': None if success else (stderr[-300:] or writer['error'] or f"code {returncode}"),
+        'frames': stats['frames'],
+        'bytes': stats['bytes'],
+        'elapsed': round(elapsed, 3),
+        'mb_per_s': round(megabytes / elapsed, 1) if elapsed > 0 else 0.0,
+        'pipe_mb_per_s': round(megabytes / stats['write_time'], 1) if stats['write_time'] > 0 else 0.0,
+        'stalls': stats['stalls'],
+        'stall_time': round(stats['stall_time'], 3)
+    }
+    emit_metrics({'stage': 'frame_writer', 'time': time.time(), 'file': os.path.basename(writer['path']),
+                  **result, 'pid': os.getpid()})
+    return result
+
+
+def write_clip_frames(clip, path: str, fps: float, codec_args: List[str]) -> Dict:
+    """
+    Écrit les frames d'un clip MoviePy dans un fichier vidéo (sans audio)
+
+    Args:
+        clip: Clip MoviePy
+        path: Fichier à écrire
+        fps: Cadence de sortie
+        codec_args: Arguments d'encodage ffmpeg
+
+    Returns:
+        Dict: Statistiques de close_frame_writer
+    """
+    writer = open_frame_writer(path, tuple(clip.size), fps, codec_args)
+    try:
+        for frame in clip.iter_frames(fps=fps, dtype='uint8'):
+            write_frame(writer, frame)
+    except Exception as e:
+        # ffmpeg arrêté ou frame invalide : l'encodage est terminé, l'erreur remontée
+        close_frame_writer(writer)
+        raise OSError(f"écriture des frames interrompue: {str(e)}") from e
+    return close_frame_writer(writer)
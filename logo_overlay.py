@@ -0,0 +1,180 @@
+"""
+Module d'incrustation du logo
+=============================
+Le logo est redimensionné et prémultiplié par son alpha (et l'opacité) une
+seule fois, puis mélangé en place sur sa seule zone de chaque frame, en
+arithmétique entière uint16 vectorisée. Le logo préparé est mis en cache
+disque par empreinte du fichier et réglages de taille et d'opacité.
+
+Fonctions principales :
+- logo_position : Position du logo selon les réglages de l'interface
+- prepare_logo : Logo redimensionné et prémultiplié (avec cache)
+- blend_logo : Mélange le logo sur sa zone d'une frame
+"""
+import os
+import numpy as np
+from PIL import Image
+from typing import Dict, Optional, Tuple
+from constants import VIDEO_FORMAT
+from asset_cache import file_digest, cache_path
+
+# Logos préparés pendant l'exécution, par clé de cache
+_prepared_logos: Dict[str, Dict] = {}
+
+
+def logo_position(
+    position: str,
+    logo_width: int,
+    margin: int = 40,
+    vertical_position: int = 10,
+    video_width: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Coin supérieur gauche du logo dans la frame
+
+    Args:
+        position: "Haut gauche", "Haut droite" ou "Haut centre"
+        logo_width: Largeur du logo redimensionné
+        margin: Marge horizontale
+        vertical_position: Position verticale
+        video_width: Largeur de la vidéo (défaut: format de sortie)
+
+    Returns:
+        Tuple[int, int]: (x, y)
+    """
+    if video_width is None:
+        video_width = VIDEO_FORMAT['width']
+
+    if position == "Haut gauche":
+        x = margin
+    elif position == "Haut droite":
+        x = video_width - logo_width - margin
+    else:  # Haut centre
+        x = (video_width - logo_width) // 2
+    return x, vertical_position
+
+
+def logo_size(logo_path: str, size_percent: int = 20) -> Tuple[int, int]:
+    """
+    Taille du logo redimensionné (largeur en % de la largeur de sortie)
+
+    Args:
+        logo_path: Chemin du logo
+        size_percent: Taille en % de la largeur
+
+    Returns:
+        Tuple[int, int]: (largeur, hauteur)
+    """
+    with Image.open(logo_path) as logo_img:
+        logo_width = int(VIDEO_FORMAT['width'] * size_percent / 100)
+        logo_height = int(logo_img.height * (logo_width / logo_img.width))
+    return logo_width, logo_height
+
+
+def _premultiply(logo_path: str, size: Tuple[int, int], opacity: float) -> Dict:
+    """
+    Redimensionne le logo en espace prémultiplié et précalcule les termes du mélange
+
+    Pour chaque pixel : sortie = (frame * inv_alpha + color) // 255, avec
+    inv_alpha = 255 - alpha et color = rgb * alpha + 127 (arrondi inclus).
+    Le total reste sous 255 * 255 + 127 et tient donc en uint16.
+    """
+    with Image.open(logo_path) as logo_img:
+        # Redimensionner en RGBa (prémultiplié) évite les franges sur les bords transparents
+        resized = logo_img.convert('RGBA').convert('RGBa').resize(size, Image.LANCZOS)
+        rgba = np.asarray(resized, dtype=np.float32)
+
+    alpha = np.rint(rgba[..., 3:4] * opacity)
+    color = np.minimum(np.rint(rgba[..., :3] * 255 * opacity), alpha * 255) + 127
+    return {
+        'color': color.astype(np.uint16),
+        'inv_alpha': (255 - alpha).astype(np.uint16)
+    }
+
+
+def prepare_logo(
+    logo_path: str,
+    size_percent: int = 20,
+    opacity: float = 0.5
+) -> Optional[Dict]:
+    """
+    Logo redimensionné et prémultiplié, prêt à être mélangé
+
+    Args:
+        logo_path: Chemin du logo
+        size_percent: Taille en % de la largeur
+        opacity: Opacité du logo
+
+    Returns:
+        Dict: {'color', 'inv_alpha', 'width', 'height'} ou None si le logo est illisible
+    """
+    digest = file_digest(logo_path)
+    if digest is None:
+        return None
+
+    try:
+        width, height = logo_size(logo_path, size_percent)
+    except (OSError, ValueError):
+        return None
+
+    key = f"{digest}_{width}x{height}_{opacity:.3f}"
+    if key in _prepared_logos:
+        return _prepared_logos[key]
+
+    path = cache_path('logo', key, '.npz')
+    logo = None
+    if os.path.exists(path):
+        try:
+            with np.load(path) as cached:
+                logo = {'color': cached['color'], 'inv_alpha': cached['inv_alpha']}
+        except (OSError, ValueError, KeyError):
+            logo = None
+
+    if logo is None:
+        try:
+            logo = _premultiply(logo_path, (width, height), opacity)
+        except (OSError, ValueError):
+            return None
+        # Écriture atomique : une exécution concurrente ne lit jamais un fichier partiel
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **logo)
+        os.replace(tmp_path, path)
+
+    logo.update({'width': width, 'height': height})
+    _prepared_logos[key] = logo
+    return logo
+
+
+def blend_logo(frame: np.ndarray, logo: Dict, x: int, y: int) -> np.ndarray:
+    """
+    Mélange le logo sur sa zone de la frame, en place
+
+    Args:
+        frame: Frame RGB uint8 (copiée si elle est en lecture seule)
+        logo: Logo issu de prepare_logo
+        x: Position horizontale du logo
+        y: Position verticale du logo
+
+    Returns:
+        np.ndarray: Frame avec le logo
+    """
+    frame_h, frame_w = frame.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + logo['width'], frame_w), min(y + logo['height'], frame_h)
+    if x0 >= x1 or y0 >= y1:
+        return frame
+
+    if not frame.flags.writeable:
+        frame = frame.copy()
+
+    roi = frame[y0:y1, x0:x1, :3]
+    logo_rows = slice(y0 - y, y1 - y)
+    logo_cols = slice(x0 - x, x1 - x)
+
+    blended = roi.astype(np.uint16)
+    blended *= logo['inv_alpha'][logo_rows, logo_cols]
+    blended += logo['color'][logo_rows, logo_cols]
+    blended //= 255
+    roi[...] = blended
+    return frame
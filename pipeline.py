@@ -0,0 +1,176 @@
+"""
+Module du pipeline import → analyse → rendu
+===========================================
+Les vidéos uploadées traversent trois étapes qui se recouvrent : pendant que
+la vidéo N est analysée (thread principal), la vidéo N+1 est importée
+(stockage, remux ou transcodage) et les segments de la vidéo N-1 sont rendus
+en clips intermédiaires. Les files entre étapes sont bornées
+(PIPELINE_SETTINGS['queue_size']) : une étape en avance attend la suivante,
+la mémoire et le disque restent bornés.
+
+Le rendu anticipé ne concerne que les segments principaux (hors réserve),
+rendus par ffmpeg, et s'arrête à la durée cible du montage : le plan ne
+garde jamais plus que cette durée, dans l'ordre d'analyse sans mélange. Le
+montage est toujours planifié après l'analyse, et render_edl réutilise les
+clips dont la clé de rendu correspond au plan.
+
+Fonctions principales :
+- run_pipeline : Importe, analyse et pré-rend les vidéos uploadées
+"""
+import queue
+import threading
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Callable, Dict, List, Optional, Tuple
+from constants import PIPELINE_SETTINGS
+from utils import process_uploaded_video
+from scratch_space import set_current_job
+from edit_decision_list import render_key
+
+_DONE = object()
+
+
+def _start_stage(target: Callable, *args) -> threading.Thread:
+    """Démarre une étape dans un thread rattaché à la session Streamlit"""
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    thread.start()
+    return thread
+
+
+def _put(out_queue: queue.Queue, item, stop: threading.Event) -> bool:
+    """Dépose un élément dans une file bornée (False si le pipeline s'arrête)"""
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _ingest_stage(uploaded_files, job_dir: str, out_queue: queue.Queue, stop: threading.Event) -> None:
+    """Étape 1 : stockage et import des vidéos, une à la fois"""
+    set_current_job(job_dir)
+    try:
+        for idx, uploaded_file in enumerate(uploaded_files):
+            if stop.is_set():
+                break
+            video_info = process_uploaded_video(uploaded_file, idx, job_dir)
+            if video_info and not _put(out_queue, video_info, stop):
+                break
+    finally:
+        out_queue.put(_DONE)
+
+
+def _render_stage(
+    render: Callable[[Dict], Optional[Dict]],
+    use_lanczos: bool,
+    budget: Optional[float],
+    job_dir: str,
+    in_queue: queue.Queue,
+    prerendered: Dict[tuple, Dict],
+    stop: threading.Event
+) -> None:
+    """Étape 3 : rendu anticipé des segments principaux, dans la limite de la durée cible"""
+    set_current_job(job_dir)
+    remaining = budget
+    skipped = 0
+    while True:
+        segments = in_queue.get()
+        if segments is _DONE:
+            break
+        for segment in segments:
+            if stop.is_set():
+                break
+            # Au-delà de la durée cible, le plan raccourcit ou écarte le segment :
+            # son rendu anticipé ne serait pas réutilisé
+            duration = segment['end'] - segment['start']
+            if remaining is not None and duration > remaining + 1e-3:
+                remaining = 0.0
+                skipped += 1
+                continue
+            if remaining is not None:
+                remaining -= duration
+            key = render_key(dict(segment, text_removal=None), use_lanczos)
+            try:
+                clip = render(dict(segment))
+            except Exception as e:
+                st.warning(f"⚠️ Rendu anticipé échoué ({str(e)}), le clip sera rendu avec le montage")
+                continue
+            if clip is not None:
+                prerendered[key] = clip
+    if skipped:
+        st.info(f"⏭️ {skipped} segment(s) non pré-rendus: au-delà de la durée cible")
+
+
+def run_pipeline(
+    uploaded_files,
+    job_dir: str,
+    analyze: Callable[[int, Dict], List[Dict]],
+    render: Optional[Callable[[Dict], Optional[Dict]]] = None,
+    use_lanczos: bool = False,
+    render_budget: Optional[float] = None
+) -> Tuple[List[Dict], Dict[int, List[Dict]], Dict[tuple, Dict]]:
+    """
+    Importe, analyse et pré-rend les vidéos uploadées en pipeline
+
+    Args:
+        uploaded_files: Fichiers uploadés Streamlit
+        job_dir: Répertoire de la tâche
+        analyze: Analyse d'une vidéo importée (index, infos) → segments (thread principal)
+        render: Rendu d'un segment en descripteur de clip (None: pas de rendu anticipé)
+        use_lanczos: Qualité du resize utilisée par render (clé de réutilisation)
+        render_budget: Durée cible du montage : secondes de segments pré-rendus au plus
+            (None: tous les segments principaux, le plan les garde tous)
+
+    Returns:
+        Tuple: (vidéos importées, segments par vidéo, clips pré-rendus par render_key)
+    """
+    queue_size = max(PIPELINE_SETTINGS['queue_size'], 1)
+    ingest_queue = queue.Queue(maxsize=queue_size)
+    render_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    prerendered: Dict[tuple, Dict] = {}
+
+    ingest_thread = _start_stage(_ingest_stage, uploaded_files, job_dir, ingest_queue, stop)
+    render_thread = None
+    if render is not None:
+        render_thread = _start_stage(
+            _render_stage, render, use_lanczos, render_budget, job_dir, render_queue, prerendered, stop
+        )
+
+    processed_files = []
+    segments_by_video = {}
+    finished = False
+    try:
+        while True:
+            video_info = ingest_queue.get()
+            if video_info is _DONE:
+                finished = True
+                break
+            idx = len(processed_files)
+            processed_files.append(video_info)
+            segments = analyze(idx, video_info)
+            segments_by_video[idx] = segments
+            if render_thread is not None:
+                primary = [seg for seg in segments if not seg.get('reserve')]
+                if primary:
+                    render_queue.put(primary)
+    finally:
+        if not finished:
+            # Analyse interrompue : arrêter les étapes et libérer l'import en attente
+            stop.set()
+            while ingest_thread.is_alive():
+                try:
+                    ingest_queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+        ingest_thread.join()
+        if render_thread is not None:
+            render_queue.put(_DONE)
+            render_thread.join()
+
+    return processed_files, segments_by_video, prerendered
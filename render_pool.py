@@ -0,0 +1,212 @@
+"""
+Module du pool de rendu des clips
+=================================
+Le rendu de chaque segment planifié (crop, resize, fps, suppression du
+texte) est indépendant des autres : les segments sont rendus en parallèle
+par RENDER_POOL_SETTINGS['workers'] processus, chacun limité à
+'threads_per_worker' threads pour ffmpeg et OpenCV afin de ne pas
+surcharger la machine. Chaque processus charge son propre modèle de
+détection de texte. Les résultats sont rendus dans l'ordre des segments.
+
+Le pool est créé à la première utilisation puis partagé par les rendus
+suivants de toutes les sessions (démarrage des processus amorti) : la
+tâche et le modèle de texte accompagnent chaque clip soumis. Un seul
+processus configuré revient au rendu séquentiel dans le processus principal.
+
+Fonctions principales :
+- render_workers : Nombre de processus de rendu configurés
+- render_segments : Rend des segments, en parallèle si possible
+- shutdown_pool : Arrête les processus de rendu
+"""
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+import cv2
+import streamlit as st
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from constants import RENDER_POOL_SETTINGS
+from ffmpeg_utils import limit_threads
+from scratch_space import set_current_job
+
+# Pool partagé par les sessions du processus (créé et remplacé sous verrou)
+# et modèles de texte chargés par chaque processus de rendu, par fichier
+_pool_lock = threading.Lock()
+_pool_state = {'executor': None, 'config': None}
+_worker_state = {'text_nets': {}}
+
+
+def render_workers() -> int:
+    """Nombre de processus de rendu configurés"""
+    return max(RENDER_POOL_SETTINGS['workers'], 1)
+
+
+def _threads_per_worker() -> int:
+    """Threads ffmpeg/OpenCV accordés à chaque processus de rendu"""
+    threads = RENDER_POOL_SETTINGS['threads_per_worker']
+    return threads if threads > 0 else max(1, (os.cpu_count() or 1) // render_workers())
+
+
+def _init_worker(threads: int) -> None:
+    """Initialise un processus de rendu (limites de threads)"""
+    # Les messages Streamlit hors session ne sont pas affichés : pas d'avertissement par appel
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    limit_threads(threads)
+    cv2.setNumThreads(threads)
+
+
+def _worker_text_net(text_model_path: str):
+    """Modèle de texte du processus de rendu (chargé au premier clip qui l'utilise)"""
+    if text_model_path not in _worker_state['text_nets']:
+        from text_detector import load_text_detection_model
+        _worker_state['text_nets'][text_model_path] = load_text_detection_model(text_model_path)
+    return _worker_state['text_nets'][text_model_path]
+
+
+def _render_job(
+    segment: Dict,
+    output_dir: str,
+    use_lanczos: bool,
+    remove_text_method: Optional[str],
+    text_model_path: Optional[str]
+) -> Optional[Dict]:
+    """Rend un segment dans un processus de rendu, pour la tâche qui l'a soumis"""
+    from video_extractor import render_segment
+    text_net = _worker_text_net(text_model_path) if remove_text_method and text_model_path else None
+    set_current_job(output_dir)
+    try:
+        return render_segment(
+            segment,
+            output_dir=output_dir,
+            use_lanczos=use_lanczos,
+            remove_text_method=remove_text_method,
+            text_net=text_net
+        )
+    finally:
+        set_current_job(None)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool de rendu du processus (appelé sous _pool_lock ; réutilisé si la configuration est identique)"""
+    threads = _threads_per_worker()
+    config = (render_workers(), threads)
+    if _pool_state['executor'] is not None and _pool_state['config'] == config:
+        return _pool_state['executor']
+
+    # Configuration modifiée : l'ancien pool termine les clips déjà soumis
+    if _pool_state['executor'] is not None:
+        _pool_state['executor'].shutdown(wait=False)
+    # spawn : pas de fork d'un processus multi-threadé (serveur Streamlit)
+    _pool_state['executor'] = ProcessPoolExecutor(
+        max_workers=config[0],
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(threads,)
+    )
+    _pool_state['config'] = config
+    return _pool_state['executor']
+
+
+def _discard_pool(executor: ProcessPoolExecutor) -> None:
+    """Oublie un pool interrompu (le suivant est recréé à la demande)"""
+    with _pool_lock:
+        if _pool_state['executor'] is executor:
+            _pool_state['executor'] = None
+            _pool_state['config'] = None
+    executor.shutdown(wait=False)
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    """Arrête les processus de rendu (fin du processus)"""
+    with _pool_lock:
+        executor = _pool_state['executor']
+        _pool_state['executor'] = None
+        _pool_state['config'] = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def render_segments(
+    segments: List[Dict],
+    output_dir: str,
+    use_lanczos: bool = False,
+    text_net=None,
+    text_model_path: Optional[str] = None
+) -> List[Optional[Dict]]:
+    """
+    Rend des segments distincts, en parallèle si plusieurs processus sont configurés
+
+    Args:
+        segments: Segments à rendre (clé 'text_removal' : méthode de suppression du texte)
+        output_dir: Répertoire des clips intermédiaires
+        use_lanczos: Utiliser Lanczos pour le resize
+        text_net: Modèle de texte du processus principal (rendu séquentiel, reprises)
+        text_model_path: Fichier du modèle de texte (chargé par chaque processus ; par
+            le processus principal si text_net est absent)
+
+    Returns:
+        List[Optional[Dict]]: Descripteurs des clips, dans l'ordre des segments (None si échec)
+    """
+    from video_extractor import render_segment
+
+    needs_text = any(seg.get('text_removal') for seg in segments)
+    if needs_text and not text_model_path and text_net is None:
+        st.warning("⚠️ Modèle de détection de texte indisponible: clips rendus sans suppression du texte")
+
+    def render_here(segment: Dict) -> Optional[Dict]:
+        nonlocal text_net
+        remove_text_method = segment.get('text_removal')
+        if remove_text_method and text_net is None and text_model_path:
+            # Rendu dans le processus principal : modèle chargé une fois
+            from text_detector import load_text_detection_model
+            text_net = load_text_detection_model(text_model_path)
+        return render_segment(
+            segment,
+            output_dir=output_dir,
+            use_lanczos=use_lanczos,
+            remove_text_method=remove_text_method,
+            text_net=text_net if remove_text_method else None
+        )
+
+    if render_workers() <= 1 or len(segments) <= 1:
+        return [render_here(segment) for segment in segments]
+
+    st.info(f"🧵 Rendu de {len(segments)} clips en parallèle: {render_workers()} processus "
+            f"× {_threads_per_worker()} thread(s)")
+    progress_bar = st.progress(0)
+    results: List[Optional[Dict]] = [None] * len(segments)
+    failed = []
+    try:
+        # Soumission sous verrou : le pool ne peut pas être remplacé entre-temps
+        with _pool_lock:
+            pool = _get_pool()
+            futures = {
+                pool.submit(_render_job, dict(segment), output_dir, use_lanczos,
+                            segment.get('text_removal'), text_model_path): idx
+                for idx, segment in enumerate(segments)
+            }
+        for done, future in enumerate(as_completed(futures), start=1):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                st.warning(f"⚠️ Clip {idx + 1}: échec du rendu parallèle ({str(e)})")
+                failed.append(idx)
+            progress_bar.progress(int(100 * done / len(segments)))
+    except BrokenProcessPool:
+        st.warning("⚠️ Pool de rendu interrompu, reprise séquentielle des clips restants")
+        _discard_pool(pool)
+        failed = [idx for idx, result in enumerate(results) if result is None]
+
+    # Reprise séquentielle des clips en échec (ex: mémoire insuffisante dans un processus)
+    for idx in failed:
+        results[idx] = render_here(segments[idx])
+
+    st.success(f"✅ {sum(1 for result in results if result is not None)}/{len(segments)} clips rendus")
+    return results
@@ -0,0 +1,340 @@
+"""
+Module de gestion de l'espace de travail
+========================================
+Chaque tâche (session de l'interface, rendu) reçoit son propre répertoire
+sous SCRATCH_SETTINGS['dir'] ; les fichiers temporaires y reçoivent des noms
+uniques, sans collision entre sessions concurrentes. Le répertoire d'une
+tâche est supprimé à sa fin, à l'arrêt du processus, ou au démarrage suivant
+si le processus propriétaire a disparu (plantage).
+
+Un budget disque total (tâches + cache des ressources préparées) est
+appliqué : au-delà, les entrées du cache les moins récemment utilisées,
+réutilisables mais recalculables, sont supprimées en premier.
+
+Fonctions principales :
+- create_job : Crée le répertoire d'une tâche
+- set_current_job : Associe une tâche au thread courant (session Streamlit)
+- scratch_path : Chemin unique d'un fichier temporaire de la tâche
+- end_job : Supprime le répertoire d'une tâche
+- enforce_budget : Applique le budget disque par éviction LRU du cache
+- maybe_enforce_budget : Applique le budget au plus une fois par intervalle
+- cleanup_orphans : Supprime les répertoires de tâches abandonnés
+"""
+import os
+import time
+import uuid
+import atexit
+import shutil
+import threading
+import streamlit as st
+from typing import Dict, List, Optional
+from constants import SCRATCH_SETTINGS, CACHE_SETTINGS
+
+_OWNER_FILE = '.owner'
+
+# Tâches créées par ce processus et tâche courante de chaque thread
+_jobs = set()
+_jobs_lock = threading.Lock()
+_default_lock = threading.Lock()
+_budget_lock = threading.Lock()
+_local = threading.local()
+_state = {'default_job': None, 'orphans_cleaned': False, 'last_budget_warning': 0.0,
+          'last_budget_check': 0.0}
+
+
+def _pid_alive(pid: int) -> bool:
+    """Indique si un processus existe encore"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_pid(job_dir: str) -> Optional[int]:
+    """PID du processus propriétaire d'un répertoire de tâche"""
+    try:
+        with open(os.path.join(job_dir, _OWNER_FILE)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _make_owned_dir(path: str) -> str:
+    """Crée un répertoire de tâche marqué avec le PID du processus courant"""
+    os.makedirs(path, exist_ok=True)
+    owner = os.path.join(path, _OWNER_FILE)
+    if not os.path.exists(owner):
+        with open(owner, 'w') as f:
+            f.write(str(os.getpid()))
+    return path
+
+
+def _roots() -> List[str]:
+    """Répertoires racines des tâches (standard et rapide)"""
+    roots = [SCRATCH_SETTINGS['dir']]
+    if SCRATCH_SETTINGS['fast_dir']:
+        roots.append(os.path.join(SCRATCH_SETTINGS['fast_dir'], 'upload_video_mixer_jobs'))
+    return roots
+
+
+def cleanup_orphans() -> int:
+    """
+    Supprime les répertoires de tâches abandonnés
+
+    Un répertoire est abandonné si son processus propriétaire n'existe plus
+    (plantage), s'il porte le PID du processus courant sans être une de ses
+    tâches (redémarrage du conteneur : le nouveau processus reçoit souvent le
+    même PID) ou s'il n'a pas été modifié depuis
+    SCRATCH_SETTINGS['orphan_max_age_hours'].
+
+    Returns:
+        int: Nombre de répertoires supprimés
+    """
+    max_age = SCRATCH_SETTINGS['orphan_max_age_hours'] * 3600
+    now = time.time()
+    removed = 0
+    with _jobs_lock:
+        # Répertoires rapides : même nom que la tâche, sous une autre racine
+        live = {os.path.basename(job_dir) for job_dir in _jobs}
+    for root in _roots():
+        if not os.path.isdir(root):
+            continue
+        for entry in os.scandir(root):
+            if not entry.is_dir() or entry.name in live:
+                continue
+            pid = _owner_pid(entry.path)
+            try:
+                stale = now - entry.stat().st_mtime > max_age
+            except OSError:
+                continue
+            if pid is None or pid == os.getpid() or not _pid_alive(pid) or stale:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+    return removed
+
+
+def create_job(name: str = 'job') -> str:
+    """
+    Crée le répertoire d'une tâche
+
+    Args:
+        name: Préfixe du répertoire (ex: 'session')
+
+    Returns:
+        str: Chemin du répertoire de la tâche
+    """
+    if not _state['orphans_cleaned']:
+        _state['orphans_cleaned'] = True
+        removed = cleanup_orphans()
+        if removed:
+            st.info(f"🧹 {removed} espace(s) de travail abandonné(s) supprimé(s)")
+
+    job_dir = os.path.join(SCRATCH_SETTINGS['dir'], f"{name}_{os.getpid()}_{uuid.uuid4().hex[:8]}")
+    _make_owned_dir(job_dir)
+    with _jobs_lock:
+        _jobs.add(job_dir)
+    _state['last_budget_check'] = time.monotonic()
+    enforce_budget()
+    return job_dir
+
+
+def set_current_job(job_dir: Optional[str]) -> None:
+    """
+    Associe une tâche au thread courant (chaque session Streamlit a son thread)
+
+    Args:
+        job_dir: Répertoire de la tâche (None pour dissocier)
+    """
+    _local.job_dir = job_dir
+
+
+def current_job() -> str:
+    """
+    Tâche du thread courant, ou tâche par défaut du processus
+
+    Returns:
+        str: Répertoire de la tâche
+    """
+    job_dir = getattr(_local, 'job_dir', None)
+    if job_dir and os.path.isdir(job_dir):
+        return job_dir
+    with _default_lock:
+        default_job = _state['default_job']
+        if default_job is None or not os.path.isdir(default_job):
+            default_job = create_job('process')
+            _state['default_job'] = default_job
+    return default_job
+
+
+def _fast_dir(job_dir: str) -> Optional[str]:
+    """Miroir d'une tâche sur le répertoire rapide, s'il est configuré et assez libre"""
+    if not SCRATCH_SETTINGS['fast_dir']:
+        return None
+    fast_root = _roots()[1]
+    try:
+        os.makedirs(fast_root, exist_ok=True)
+        free_mb = shutil.disk_usage(fast_root).free / 1024 / 1024
+    except OSError:
+        return None
+    if free_mb < SCRATCH_SETTINGS['fast_min_free_mb']:
+        return None
+    return _make_owned_dir(os.path.join(fast_root, os.path.basename(job_dir)))
+
+
+def scratch_path(
+    prefix: str,
+    extension: str = '',
+    fast: bool = False,
+    job_dir: Optional[str] = None
+) -> str:
+    """
+    Chemin unique d'un fichier temporaire dans le répertoire d'une tâche
+
+    Args:
+        prefix: Début du nom de fichier (ex: 'materialized_clip')
+        extension: Extension avec le point (ex: '.mp4')
+        fast: Placer le fichier sur le répertoire rapide s'il est disponible
+        job_dir: Tâche propriétaire (défaut: tâche du thread courant)
+
+    Returns:
+        str: Chemin du fichier (non créé)
+    """
+    job_dir = job_dir or current_job()
+    directory = (_fast_dir(job_dir) if fast else None) or job_dir
+    maybe_enforce_budget()
+    return os.path.join(directory, f"{prefix}_{uuid.uuid4().hex[:12]}{extension}")
+
+
+def end_job(job_dir: Optional[str]) -> bool:
+    """
+    Supprime le répertoire d'une tâche et son miroir rapide
+
+    Args:
+        job_dir: Répertoire de la tâche
+
+    Returns:
+        bool: True si la tâche a été supprimée
+    """
+    if not job_dir:
+        return False
+    with _jobs_lock:
+        _jobs.discard(job_dir)
+    if _state['default_job'] == job_dir:
+        _state['default_job'] = None
+    if getattr(_local, 'job_dir', None) == job_dir:
+        _local.job_dir = None
+
+    for root in _roots()[1:]:
+        shutil.rmtree(os.path.join(root, os.path.basename(job_dir)), ignore_errors=True)
+    if os.path.isdir(job_dir):
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return not os.path.exists(job_dir)
+    return False
+
+
+def _directory_files(directory: str) -> List[os.DirEntry]:
+    """Fichiers d'un répertoire, récursivement"""
+    files = []
+    if not os.path.isdir(directory):
+        return files
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                files.extend(_directory_files(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                files.append(entry)
+        except OSError:
+            continue
+    return files
+
+
+def scratch_usage() -> Dict[str, int]:
+    """
+    Espace disque occupé par les tâches et le cache
+
+    Returns:
+        Dict[str, int]: Octets par catégorie ('jobs', 'cache', 'total')
+    """
+    def total_size(entries):
+        size = 0
+        for entry in entries:
+            try:
+                size += entry.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    jobs = sum(total_size(_directory_files(root)) for root in _roots())
+    cache = total_size(_directory_files(CACHE_SETTINGS['dir']))
+    return {'jobs': jobs, 'cache': cache, 'total': jobs + cache}
+
+
+def enforce_budget() -> int:
+    """
+    Applique le budget disque en supprimant les entrées du cache les moins récemment utilisées
+
+    Les fichiers des tâches en cours ne sont jamais supprimés : seul le cache
+    (ressources préparées, recalculables) est évincé.
+
+    Returns:
+        int: Octets libérés
+    """
+    budget = SCRATCH_SETTINGS['budget_mb'] * 1024 * 1024
+    usage = scratch_usage()
+    excess = usage['total'] - budget
+    if excess <= 0:
+        return 0
+
+    entries = []
+    for entry in _directory_files(CACHE_SETTINGS['dir']):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    freed = 0
+    for _, size, path in sorted(entries):
+        if freed >= excess:
+            break
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            continue
+
+    if freed < excess and time.time() - _state['last_budget_warning'] > 60:
+        _state['last_budget_warning'] = time.time()
+        st.warning(f"⚠️ Espace de travail au-delà du budget: "
+                   f"{(usage['total'] - freed) / 1024 / 1024:.0f} MB / {SCRATCH_SETTINGS['budget_mb']} MB")
+    return freed
+
+
+def maybe_enforce_budget() -> int:
+    """
+    Applique le budget disque si le dernier parcours date de plus de
+    SCRATCH_SETTINGS['budget_check_seconds'] (appelé à chaque chemin temporaire)
+
+    Returns:
+        int: Octets libérés (0 si le parcours n'a pas eu lieu)
+    """
+    now = time.monotonic()
+    if now - _state['last_budget_check'] < SCRATCH_SETTINGS['budget_check_seconds']:
+        return 0
+    if not _budget_lock.acquire(blocking=False):
+        return 0  # Parcours déjà en cours dans un autre thread
+    try:
+        _state['last_budget_check'] = now
+        return enforce_budget()
+    finally:
+        _budget_lock.release()
+
+
+@atexit.register
+def _cleanup_jobs():
+    """Supprime les tâches de ce processus à son arrêt"""
+    for job_dir in list(_jobs):
+        end_job(job_dir)
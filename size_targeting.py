@@ -0,0 +1,215 @@
+"""
+Module d'encodage à taille cible
+================================
+Choisit le CRF de l'encodage final pour que la vidéo tienne dans un budget
+de taille (limite d'upload d'une plateforme) sans encodage en deux passes :
+
+1. quelques extraits du montage (TARGET_SIZE_SETTINGS['samples'] extraits
+   centrés sur des instants répartis sur la timeline, logo compris) sont
+   encodés à quelques CRF ;
+2. un modèle log(débit) = a + b × CRF est ajusté sur ces mesures ;
+3. le CRF retenu est le plus bas dont le débit prévu tient le budget vidéo
+   (budget total moins l'audio), et la vidéo finale est encodée une fois.
+
+Un montage statique obtient ainsi une meilleure qualité que le débit fixe
+du profil, un montage très animé reste sous la limite.
+
+Fonctions principales :
+- fit_size_model : Ajuste le modèle débit = f(CRF)
+- choose_crf : Choisit le CRF d'un plan de composition pour un budget
+- report_target_size : Compare la taille obtenue au budget
+"""
+import os
+import math
+import time
+import numpy as np
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from constants import TARGET_SIZE_SETTINGS, COMPOSITION_SETTINGS
+from ffmpeg_utils import final_encoding_args, run_ffmpeg
+from ffmpeg_composer import build_composition_command
+from video_probe import probe_video
+from encode_progress import emit_metrics
+from scratch_space import scratch_path
+
+
+def fit_size_model(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """
+    Ajuste log(débit) = a + b × CRF (le débit x264 décroît exponentiellement avec le CRF)
+
+    Args:
+        points: Mesures (crf, débit en kb/s)
+
+    Returns:
+        Tuple[float, float]: (a, b)
+    """
+    crfs = np.array([crf for crf, _ in points], dtype=float)
+    rates = np.log(np.array([rate for _, rate in points], dtype=float))
+    b, a = np.polyfit(crfs, rates, 1)
+    return float(a), float(b)
+
+
+def _sample_plans(plan: Dict) -> List[Dict]:
+    """Extraits du montage : centrés sur des instants répartis régulièrement sur la timeline"""
+    timeline = min(plan['main_duration'], sum(plan['durations']))
+    count = TARGET_SIZE_SETTINGS['samples']
+    if count <= 0 or timeline <= 0:
+        return []
+
+    samples = []
+    for i in range(count):
+        # Clip qui contient le centre du i-ème intervalle de la timeline
+        center = (i + 0.5) * timeline / count
+        idx, clip_start = 0, 0.0
+        while idx < len(plan['durations']) - 1 and clip_start + plan['durations'][idx] <= center:
+            clip_start += plan['durations'][idx]
+            idx += 1
+        duration = plan['durations'][idx]
+        length = min(TARGET_SIZE_SETTINGS['sample_seconds'], duration)
+        # Extrait centré sur l'instant, sans sortir du clip
+        offset = round(min(max(center - clip_start - length / 2, 0.0), duration - length), 3)
+        if any(sample['inputs'][0] == plan['inputs'][idx] and sample['offsets'][0] == offset
+               for sample in samples):
+            continue
+        samples.append({
+            'inputs': [plan['inputs'][idx]],
+            'durations': [duration - offset],
+            'offsets': [offset],
+            'main_duration': length,
+            'audio_duration': None
+        })
+    return samples
+
+
+def _encode_sample(
+    sample: Dict,
+    crf: float,
+    output_path: str,
+    logo_config: Optional[Dict]
+) -> Optional[Tuple[int, float]]:
+    """Encode un extrait au CRF donné (octets, durée) ; None si échec"""
+    try:
+        cmd = build_composition_command(
+            sample, output_path, logo_config, encoding_args=final_encoding_args(crf=crf)
+        )
+        success, _ = run_ffmpeg(cmd)
+        if not success or not os.path.exists(output_path):
+            return None
+        return os.path.getsize(output_path), sample['main_duration']
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+
+def _kbps(bitrate: str) -> float:
+    """Débit '128k' → 128.0 kb/s"""
+    bitrate = bitrate.lower()
+    return float(bitrate[:-1]) if bitrate.endswith('k') else float(bitrate) / 1000
+
+
+def choose_crf(
+    plan: Dict,
+    max_size_mb: float,
+    logo_config: Optional[Dict] = None,
+    has_audio: bool = False,
+    tagline_path: Optional[str] = None
+) -> Optional[float]:
+    """
+    Choisit le CRF de l'encodage final pour tenir un budget de taille
+
+    Args:
+        plan: Plan issu de plan_composition
+        max_size_mb: Taille maximale de la vidéo finale (Mo)
+        logo_config: Configuration du logo (présent dans les extraits)
+        has_audio: La vidéo finale a une piste audio
+        tagline_path: Tagline ajoutée à la fin (comptée dans le budget)
+
+    Returns:
+        float: CRF à utiliser, ou None (mesure impossible : débit du profil)
+    """
+    tagline_info = probe_video(tagline_path) if tagline_path and os.path.exists(tagline_path) else None
+    video_duration = plan['main_duration'] + (tagline_info['duration'] if tagline_info else 0.0)
+    if video_duration <= 0:
+        return None
+
+    # Budget vidéo : budget total (avec marge) moins la piste audio AAC
+    budget_kbits = max_size_mb * 1024 * 1024 * 8 / 1000 * TARGET_SIZE_SETTINGS['margin']
+    audio_kbits = _kbps(COMPOSITION_SETTINGS['audio_bitrate']) * video_duration if has_audio else 0.0
+    target_kbps = (budget_kbits - audio_kbits) / video_duration
+    if target_kbps <= 0:
+        st.warning(f"⚠️ Budget de {max_size_mb:.0f} Mo insuffisant pour la piste audio seule")
+        return None
+
+    samples = _sample_plans(plan)
+    crf_values = TARGET_SIZE_SETTINGS['crf_values']
+    st.info(f"📦 Taille cible {max_size_mb:.0f} Mo: encodage de {len(samples)} extrait(s) "
+            f"à CRF {', '.join(str(crf) for crf in crf_values)}")
+    start = time.perf_counter()
+
+    # Extraits indépendants : quelques encodages simultanés au plus (x264 est
+    # déjà multithread) ; les chemins sont pris dans le thread de la session,
+    # propriétaire de la tâche
+    jobs = [(sample, crf, scratch_path(f"size_sample_crf{crf:g}", '.mp4'))
+            for crf in crf_values for sample in samples]
+    with ThreadPoolExecutor(max_workers=max(1, TARGET_SIZE_SETTINGS['workers'])) as executor:
+        encoded = list(executor.map(lambda job: _encode_sample(*job, logo_config), jobs))
+
+    points = []
+    for crf in crf_values:
+        measures = [result for (_, job_crf, _), result in zip(jobs, encoded) if job_crf == crf and result]
+        duration = sum(seconds for _, seconds in measures)
+        if duration > 0:
+            points.append((crf, sum(size for size, _ in measures) * 8 / 1000 / duration))
+    if len(points) < 2:
+        st.warning("⚠️ Extraits non encodés, débit du profil final conservé")
+        return None
+
+    # CRF le plus bas (meilleure qualité) dont le débit prévu tient le budget
+    a, b = fit_size_model(points)
+    crf_min, crf_max = TARGET_SIZE_SETTINGS['crf_min'], TARGET_SIZE_SETTINGS['crf_max']
+    crf = math.ceil((math.log(target_kbps) - a) / b * 10) / 10 if b < 0 else crf_max
+    crf = min(max(crf, crf_min), crf_max)
+    predicted_kbps = math.exp(a + b * crf)
+    predicted_mb = (predicted_kbps * video_duration + audio_kbits) * 1000 / 8 / 1024 / 1024
+
+    emit_metrics({
+        'stage': 'target_size',
+        'time': time.time(),
+        'max_size_mb': max_size_mb,
+        'target_kbps': round(target_kbps),
+        'points': [[crf_value, round(rate)] for crf_value, rate in points],
+        'crf': crf,
+        'predicted_mb': round(predicted_mb, 2),
+        'elapsed': round(time.perf_counter() - start, 3),
+        'pid': os.getpid()
+    })
+    if predicted_kbps > target_kbps * 1.001:
+        st.warning(f"⚠️ Budget de {max_size_mb:.0f} Mo hors d'atteinte même à CRF {crf_max} "
+                   f"(~{predicted_mb:.1f} Mo prévus)")
+    else:
+        st.info(f"🎯 CRF {crf:g} retenu: ~{predicted_mb:.1f} Mo prévus "
+                f"({predicted_kbps:.0f} kb/s vidéo, mesuré en {time.perf_counter() - start:.1f}s)")
+    return crf
+
+
+def report_target_size(output_path: str, max_size_mb: float, crf: float) -> bool:
+    """
+    Compare la taille de la vidéo finale au budget
+
+    Args:
+        output_path: Vidéo finale
+        max_size_mb: Taille maximale (Mo)
+        crf: CRF utilisé
+
+    Returns:
+        bool: True si la vidéo tient dans le budget
+    """
+    size_mb = os.path.getsize(output_path) / 1024 / 1024
+    emit_metrics({'stage': 'target_size_result', 'time': time.time(), 'max_size_mb': max_size_mb,
+                  'crf': crf, 'size_mb': round(size_mb, 2), 'pid': os.getpid()})
+    if size_mb > max_size_mb:
+        st.warning(f"⚠️ Vidéo de {size_mb:.1f} Mo au-delà de la cible de {max_size_mb:.0f} Mo (CRF {crf:g})")
+        return False
+    st.success(f"📦 {size_mb:.1f} Mo pour une cible de {max_size_mb:.0f} Mo (CRF {crf:g})")
+    return True
@@ -0,0 +1,196 @@
+"""
+Module de préparation de la tagline
+===================================
+La tagline est recadrée, normalisée et encodée une seule fois avec les
+paramètres de la vidéo finale, puis mise en cache par empreinte du contenu.
+Elle est ensuite ajoutée à la vidéo terminée par concaténation en copie de
+flux, sans réencoder le montage.
+
+Fonctions principales :
+- prepare_tagline : Tagline encodée au format de sortie (avec cache)
+- append_tagline : Ajoute la tagline à une vidéo finale par copie de flux
+"""
+import os
+import hashlib
+import streamlit as st
+from typing import Optional
+from constants import VIDEO_FORMAT, COMPOSITION_SETTINGS
+from asset_cache import file_digest, cache_path
+from crop_planner import compute_crop_window
+from ffmpeg_utils import ffmpeg_base_command, final_encoding_args, run_ffmpeg
+from ffmpeg_concat import stream_signature, concat_with_demuxer
+from video_probe import probe_video, probe_audio
+
+
+def prepare_tagline(
+    tagline_path: str,
+    audio_mode: str = 'none',
+    channels: int = 2,
+    crf: Optional[float] = None
+) -> Optional[str]:
+    """
+    Encode la tagline au format de la vidéo finale
+
+    Args:
+        tagline_path: Chemin de la tagline uploadée
+        audio_mode: 'own' (son de la tagline), 'silent' (piste muette) ou 'none'
+        channels: Nombre de canaux de la piste audio
+        crf: CRF de la vidéo finale (taille cible), à reprendre pour la copie de flux
+
+    Returns:
+        str: Chemin de la tagline préparée ou None si échec
+    """
+    digest = file_digest(tagline_path)
+    info = probe_video(tagline_path)
+    if digest is None or info is None:
+        return None
+    if audio_mode == 'own' and not info.get('has_audio'):
+        audio_mode = 'silent'
+
+    sample_rate = COMPOSITION_SETTINGS['audio_sample_rate']
+    settings = '|'.join(final_encoding_args(crf=crf) + [
+        str(VIDEO_FORMAT['width']), str(VIDEO_FORMAT['height']),
+        audio_mode, str(channels), str(sample_rate), COMPOSITION_SETTINGS['audio_bitrate']
+    ])
+    key = f"{digest}_{hashlib.sha256(settings.encode()).hexdigest()[:16]}"
+    output_path = cache_path('tagline', key, '.mp4')
+    if os.path.exists(output_path):
+        st.info("🏷️ Tagline déjà préparée (cache)")
+        return output_path
+
+    width, height, fps = VIDEO_FORMAT['width'], VIDEO_FORMAT['height'], VIDEO_FORMAT['fps']
+    crop = compute_crop_window(info['width'], info['height'])
+    layout = 'mono' if channels == 1 else 'stereo'
+    duration = info['duration']
+
+    cmd = ffmpeg_base_command() + ['-i', tagline_path]
+    filters = [
+        f"[0:v]crop={crop['width']}:{crop['height']}:{crop['x']}:{crop['y']},"
+        f"scale={width}:{height},setsar=1,fps={fps},format=yuv420p,setpts=PTS-STARTPTS[v]"
+    ]
+    audio_map = []
+    if audio_mode == 'own':
+        filters.append(
+            f"[0:a]aresample={sample_rate},aformat=channel_layouts={layout},"
+            f"asetpts=PTS-STARTPTS,apad[a]"
+        )
+        audio_map = ['-map', '[a]']
+    elif audio_mode == 'silent':
+        cmd += ['-f', 'lavfi', '-i', f"anullsrc=r={sample_rate}:cl={layout}"]
+        audio_map = ['-map', '1:a']
+
+    cmd += ['-filter_complex', ';'.join(filters), '-map', '[v]'] + audio_map
+    if audio_map:
+        cmd += ['-c:a', 'aac', '-b:a', COMPOSITION_SETTINGS['audio_bitrate'], '-ar', str(sample_rate)]
+    else:
+        cmd += ['-an']
+
+    # Écriture atomique : une exécution concurrente ne lit jamais un fichier partiel
+    tmp_path = f"{output_path}.{os.getpid()}.tmp.mp4"
+    cmd += final_encoding_args(crf=crf) + ['-t', f"{duration:.3f}", tmp_path]
+    success, stderr = run_ffmpeg(cmd)
+    if not success or not os.path.exists(tmp_path):
+        st.warning(f"⚠️ Préparation de la tagline échouée: {stderr.strip()[-300:]}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    os.replace(tmp_path, output_path)
+    st.success(f"🏷️ Tagline préparée: {duration:.1f}s")
+    return output_path
+
+
+def _audio_signature(path: str) -> Optional[tuple]:
+    """Paramètres de la piste audio qui doivent correspondre pour concaténer"""
+    info = probe_audio(path)
+    return (info['codec'], info['sample_rate'], info['channels']) if info else None
+
+
+def _add_silent_track(video_path: str, output_path: str, channels: int = 2) -> bool:
+    """Ajoute une piste audio muette à une vidéo (vidéo copiée)"""
+    sample_rate = COMPOSITION_SETTINGS['audio_sample_rate']
+    layout = 'mono' if channels == 1 else 'stereo'
+    info = probe_video(video_path)
+    if not info:
+        return False
+    cmd = ffmpeg_base_command() + [
+        '-i', video_path,
+        '-f', 'lavfi', '-i', f"anullsrc=r={sample_rate}:cl={layout}",
+        '-map', '0:v:0', '-map', '1:a',
+        '-c:v', 'copy',
+        '-c:a', 'aac', '-b:a', COMPOSITION_SETTINGS['audio_bitrate'], '-ar', str(sample_rate),
+        '-t', f"{info['duration']:.3f}",
+        '-movflags', '+faststart',
+        output_path
+    ]
+    success, _ = run_ffmpeg(cmd)
+    return success and os.path.exists(output_path)
+
+
+def append_tagline(
+    video_path: str,
+    tagline_path: str,
+    output_path: str,
+    keep_tagline_audio: bool = True,
+    crf: Optional[float] = None
+) -> bool:
+    """
+    Ajoute la tagline préparée à la fin d'une vidéo finale, sans réencodage
+
+    Args:
+        video_path: Vidéo finale sans tagline (encodée avec final_encoding_args)
+        tagline_path: Chemin de la tagline uploadée
+        output_path: Vidéo finale avec tagline
+        keep_tagline_audio: Garder le son de la tagline (sinon silence)
+        crf: CRF de la vidéo finale si elle a été encodée à taille cible
+
+    Returns:
+        bool: True si la tagline a été ajoutée par copie de flux
+    """
+    tagline_info = probe_video(tagline_path)
+    main_info = probe_video(video_path)
+    if not tagline_info or not main_info:
+        return False
+
+    work_dir = os.path.dirname(os.path.abspath(output_path))
+    created = []
+    try:
+        main_audio = probe_audio(video_path)
+        wants_own_audio = keep_tagline_audio and tagline_info.get('has_audio')
+
+        if main_audio:
+            channels = main_audio['channels']
+            audio_mode = 'own' if wants_own_audio else 'silent'
+        elif wants_own_audio:
+            # Piste muette sous le montage pour garder le son de la tagline
+            channels = 2
+            audio_mode = 'own'
+            with_silence = os.path.join(work_dir, f"main_silent_{os.getpid()}.mp4")
+            if not _add_silent_track(video_path, with_silence, channels):
+                return False
+            created.append(with_silence)
+            video_path = with_silence
+        else:
+            channels = 2
+            audio_mode = 'none'
+
+        prepared = prepare_tagline(tagline_path, audio_mode, channels, crf)
+        if prepared is None:
+            return False
+
+        if stream_signature(probe_video(video_path)) != stream_signature(probe_video(prepared)):
+            st.info("ℹ️ Paramètres de la tagline différents de la vidéo, copie de flux impossible")
+            return False
+        if _audio_signature(video_path) != _audio_signature(prepared):
+            st.info("ℹ️ Pistes audio incompatibles, copie de flux impossible")
+            return False
+
+        if not concat_with_demuxer([video_path, prepared], output_path, work_dir):
+            return False
+
+        st.success(f"✅ Tagline ajoutée par copie de flux ({tagline_info['duration']:.1f}s)")
+        return True
+    finally:
+        for path in created:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,5 @@
+"""Configuration pytest : modules de l'application importables depuis tests/"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+"""Tests du pool de lecteurs partagé entre les montages"""
+import clip_readers
+import video_assembler
+
+
+class FakeReader:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_job_end_closes_only_its_own_readers(monkeypatch):
+    mine, other = FakeReader(), FakeReader()
+    readers = type(clip_readers._readers)()
+    readers['/job_a/clip_1.mp4'] = {'clip': mine, 'users': 1}
+    readers['/job_b/clip_1.mp4'] = {'clip': other, 'users': 1}
+    monkeypatch.setattr(clip_readers, '_readers', readers)
+
+    clips = [{'path': '/job_a/clip_1.mp4'}, {'path': '/job_a/clip_1.mp4'}, {'path': '/job_a/clip_2.mp4'}]
+    video_assembler._close_clip_readers(clips)
+
+    # Le lecteur emprunté par l'autre montage (repli MoviePy) reste ouvert
+    assert mine.closed and not other.closed
+    assert list(clip_readers._readers) == ['/job_b/clip_1.mp4']
@@ -0,0 +1,71 @@
+"""Tests de la liste de décisions de montage (EDL)"""
+import json
+import numpy as np
+from edit_decision_list import (
+    build_edl, render_key, edl_segments, edl_digest, diff_edl, save_edl, load_edl
+)
+
+CROP = {'x': 420, 'y': 0, 'width': 1080, 'height': 1920}
+
+
+def _segment(source, start, end, render_id, **extra):
+    return dict({'source_path': source, 'start': start, 'end': end, 'crop': dict(CROP),
+                 'render_id': render_id, 'score': np.float64(12.5)}, **extra)
+
+
+def _edl(tmp_path, segments=None, **settings):
+    source = tmp_path / 'source.mp4'
+    source.write_bytes(b'video')
+    segments = segments or [
+        _segment(str(source), 1.0, 4.0, 0),
+        _segment(str(source), 6.0, 8.5, 1),
+        _segment(str(source), 1.0, 4.0, 0, repeat=True),
+    ]
+    return build_edl(segments, output_duration=8.5, **settings)
+
+
+def test_render_key_identifies_the_same_render():
+    a = _segment('a.mp4', 1.0, 4.0, 0)
+    assert render_key(a) == render_key(dict(a, render_id=7, repeat=True, score=1))
+    assert render_key(a) == render_key(dict(a, start=1.0001))  # arrondi à la milliseconde
+
+
+def test_render_key_changes_with_what_is_rendered():
+    a = _segment('a.mp4', 1.0, 4.0, 0)
+    assert render_key(a) != render_key(dict(a, end=4.5))
+    assert render_key(a) != render_key(dict(a, crop=dict(CROP, x=0)))
+    assert render_key(a) != render_key(dict(a, text_removal='inpaint'))
+    assert render_key(a) != render_key(a, use_lanczos=True)
+
+
+def test_edl_round_trips_through_json(tmp_path):
+    edl = _edl(tmp_path, max_size_mb=50)
+    path = save_edl(edl, str(tmp_path / 'plan.json'))
+    loaded = load_edl(path)
+    assert loaded == json.loads(json.dumps(edl))
+    assert loaded['max_size_mb'] == 50
+    assert edl_digest(loaded) == edl_digest(dict(edl, created='plus tard'))
+
+
+def test_edl_segments_keep_order_and_shared_render_ids(tmp_path):
+    segments = edl_segments(_edl(tmp_path))
+    assert [seg['order'] for seg in segments] == [0, 1, 2]
+    assert [seg['render_id'] for seg in segments] == [0, 1, 0]
+    assert render_key(segments[0]) == render_key(segments[2])
+
+
+def test_diff_reports_clip_and_setting_changes(tmp_path):
+    old = _edl(tmp_path)
+    new = json.loads(json.dumps(old))
+    new['clips'][1]['end'] = 9.0
+    new['use_lanczos'] = True
+    changes = diff_edl(old, new)
+    assert any(change.startswith('use_lanczos') for change in changes)
+    assert any(change.startswith('clip 2 modifié (end)') for change in changes)
+    assert diff_edl(old, old) == []
+
+
+def test_load_rejects_missing_sources(tmp_path):
+    edl = _edl(tmp_path)
+    edl['clips'][0]['source_path'] = str(tmp_path / 'absent.mp4')
+    assert load_edl(json.dumps(edl)) is None
@@ -0,0 +1,44 @@
+"""Tests du plan de composition (durées lues par ffprobe remplacées par des valeurs fixes)"""
+import pytest
+import ffmpeg_composer
+from ffmpeg_composer import plan_composition
+
+DURATIONS = {'a.mp4': 3.0, 'b.mp4': 2.0, 'c.mp4': 4.0, 'song.m4a': 20.0}
+
+
+@pytest.fixture(autouse=True)
+def fixed_probe(monkeypatch):
+    probe = lambda path: {'duration': DURATIONS[path]} if path in DURATIONS else None
+    monkeypatch.setattr(ffmpeg_composer, 'probe_video', probe)
+    monkeypatch.setattr(ffmpeg_composer, 'probe_audio', probe)
+
+
+def test_trims_to_output_duration_and_drops_unused_clips():
+    plan = plan_composition(['a.mp4', 'b.mp4', 'c.mp4'], output_duration=4.0)
+    assert plan['inputs'] == ['a.mp4', 'b.mp4']
+    assert plan['main_duration'] == pytest.approx(4.0)
+
+
+def test_short_timeline_is_not_looped():
+    plan = plan_composition(['a.mp4', 'b.mp4'], output_duration=30.0)
+    assert plan['inputs'] == ['a.mp4', 'b.mp4']
+    assert plan['main_duration'] == pytest.approx(5.0)
+
+
+def test_audio_driven_target_uses_planned_clips_only():
+    audio = {'audio_path': 'song.m4a', 'adapt_to_audio': True}
+    plan = plan_composition(['a.mp4', 'b.mp4', 'c.mp4'], audio_config=audio)
+    assert plan['inputs'] == ['a.mp4', 'b.mp4', 'c.mp4']
+    assert plan['main_duration'] == pytest.approx(9.0)
+    assert plan['audio_duration'] == pytest.approx(20.0)
+
+
+def test_repeated_references_are_kept_in_order():
+    audio = {'audio_path': 'song.m4a', 'adapt_to_audio': True, 'extra_seconds': -12}
+    plan = plan_composition(['a.mp4', 'b.mp4', 'a.mp4', 'b.mp4'], audio_config=audio)
+    assert plan['inputs'] == ['a.mp4', 'b.mp4', 'a.mp4']
+    assert plan['main_duration'] == pytest.approx(8.0)
+
+
+def test_unreadable_clips_are_skipped():
+    assert plan_composition(['missing.mp4']) is None
@@ -0,0 +1,40 @@
+"""Tests du calage des bornes de copie de flux sur les images clés"""
+import pytest
+from ffmpeg_extractor import snap_to_keyframes
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def test_bounds_on_keyframes_are_kept():
+    assert snap_to_keyframes(2.0, 6.0, KEYFRAMES, 10.0, tolerance=0.25) == (2.0, 6.0)
+
+
+def test_bounds_only_move_outward():
+    start, end = snap_to_keyframes(2.2, 5.8, KEYFRAMES, 10.0, tolerance=0.25)
+    assert (start, end) == (2.0, 6.0)
+    assert start <= 2.2 and end >= 5.8
+
+
+@pytest.mark.parametrize('start, end', [
+    (1.8, 6.0),   # image clé la plus proche après le début : non retenue
+    (2.0, 6.2),   # image clé la plus proche avant la fin : non retenue
+    (2.5, 6.0),   # image clé extérieure hors tolérance
+])
+def test_no_inward_or_distant_snap(start, end):
+    assert snap_to_keyframes(start, end, KEYFRAMES, 10.0, tolerance=0.25) is None
+
+
+def test_end_near_eof_snaps_to_duration():
+    assert snap_to_keyframes(8.0, 9.9, KEYFRAMES, 10.0, tolerance=0.25) == (8.0, 10.0)
+
+
+def test_keyframe_within_epsilon_counts_as_bound():
+    assert snap_to_keyframes(2.0004, 5.9996, KEYFRAMES, 10.0, tolerance=0.25) == (2.0, 6.0)
+
+
+def test_default_tolerance_is_under_half_a_second():
+    assert snap_to_keyframes(2.5, 6.0, KEYFRAMES, 10.0) is None
+
+
+def test_no_keyframes():
+    assert snap_to_keyframes(2.0, 6.0, [], 10.0) is None
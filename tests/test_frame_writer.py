@@ -0,0 +1,61 @@
+"""Tests de l'écriture directe des frames vers ffmpeg"""
+import time
+import shutil
+import numpy as np
+import pytest
+from constants import FFMPEG_BINARIES
+from frame_writer import open_frame_writer, write_frame, close_frame_writer
+
+pytestmark = pytest.mark.skipif(shutil.which(FFMPEG_BINARIES['ffmpeg']) is None, reason="ffmpeg requis")
+
+RAW_ARGS = ['-c:v', 'rawvideo', '-pix_fmt', 'rgb24', '-f', 'rawvideo']
+
+
+def test_frames_are_written_unchanged(tmp_path):
+    path = str(tmp_path / 'out.rgb')
+    frames = [np.full((4, 6, 3), i * 40, dtype=np.uint8) for i in range(3)]
+    writer = open_frame_writer(path, (6, 4), 30, RAW_ARGS)
+    for frame in frames:
+        write_frame(writer, frame)
+    result = close_frame_writer(writer)
+
+    assert result['success'] and result['frames'] == 3 and result['bytes'] == 3 * 72
+    assert result['stalls'] >= 0 and result['stall_time'] >= 0.0
+    assert open(path, 'rb').read() == b''.join(frame.tobytes() for frame in frames)
+
+
+def test_non_contiguous_and_float_frames_are_converted(tmp_path):
+    path = str(tmp_path / 'out.rgb')
+    base = np.arange(4 * 12 * 3, dtype=np.uint8).reshape(4, 12, 3)
+    writer = open_frame_writer(path, (6, 4), 30, RAW_ARGS)
+    write_frame(writer, base[:, ::2])
+    write_frame(writer, np.full((4, 6, 3), 200.0))
+    assert close_frame_writer(writer)['success']
+
+    data = open(path, 'rb').read()
+    assert data[:72] == np.ascontiguousarray(base[:, ::2]).tobytes()
+    assert data[72:] == bytes([200]) * 72
+
+
+def test_wrong_frame_size_is_rejected(tmp_path):
+    writer = open_frame_writer(str(tmp_path / 'out.rgb'), (6, 4), 30, RAW_ARGS)
+    with pytest.raises(ValueError):
+        write_frame(writer, np.zeros((6, 4, 3), dtype=np.uint8))
+    close_frame_writer(writer)
+
+
+def test_slow_writes_are_counted_as_stalls(tmp_path, monkeypatch):
+    import frame_writer
+
+    def slow_write(stream, data):
+        time.sleep(0.03)
+        stream.write(data)
+
+    monkeypatch.setattr(frame_writer, '_write_all', slow_write)
+    writer = open_frame_writer(str(tmp_path / 'out.rgb'), (6, 4), 60, RAW_ARGS)
+    for _ in range(2):
+        write_frame(writer, np.zeros((4, 6, 3), dtype=np.uint8))
+    result = close_frame_writer(writer)
+
+    # Écritures plus longues qu'un intervalle de frame (1/60 s)
+    assert result['stalls'] == 2 and result['stall_time'] >= 0.06
@@ -0,0 +1,51 @@
+"""Tests du pipeline import → analyse → rendu anticipé"""
+import pytest
+import pipeline
+from pipeline import run_pipeline
+
+
+@pytest.fixture(autouse=True)
+def fake_ingest(monkeypatch):
+    monkeypatch.setattr(pipeline, 'process_uploaded_video',
+                        lambda uploaded_file, idx, job_dir: {'path': uploaded_file, 'title': uploaded_file})
+
+
+def _analyze(idx, video_info):
+    return [
+        {'source_path': video_info['path'], 'start': 0.0, 'end': 3.0,
+         'crop': {'x': 0, 'y': 0, 'width': 1080, 'height': 1920}},
+        {'source_path': video_info['path'], 'start': 5.0, 'end': 8.0,
+         'crop': {'x': 0, 'y': 0, 'width': 1080, 'height': 1920}},
+        {'source_path': video_info['path'], 'start': 10.0, 'end': 13.0, 'reserve': True,
+         'crop': {'x': 0, 'y': 0, 'width': 1080, 'height': 1920}},
+    ]
+
+
+def _run(tmp_path, budget):
+    rendered = []
+
+    def render(segment):
+        rendered.append((segment['source_path'], segment['start']))
+        return {'path': f"{segment['source_path']}_{segment['start']}.mp4"}
+
+    files, segments, prerendered = run_pipeline(
+        ['a.mp4', 'b.mp4'], str(tmp_path), _analyze, render=render, render_budget=budget
+    )
+    return files, segments, prerendered, rendered
+
+
+def test_prerender_stops_at_target_duration(tmp_path):
+    files, segments, prerendered, rendered = _run(tmp_path, budget=7.0)
+    assert len(files) == 2 and len(segments[1]) == 3
+    assert rendered == [('a.mp4', 0.0), ('a.mp4', 5.0)]
+    assert len(prerendered) == 2
+
+
+def test_segment_that_would_be_shortened_is_not_prerendered(tmp_path):
+    _, _, _, rendered = _run(tmp_path, budget=4.5)
+    assert rendered == [('a.mp4', 0.0)]
+
+
+def test_without_target_every_primary_segment_is_prerendered(tmp_path):
+    _, _, _, rendered = _run(tmp_path, budget=None)
+    assert rendered == [('a.mp4', 0.0), ('a.mp4', 5.0), ('b.mp4', 0.0), ('b.mp4', 5.0)]
@@ -0,0 +1,100 @@
+"""Tests du rendu des clips : ordre des résultats, reprise séquentielle, modèle de texte"""
+import time
+import threading
+import pytest
+import render_pool
+import text_detector
+import video_extractor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from constants import RENDER_POOL_SETTINGS
+from render_pool import render_segments
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Rendu factice : enregistre (segment, thread, modèle de texte, tâche courante)"""
+    calls = []
+
+    def fake_render(segment, output_dir, use_lanczos, remove_text_method, text_net):
+        from scratch_space import _local
+        time.sleep(segment.get('delay', 0))
+        if segment.get('fail_in_worker') and threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("mémoire insuffisante")
+        calls.append({'order': segment['order'], 'main': threading.current_thread() is threading.main_thread(),
+                      'text_net': text_net, 'job': getattr(_local, 'job_dir', None)})
+        return {'path': f"{output_dir}/clip_{segment['order']}.mp4"}
+
+    monkeypatch.setattr(video_extractor, 'render_segment', fake_render)
+    monkeypatch.setattr(text_detector, 'load_text_detection_model', lambda path: f"net:{path}")
+    monkeypatch.setitem(render_pool._worker_state, 'text_nets', {})
+    return calls
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """Pool de threads à la place des processus de rendu (même interface)"""
+    monkeypatch.setitem(RENDER_POOL_SETTINGS, 'workers', 3)
+    executor = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(render_pool, '_get_pool', lambda: executor)
+    yield executor
+    executor.shutdown()
+
+
+def test_results_follow_segment_order(calls, thread_pool):
+    segments = [{'order': idx, 'delay': 0.05 * (3 - idx)} for idx in range(4)]
+    results = render_segments(segments, '/job')
+
+    assert [result['path'] for result in results] == [f"/job/clip_{idx}.mp4" for idx in range(4)]
+    assert all(not call['main'] for call in calls)
+    # La tâche du clip est celle de l'appelant, posée par clip dans le processus de rendu
+    assert {call['job'] for call in calls} == {'/job'}
+
+
+def test_text_removal_is_parallel_with_model_file(calls, thread_pool):
+    segments = [{'order': idx, 'text_removal': 'blur'} for idx in range(3)]
+    render_segments(segments, '/job', text_net='in-process', text_model_path='/m.pb')
+
+    assert all(not call['main'] for call in calls)
+    assert {call['text_net'] for call in calls} == {'net:/m.pb'}
+
+
+def test_failed_clip_is_retried_here_with_text_model(calls, thread_pool):
+    segments = [{'order': 0, 'text_removal': 'blur'},
+                {'order': 1, 'text_removal': 'blur', 'fail_in_worker': True}]
+    results = render_segments(segments, '/job', text_model_path='/m.pb')
+
+    assert all(result is not None for result in results)
+    retried = [call for call in calls if call['main']]
+    assert [call['order'] for call in retried] == [1]
+    # Modèle chargé dans le processus principal : la suppression du texte n'est pas perdue
+    assert retried[0]['text_net'] == 'net:/m.pb'
+
+
+def test_broken_pool_falls_back_to_serial(calls, monkeypatch):
+    monkeypatch.setitem(RENDER_POOL_SETTINGS, 'workers', 2)
+
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("processus tué")
+
+        def shutdown(self, wait=True):
+            pass
+
+    monkeypatch.setattr(render_pool, '_get_pool', lambda: BrokenPool())
+    results = render_segments([{'order': 0}, {'order': 1}], '/job')
+
+    assert [result['path'] for result in results] == ['/job/clip_0.mp4', '/job/clip_1.mp4']
+    assert all(call['main'] for call in calls)
+
+
+def test_single_worker_renders_serially_with_model_loaded_once(calls, monkeypatch):
+    monkeypatch.setitem(RENDER_POOL_SETTINGS, 'workers', 1)
+    loads = []
+    monkeypatch.setattr(text_detector, 'load_text_detection_model', lambda path: loads.append(path) or 'net')
+    segments = [{'order': 0, 'text_removal': 'blur'}, {'order': 1}, {'order': 2, 'text_removal': 'blur'}]
+    render_segments(segments, '/job', text_model_path='/m.pb')
+
+    assert [call['order'] for call in calls] == [0, 1, 2] and all(call['main'] for call in calls)
+    assert loads == ['/m.pb']
+    assert [call['text_net'] for call in calls] == ['net', None, 'net']
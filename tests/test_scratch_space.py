@@ -0,0 +1,78 @@
+"""Tests de l'espace de travail : budget disque et éviction du cache"""
+import os
+import pytest
+import scratch_space
+from constants import SCRATCH_SETTINGS, CACHE_SETTINGS
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.setitem(SCRATCH_SETTINGS, 'dir', str(tmp_path / 'jobs'))
+    monkeypatch.setitem(SCRATCH_SETTINGS, 'fast_dir', None)
+    monkeypatch.setitem(CACHE_SETTINGS, 'dir', str(tmp_path / 'cache'))
+    monkeypatch.setitem(scratch_space._state, 'orphans_cleaned', True)
+    job_dir = scratch_space.create_job('test')
+    yield job_dir
+    scratch_space.end_job(job_dir)
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+
+
+def test_path_lookups_do_not_walk_the_disk_each_time(scratch, monkeypatch):
+    walks = []
+    monkeypatch.setattr(scratch_space, 'enforce_budget', lambda: walks.append(1) or 0)
+    paths = {scratch_space.scratch_path('clip', '.mp4', job_dir=scratch) for _ in range(50)}
+    assert len(paths) == 50
+    assert all(os.path.dirname(path) == scratch for path in paths)
+    assert walks == []  # create_job vient de parcourir le disque
+
+
+def test_budget_is_checked_again_after_the_interval(scratch, monkeypatch):
+    walks = []
+    monkeypatch.setattr(scratch_space, 'enforce_budget', lambda: walks.append(1) or 0)
+    monkeypatch.setitem(scratch_space._state, 'last_budget_check', 0.0)
+    scratch_space.scratch_path('clip', '.mp4', job_dir=scratch)
+    scratch_space.scratch_path('clip', '.mp4', job_dir=scratch)
+    assert walks == [1]
+
+
+def test_budget_evicts_least_recently_used_cache_entries(scratch, monkeypatch):
+    monkeypatch.setitem(SCRATCH_SETTINGS, 'budget_mb', 1)
+    cache_dir = CACHE_SETTINGS['dir']
+    for idx, name in enumerate(['old', 'recent']):
+        path = os.path.join(cache_dir, 'logo', f"{name}.png")
+        _write(path, 700 * 1024)
+        os.utime(path, (1000 + idx, 1000 + idx))
+    _write(os.path.join(scratch, 'clip.mp4'), 100 * 1024)
+
+    freed = scratch_space.enforce_budget()
+    assert freed == 700 * 1024
+    assert not os.path.exists(os.path.join(cache_dir, 'logo', 'old.png'))
+    assert os.path.exists(os.path.join(cache_dir, 'logo', 'recent.png'))
+    assert os.path.exists(os.path.join(scratch, 'clip.mp4'))  # fichiers des tâches jamais évincés
+
+
+def _owned(path, pid):
+    os.makedirs(path)
+    with open(os.path.join(path, '.owner'), 'w') as f:
+        f.write(str(pid))
+    return path
+
+
+def test_dirs_of_a_previous_run_with_the_same_pid_are_orphans(scratch, tmp_path, monkeypatch):
+    fast_root = tmp_path / 'fast'
+    monkeypatch.setitem(SCRATCH_SETTINGS, 'fast_dir', str(fast_root))
+    jobs_root = SCRATCH_SETTINGS['dir']
+    # Conteneur redémarré : le processus précédent avait le même PID
+    previous = _owned(os.path.join(jobs_root, 'session_old'), os.getpid())
+    previous_fast = _owned(os.path.join(scratch_space._roots()[1], 'session_old'), os.getpid())
+    # Répertoire rapide d'une tâche en cours de ce processus
+    live_fast = _owned(os.path.join(scratch_space._roots()[1], os.path.basename(scratch)), os.getpid())
+
+    assert scratch_space.cleanup_orphans() == 2
+    assert not os.path.exists(previous) and not os.path.exists(previous_fast)
+    assert os.path.isdir(scratch) and os.path.isdir(live_fast)
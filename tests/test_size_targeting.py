@@ -0,0 +1,64 @@
+"""Tests de l'ajustement débit = f(CRF) et du choix des extraits"""
+import math
+import pytest
+from constants import TARGET_SIZE_SETTINGS
+from ffmpeg_composer import build_composition_command
+from size_targeting import fit_size_model, _sample_plans
+
+
+@pytest.fixture(autouse=True)
+def sample_settings(monkeypatch):
+    monkeypatch.setitem(TARGET_SIZE_SETTINGS, 'samples', 3)
+    monkeypatch.setitem(TARGET_SIZE_SETTINGS, 'sample_seconds', 2.0)
+
+
+def test_fit_recovers_exponential_model():
+    points = [(crf, math.exp(9.0 - 0.12 * crf)) for crf in (20, 26, 32)]
+    a, b = fit_size_model(points)
+    assert a == pytest.approx(9.0)
+    assert b == pytest.approx(-0.12)
+
+
+def test_fit_averages_noisy_measures():
+    points = [(20, math.exp(9.0 - 2.4) * 1.05), (26, math.exp(9.0 - 3.12) / 1.05), (32, math.exp(9.0 - 3.84))]
+    a, b = fit_size_model(points)
+    assert b == pytest.approx(-0.12, abs=0.01)
+
+
+def test_samples_spread_across_one_long_clip():
+    plan = {'inputs': ['a.mp4'], 'durations': [30.0], 'main_duration': 30.0, 'audio_duration': None}
+    samples = _sample_plans(plan)
+
+    # Centres à 5, 15 et 25 s : extraits de 2 s dans le clip, pas tous au début
+    assert [sample['offsets'] for sample in samples] == [[4.0], [14.0], [24.0]]
+    assert all(sample['main_duration'] == 2.0 for sample in samples)
+    assert [sample['durations'] for sample in samples] == [[26.0], [16.0], [6.0]]
+
+
+def test_samples_follow_the_timeline_across_clips():
+    plan = {'inputs': ['a.mp4', 'b.mp4', 'c.mp4'], 'durations': [3.0, 3.0, 12.0],
+            'main_duration': 18.0, 'audio_duration': None}
+    samples = _sample_plans(plan)
+
+    # Centres à 3, 9 et 15 s : début de b, puis deux instants de c
+    assert [(sample['inputs'][0], sample['offsets'][0]) for sample in samples] == \
+        [('b.mp4', 0.0), ('c.mp4', 2.0), ('c.mp4', 8.0)]
+
+
+def test_samples_stay_inside_short_clips_and_are_deduplicated():
+    plan = {'inputs': ['a.mp4'], 'durations': [1.5], 'main_duration': 1.5, 'audio_duration': None}
+    samples = _sample_plans(plan)
+    assert len(samples) == 1
+    assert samples[0]['offsets'] == [0.0] and samples[0]['main_duration'] == 1.5
+
+
+def test_samples_ignore_inputs_beyond_the_target():
+    plan = {'inputs': ['a.mp4', 'b.mp4'], 'durations': [6.0, 6.0], 'main_duration': 6.0, 'audio_duration': None}
+    assert {sample['inputs'][0] for sample in _sample_plans(plan)} == {'a.mp4'}
+
+
+def test_sample_offset_seeks_its_input():
+    plan = {'inputs': ['a.mp4'], 'durations': [16.0], 'offsets': [14.0], 'main_duration': 2.0,
+            'audio_duration': None}
+    cmd = build_composition_command(plan, 'out.mp4')
+    assert cmd[cmd.index('-i') - 2:cmd.index('-i') + 2] == ['-ss', '14.000', '-i', 'a.mp4']
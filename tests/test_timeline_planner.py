@@ -0,0 +1,99 @@
+"""Tests de la planification du montage"""
+import os
+import sys
+import subprocess
+import pytest
+from timeline_planner import check_coverage, plan_timeline, count_renders, smart_shuffle_clips
+
+
+def _segment(video, start, end, **extra):
+    return dict({'source_path': f"v{video}.mp4", 'video_index': video, 'start': start, 'end': end}, **extra)
+
+
+def _covered(planned):
+    return sum(seg['end'] - seg['start'] for seg in planned)
+
+
+def test_plan_covers_target_and_drops_unused_segments():
+    segments = [_segment(0, 0, 4), _segment(1, 0, 4), _segment(2, 0, 4)]
+    planned = plan_timeline(segments, target_duration=6.0)
+    assert len(planned) == 2
+    assert _covered(planned) == pytest.approx(6.0)
+    assert planned[-1]['end'] == pytest.approx(2.0)
+    assert segments[1]['end'] == 4  # segments d'origine non modifiés
+
+
+def test_plan_without_target_keeps_every_segment():
+    segments = [_segment(0, 0, 3), _segment(1, 1, 5)]
+    planned = plan_timeline(segments)
+    assert [seg['render_id'] for seg in planned] == [0, 1]
+    assert _covered(planned) == pytest.approx(7.0)
+
+
+def test_plan_uses_reserve_before_repeating():
+    segments = [_segment(0, 0, 3)]
+    reserve = [_segment(0, 10, 13, reserve=True)]
+    planned = plan_timeline(segments, target_duration=5.0, reserve_segments=reserve, loop=True)
+    assert len(planned) == 2 and planned[1].get('reserve')
+    assert not any(seg.get('repeat') for seg in planned)
+    assert _covered(planned) == pytest.approx(5.0)
+
+
+def test_plan_loops_on_references_without_new_renders():
+    segments = [_segment(0, 0, 2), _segment(1, 0, 2)]
+    planned = plan_timeline(segments, target_duration=9.0, loop=True)
+    assert count_renders(planned) == 2
+    assert _covered(planned) >= 9.0
+    assert all(seg.get('repeat') for seg in planned[2:])
+
+
+def test_plan_without_loop_stops_at_available_footage():
+    planned = plan_timeline([_segment(0, 0, 2)], target_duration=9.0)
+    assert _covered(planned) == pytest.approx(2.0)
+
+
+def test_plan_skips_remainders_shorter_than_a_frame():
+    # 1.1 - (0.1 + 0.7 + 0.3) = 2.2e-16 : reste d'arrondi après les trois premiers segments
+    segments = [_segment(0, 0, 0.1), _segment(1, 0, 0.7), _segment(2, 0, 0.3), _segment(3, 0, 4)]
+    planned = plan_timeline(segments, target_duration=1.1)
+    assert len(planned) == 3
+
+    # Reste plus court qu'une frame : pas de segment sans image
+    planned = plan_timeline([_segment(0, 0, 2), _segment(1, 0, 2)], target_duration=2.01)
+    assert len(planned) == 1
+
+
+def test_loop_uses_the_same_frame_rule():
+    planned = plan_timeline([_segment(0, 0, 2)], target_duration=4.01, loop=True)
+    assert len(planned) == 2
+
+
+def test_smart_shuffle_alternates_sources():
+    shuffled = smart_shuffle_clips({0: ['a1', 'a2'], 1: ['b1', 'b2', 'b3']})
+    assert [clip[0] for clip in shuffled] == ['a', 'b', 'a', 'b', 'b']
+
+
+def test_planner_does_not_load_moviepy_assembly():
+    code = ("import sys, timeline_planner; "
+            "timeline_planner.order_segments({0: [{}], 1: [{}]}); "
+            "sys.exit('video_assembler' in sys.modules or 'moviepy.editor' in sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True).returncode == 0
+
+
+def _clip(planned, duration):
+    return {'path': 'clip.mp4', 'planned_duration': planned, 'duration': duration}
+
+
+def test_coverage_reports_outward_extension():
+    clips = [_clip(3.0, 3.2), _clip(2.0, 2.0), _clip(3.0, 3.0)]
+    assert check_coverage(clips) == pytest.approx(0.2)
+
+
+def test_coverage_reports_short_render():
+    assert check_coverage([_clip(3.0, 2.5)]) == pytest.approx(-0.5)
+
+
+def test_coverage_counts_repeated_references():
+    clip = _clip(2.0, 2.1)
+    assert check_coverage([clip, clip]) == pytest.approx(0.2)
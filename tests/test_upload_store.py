@@ -0,0 +1,75 @@
+"""Tests du stockage des uploads par contenu : partage, références des tâches et éviction"""
+import io
+import os
+import pytest
+import upload_store
+from constants import UPLOAD_STORE_SETTINGS
+from upload_store import store_upload, release_job, evict_store, _read_meta
+
+
+class _Upload(io.BytesIO):
+    """Fichier uploadé Streamlit minimal (nom + lecture par blocs)"""
+    def __init__(self, name, content):
+        super().__init__(content)
+        self.name = name
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setitem(UPLOAD_STORE_SETTINGS, 'dir', str(tmp_path / 'store'))
+    monkeypatch.setitem(UPLOAD_STORE_SETTINGS, 'chunk_size', 4)
+    ingests = []
+
+    def ingest(path, output_dir):
+        ingests.append(path)
+        return {'path': path, 'action': 'accept', 'reasons': [], 'info': {'duration': 1.0}}
+
+    monkeypatch.setattr(upload_store, 'ingest_video', ingest)
+    monkeypatch.setattr(upload_store, 'remember_probe', lambda path, info: None)
+    return ingests
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    paths = []
+    for name in ('job_a', 'job_b'):
+        path = tmp_path / name
+        path.mkdir()
+        paths.append(str(path))
+    return paths
+
+
+def test_same_content_is_ingested_once_and_shared(store, jobs):
+    first = store_upload(_Upload('a.mp4', b'same video bytes'), jobs[0])
+    second = store_upload(_Upload('renamed.mov', b'same video bytes'), jobs[1])
+    assert len(store) == 1
+    assert not first['reused'] and second['reused']
+    assert first['path'] == second['path'] and first['digest'] == second['digest']
+    meta = _read_meta(os.path.dirname(first['path']))
+    assert meta['refs'] == sorted(jobs)
+
+
+def test_release_job_drops_only_its_reference(store, jobs):
+    stored = store_upload(_Upload('a.mp4', b'video'), jobs[0])
+    store_upload(_Upload('a.mp4', b'video'), jobs[1])
+    assert release_job(jobs[0]) == 1
+    assert _read_meta(os.path.dirname(stored['path']))['refs'] == [jobs[1]]
+    assert release_job(jobs[0]) == 0
+
+
+def test_eviction_keeps_referenced_objects(store, jobs, monkeypatch):
+    kept = store_upload(_Upload('kept.mp4', b'k' * 2048), jobs[0])
+    dropped = store_upload(_Upload('dropped.mp4', b'd' * 2048), jobs[1])
+    release_job(jobs[1])
+    monkeypatch.setitem(UPLOAD_STORE_SETTINGS, 'budget_mb', 0)
+    assert evict_store() == 1
+    assert os.path.exists(kept['path'])
+    assert not os.path.exists(dropped['path'])
+
+
+def test_references_of_vanished_jobs_are_ignored(store, jobs, monkeypatch):
+    stored = store_upload(_Upload('a.mp4', b'video'), jobs[0])
+    os.rmdir(jobs[0])  # tâche disparue sans release_job (plantage)
+    monkeypatch.setitem(UPLOAD_STORE_SETTINGS, 'budget_mb', 0)
+    assert evict_store() == 1
+    assert not os.path.exists(stored['path'])
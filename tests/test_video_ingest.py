@@ -0,0 +1,69 @@
+"""Tests des décisions d'import (accept, remux, transcode) à partir des métadonnées ffprobe"""
+import pytest
+import video_ingest
+from video_ingest import plan_ingest, is_variable_frame_rate, build_ingest_command
+
+H264_MP4 = {'codec': 'h264', 'pix_fmt': 'yuv420p', 'fps': 30.0, 'r_fps': 30.0,
+            'format_name': 'mov,mp4,m4a,3gp,3g2,mj2', 'has_audio': True}
+
+
+@pytest.fixture
+def probed(monkeypatch):
+    """Remplace ffprobe : probed(info, issues, audio_codec) fixe les métadonnées lues"""
+    def configure(info, issues=(), audio_codec='aac'):
+        monkeypatch.setattr(video_ingest, 'validate_video',
+                            lambda path: {'info': info, 'issues': list(issues)})
+        monkeypatch.setattr(video_ingest, 'probe_audio',
+                            lambda path: {'codec': audio_codec} if audio_codec else None)
+    return configure
+
+
+def test_conforming_mp4_is_accepted(probed):
+    probed(H264_MP4)
+    assert plan_ingest('clip.mp4')['action'] == 'accept'
+
+
+def test_other_container_is_remuxed(probed):
+    probed(dict(H264_MP4, format_name='matroska,webm'))
+    decision = plan_ingest('clip.mkv')
+    assert decision['action'] == 'remux'
+    assert decision['copy_audio']
+
+
+def test_audio_not_allowed_in_mp4_is_remuxed_with_audio_reencoded(probed):
+    probed(H264_MP4, audio_codec='opus')
+    decision = plan_ingest('clip.mp4')
+    assert decision['action'] == 'remux' and not decision['copy_audio']
+    cmd = build_ingest_command('clip.mp4', 'out.mp4', decision)
+    assert cmd[cmd.index('-c:v') + 1] == 'copy'
+    assert cmd[cmd.index('-c:a') + 1] == 'aac'
+
+
+@pytest.mark.parametrize('change, reason', [
+    ({'codec': 'vp9'}, 'codec vp9'),
+    ({'pix_fmt': 'yuv422p10le'}, 'pixels'),
+    ({'fps': 29.1, 'r_fps': 30.0}, 'cadence variable'),
+])
+def test_non_copyable_streams_are_transcoded(probed, change, reason):
+    probed(dict(H264_MP4, **change))
+    decision = plan_ingest('clip.mp4')
+    assert decision['action'] == 'transcode'
+    assert any(r.startswith(reason) for r in decision['reasons'])
+
+
+def test_unreadable_file_is_transcoded(probed):
+    probed(None, issues=['flux vidéo illisible'], audio_codec=None)
+    assert plan_ingest('clip.mp4')['action'] == 'transcode'
+
+
+def test_transcode_forces_constant_frame_rate(probed):
+    probed(dict(H264_MP4, codec='vp9'))
+    cmd = build_ingest_command('clip.webm', 'out.mp4', plan_ingest('clip.webm'))
+    assert cmd[cmd.index('-r') + 1] == '30'
+    assert cmd[cmd.index('-c:v') + 1] == 'libx264'
+
+
+def test_variable_frame_rate_tolerance():
+    assert not is_variable_frame_rate({'fps': 29.97, 'r_fps': 29.97})
+    assert not is_variable_frame_rate({'fps': 0, 'r_fps': 30})
+    assert is_variable_frame_rate({'fps': 25.0, 'r_fps': 30.0})
@@ -0,0 +1,216 @@
+"""
+Module de planification du montage
+==================================
+Après le mélange et avant tout rendu, sélectionne et raccourcit les segments
+pour couvrir exactement la durée de sortie (ou la durée de l'audio si
+adapt_to_audio est activé). Seules les frames qui finissent dans la vidéo
+sont ensuite extraites et encodées.
+
+Si les segments ne suffisent pas à couvrir la cible, le plan puise dans les
+segments de réserve puis répète des références aux segments déjà planifiés :
+chaque segment distinct (render_id) n'est rendu qu'une fois.
+
+Fonctions principales :
+- smart_shuffle_clips : Mélange en alternant entre les vidéos sources
+- order_segments : Ordonne les segments (mélange aléatoire ou intelligent)
+- get_target_duration : Durée cible du montage (hors tagline)
+- plan_timeline : Sélectionne, complète et raccourcit les segments à la durée cible
+- count_renders : Nombre de rendus distincts d'un plan
+- check_coverage : Écart entre la durée planifiée et la durée rendue
+"""
+import random
+import streamlit as st
+from typing import List, Dict, Optional
+from constants import VIDEO_FORMAT
+from video_probe import probe_audio
+
+
+def smart_shuffle_clips(clips_by_video: Dict[int, List]) -> List:
+    """
+    Mélange intelligent en alternant entre les vidéos
+
+    Args:
+        clips_by_video: Clips (ou segments) groupés par vidéo
+
+    Returns:
+        List: Clips mélangés
+    """
+    shuffled_clips = []
+
+    # Créer des listes de clips par vidéo
+    video_clip_lists = list(clips_by_video.values())
+
+    # Mélanger chaque liste individuellement
+    for clip_list in video_clip_lists:
+        random.shuffle(clip_list)
+
+    # Alterner entre les vidéos
+    max_clips = max(len(clips) for clips in video_clip_lists)
+
+    for i in range(max_clips):
+        for video_clips in video_clip_lists:
+            if i < len(video_clips):
+                shuffled_clips.append(video_clips[i])
+
+    return shuffled_clips
+
+
+def order_segments(
+    segments_by_video: Dict[int, List[Dict]],
+    shuffle: bool = True,
+    smart_shuffle: bool = True
+) -> List[Dict]:
+    """
+    Ordonne les segments du montage
+
+    Args:
+        segments_by_video: Segments groupés par vidéo
+        shuffle: Mélanger aléatoirement
+        smart_shuffle: Alterner entre les vidéos sources
+
+    Returns:
+        List[Dict]: Segments dans l'ordre du montage
+    """
+    non_empty = {idx: segs for idx, segs in segments_by_video.items() if segs}
+    if not non_empty:
+        return []
+
+    if smart_shuffle and len(non_empty) > 1:
+        st.info("🔀 Mélange intelligent appliqué")
+        return smart_shuffle_clips(non_empty)
+
+    ordered = [seg for idx in sorted(non_empty) for seg in non_empty[idx]]
+    if shuffle:
+        random.shuffle(ordered)
+        st.info("🔀 Clips mélangés aléatoirement")
+    return ordered
+
+
+def get_target_duration(
+    output_duration: Optional[float] = None,
+    audio_config: Optional[Dict] = None
+) -> Optional[float]:
+    """
+    Durée cible du montage principal (hors tagline)
+
+    Args:
+        output_duration: Durée de sortie souhaitée
+        audio_config: Configuration audio
+
+    Returns:
+        float: Durée cible en secondes ou None si pas de limite
+    """
+    if audio_config and audio_config.get('adapt_to_audio') and audio_config.get('audio_path'):
+        audio_info = probe_audio(audio_config['audio_path'])
+        if audio_info and audio_info['duration'] > 0:
+            return audio_info['duration'] + audio_config.get('extra_seconds', 0)
+    return output_duration
+
+
+def plan_timeline(
+    segments: List[Dict],
+    target_duration: Optional[float] = None,
+    reserve_segments: Optional[List[Dict]] = None,
+    loop: bool = False
+) -> List[Dict]:
+    """
+    Sélectionne et raccourcit les segments pour couvrir la durée cible
+
+    Les segments sont pris dans l'ordre, puis les segments de réserve ; le
+    dernier est raccourci pour que le total tombe exactement sur la durée
+    cible. Avec loop, si tout est consommé avant la cible, le plan répète
+    des références aux segments planifiés (même render_id, aucun nouveau rendu).
+
+    Args:
+        segments: Segments dans l'ordre du montage
+        target_duration: Durée cible (None = tous les segments)
+        reserve_segments: Segments supplémentaires, utilisés si la cible l'exige
+        loop: Boucler sur les segments jusqu'à la cible (durée calée sur l'audio)
+
+    Returns:
+        List[Dict]: Segments planifiés (copies avec render_id, bornes éventuellement raccourcies)
+    """
+    if not target_duration:
+        return [dict(seg, render_id=i) for i, seg in enumerate(segments)]
+
+    # Reste de moins d'une frame (arrondis compris) : aucun segment à rendre
+    frame = 1 / VIDEO_FORMAT['fps']
+    candidates = list(segments) + list(reserve_segments or [])
+    planned = []
+    covered = 0.0
+    for seg in candidates:
+        remaining = target_duration - covered
+        if remaining < frame:
+            break
+
+        seg_duration = seg['end'] - seg['start']
+        planned_seg = dict(seg, render_id=len(planned))
+        if seg_duration > remaining:
+            planned_seg['end'] = seg['start'] + remaining
+            seg_duration = remaining
+        planned.append(planned_seg)
+        covered += seg_duration
+
+    reserve_used = max(0, len(planned) - len(segments))
+    rendered = covered
+
+    # Cible plus longue que tous les segments : boucler sur les références
+    distinct = list(planned)
+    repeats = 0
+    while loop and distinct and target_duration - covered >= frame:
+        for seg in distinct:
+            if target_duration - covered < frame:
+                break
+            planned.append(dict(seg, repeat=True))
+            covered += seg['end'] - seg['start']
+            repeats += 1
+
+    dropped = len(candidates) - len(distinct)
+    total = sum(seg['end'] - seg['start'] for seg in candidates)
+    message = (f"🗺️ Montage planifié: {len(distinct)} clips, {min(covered, target_duration):.1f}s "
+               f"({dropped} clip(s) et {max(0.0, total - rendered):.1f}s de rushes non rendus)")
+    if reserve_used:
+        message += f", {reserve_used} clip(s) de réserve"
+    if repeats:
+        message += f", {repeats} répétition(s) sans nouveau rendu"
+    st.info(message)
+    return planned
+
+
+def count_renders(planned: List[Dict]) -> int:
+    """
+    Nombre de segments distincts à rendre dans un plan
+
+    Args:
+        planned: Segments planifiés (plan_timeline)
+
+    Returns:
+        int: Nombre de render_id distincts
+    """
+    return len({seg['render_id'] for seg in planned})
+
+
+def check_coverage(clips: List[Dict], frame_duration: float = 1 / 30) -> float:
+    """
+    Recalcule la couverture du montage après rendu
+
+    Une copie de flux calée sur les images clés extérieures peut allonger un
+    clip (jamais le raccourcir) : le montage est alors recoupé à la durée
+    planifiée par la composition. Un clip plus court que prévu laisserait
+    le montage sous la cible.
+
+    Args:
+        clips: Descripteurs des clips rendus, dans l'ordre du montage (répétitions comprises)
+        frame_duration: Écart toléré (une frame)
+
+    Returns:
+        float: Écart durée rendue - durée planifiée (secondes)
+    """
+    planned = sum(clip.get('planned_duration', clip['duration']) for clip in clips)
+    rendered = sum(clip['duration'] for clip in clips)
+    drift = rendered - planned
+    if drift < -frame_duration:
+        st.warning(f"⚠️ Montage rendu plus court que prévu: {rendered:.2f}s / {planned:.2f}s")
+    elif drift > frame_duration:
+        st.info(f"📐 Clips allongés de {drift:.2f}s (images clés), recoupés à {planned:.2f}s")
+    return drift
@@ -0,0 +1,244 @@
+"""
+Module de stockage des uploads par contenu
+==========================================
+Les vidéos uploadées sont écrites sur disque par blocs
+(UPLOAD_STORE_SETTINGS['chunk_size']) avec calcul de l'empreinte SHA-256 à
+la volée, puis rangées par empreinte. Une vidéo déjà reçue (même contenu,
+autre session ou autre nom) n'est ni réécrite, ni revalidée, ni reconvertie :
+le fichier importé (video_ingest) et ses métadonnées ffprobe sont partagés.
+
+Chaque objet référence les tâches (scratch_space) qui l'utilisent ; les
+références des tâches disparues sont ignorées. Au-delà du budget, les objets
+sans référence les moins récemment utilisés sont supprimés.
+
+Fonctions principales :
+- store_upload : Stocke et importe une vidéo uploadée
+- release_job : Retire les références d'une tâche
+- evict_store : Applique le budget disque du stockage
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import hashlib
+import streamlit as st
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from constants import UPLOAD_STORE_SETTINGS
+from video_ingest import ingest_video
+from video_probe import remember_probe
+from scratch_space import current_job
+
+_META_FILE = 'meta.json'
+
+
+def _objects_dir() -> str:
+    """Répertoire des objets du stockage (créé si besoin)"""
+    directory = os.path.join(UPLOAD_STORE_SETTINGS['dir'], 'objects')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def _locked(path: str):
+    """Verrou exclusif inter-processus sur un fichier de verrou"""
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_meta(object_dir: str) -> Optional[Dict]:
+    """Métadonnées d'un objet (None si absentes ou illisibles)"""
+    try:
+        with open(os.path.join(object_dir, _META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(object_dir: str, meta: Dict) -> None:
+    """Écrit les métadonnées d'un objet (écriture atomique)"""
+    path = os.path.join(object_dir, _META_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, path)
+
+
+def _live_refs(meta: Dict) -> List[str]:
+    """Tâches encore existantes qui référencent un objet"""
+    return [job_dir for job_dir in meta.get('refs', []) if os.path.isdir(job_dir)]
+
+
+def _write_chunks(uploaded_file, tmp_path: str) -> str:
+    """
+    Écrit un upload par blocs en calculant son empreinte
+
+    Args:
+        uploaded_file: Fichier uploadé Streamlit
+        tmp_path: Fichier temporaire à écrire
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    digest = hashlib.sha256()
+    chunk_size = UPLOAD_STORE_SETTINGS['chunk_size']
+    uploaded_file.seek(0)
+    with open(tmp_path, 'wb') as f:
+        for chunk in iter(lambda: uploaded_file.read(chunk_size), b''):
+            digest.update(chunk)
+            f.write(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def store_upload(uploaded_file, job_dir: Optional[str] = None) -> Optional[Dict]:
+    """
+    Stocke une vidéo uploadée par empreinte et l'importe une seule fois
+
+    Args:
+        uploaded_file: Fichier uploadé Streamlit
+        job_dir: Tâche qui référence la vidéo (défaut: tâche courante)
+
+    Returns:
+        Dict: {'path', 'digest', 'action', 'reasons', 'info', 'reused'} ou None si échec
+    """
+    job_dir = job_dir or current_job()
+    name = uploaded_file.name
+    tmp_dir = os.path.join(UPLOAD_STORE_SETTINGS['dir'], 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"upload_{os.getpid()}_{uuid.uuid4().hex[:12]}")
+
+    try:
+        digest = _write_chunks(uploaded_file, tmp_path)
+    except OSError as e:
+        st.error(f"❌ Erreur lors de la sauvegarde de {name}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    object_dir = os.path.join(_objects_dir(), digest)
+    os.makedirs(object_dir, exist_ok=True)
+
+    # Un seul import par contenu, même entre sessions concurrentes
+    with _locked(os.path.join(object_dir, '.lock')):
+        meta = _read_meta(object_dir)
+        reused = bool(meta and meta.get('path') and os.path.exists(os.path.join(object_dir, meta['path'])))
+
+        if reused:
+            os.remove(tmp_path)
+            path = os.path.join(object_dir, meta['path'])
+            remember_probe(path, meta.get('info'))
+            st.info(f"♻️ {name}: contenu déjà importé ({meta['action']}), ni réécrit ni reconverti")
+        else:
+            _, extension = os.path.splitext(name.lower())
+            source_path = os.path.join(object_dir, f"source{extension}")
+            os.replace(tmp_path, source_path)
+            ingested = ingest_video(source_path, object_dir)
+            if not ingested:
+                shutil.rmtree(object_dir, ignore_errors=True)
+                return None
+            path = ingested['path']
+            meta = {
+                'digest': digest,
+                'original_name': name,
+                'path': os.path.basename(path),
+                'action': ingested['action'],
+                'reasons': ingested['reasons'],
+                'info': ingested['info'],
+                'refs': []
+            }
+
+        meta['refs'] = sorted(set(_live_refs(meta)) | {job_dir})
+        meta['last_used'] = time.time()
+        _write_meta(object_dir, meta)
+
+    evict_store()
+    return {
+        'path': path,
+        'digest': digest,
+        'action': meta['action'],
+        'reasons': meta['reasons'],
+        'info': meta['info'],
+        'reused': reused
+    }
+
+
+def release_job(job_dir: str) -> int:
+    """
+    Retire les références d'une tâche à tous les objets
+
+    Args:
+        job_dir: Répertoire de la tâche
+
+    Returns:
+        int: Nombre d'objets libérés
+    """
+    released = 0
+    for entry in os.scandir(_objects_dir()):
+        if not entry.is_dir():
+            continue
+        with _locked(os.path.join(entry.path, '.lock')):
+            meta = _read_meta(entry.path)
+            if not meta or job_dir not in meta.get('refs', []):
+                continue
+            meta['refs'] = [ref for ref in _live_refs(meta) if ref != job_dir]
+            _write_meta(entry.path, meta)
+            released += 1
+    return released
+
+
+def _directory_size(directory: str) -> int:
+    """Taille totale des fichiers d'un répertoire"""
+    size = 0
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            try:
+                size += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return size
+
+
+def evict_store() -> int:
+    """
+    Supprime les objets sans référence les moins récemment utilisés au-delà du budget
+
+    Returns:
+        int: Nombre d'objets supprimés
+    """
+    # Écritures interrompues (plantage pendant un upload)
+    tmp_dir = os.path.join(UPLOAD_STORE_SETTINGS['dir'], 'tmp')
+    if os.path.isdir(tmp_dir):
+        for entry in os.scandir(tmp_dir):
+            try:
+                if time.time() - entry.stat().st_mtime > 24 * 3600:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+
+    objects = []
+    for entry in os.scandir(_objects_dir()):
+        if entry.is_dir():
+            meta = _read_meta(entry.path) or {}
+            objects.append((meta.get('last_used', 0), _directory_size(entry.path), entry.path))
+
+    budget = UPLOAD_STORE_SETTINGS['budget_mb'] * 1024 * 1024
+    excess = sum(size for _, size, _ in objects) - budget
+    removed = 0
+    for _, size, object_dir in sorted(objects):
+        if excess <= 0:
+            break
+        with _locked(os.path.join(object_dir, '.lock')):
+            meta = _read_meta(object_dir)
+            if meta is None or _live_refs(meta):
+                continue
+            shutil.rmtree(object_dir, ignore_errors=True)
+        excess -= size
+        removed += 1
+    return removed
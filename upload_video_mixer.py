@@ -11,17 +11,21 @@ from typing import List, Dict, Optional
 # Import des modules
 from constants import (
     UI_MESSAGES, DEFAULT_SETTINGS, ANALYSIS_MODES, 
-    SUPPORTED_EXTENSIONS, VIDEO_FORMAT
+    SUPPORTED_EXTENSIONS, VIDEO_FORMAT, DRAFT_SETTINGS, TARGET_SIZE_SETTINGS
 )
 from utils import (
-    create_temp_directory, cleanup_temp_files, 
     save_uploaded_file, format_duration, estimate_processing_time,
-    process_uploaded_videos, validate_uploaded_file
+    validate_uploaded_file
 )
 from face_detector import extract_face_encoding_from_image
 from text_detector import download_east_model, load_text_detection_model
-from video_extractor import extract_best_clips_with_face
-from video_assembler import create_final_video_ultra_safe as create_final_video
+from video_extractor import select_best_segments, render_segment
+from pipeline import run_pipeline
+from timeline_planner import order_segments, get_target_duration, plan_timeline
+from draft_preview import render_draft
+from edit_decision_list import build_edl, edl_settings, edl_segments, diff_edl, save_edl, load_edl, render_edl
+from scratch_space import create_job, set_current_job, end_job
+from upload_store import release_job
 
 # Configuration de la page
 st.set_page_config(
@@ -30,9 +34,11 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialisation de la session
+# Initialisation de la session : un espace de travail dédié par session,
+# associé au thread de la session pour tous les fichiers temporaires
 if 'temp_dir' not in st.session_state:
-    st.session_state.temp_dir = create_temp_directory()
+    st.session_state.temp_dir = create_job('session')
+set_current_job(st.session_state.temp_dir)
 
 # Interface principale
 st.title(UI_MESSAGES['app_title'])
@@ -117,6 +123,13 @@ with st.expander("🎨 Options de qualité", expanded=False):
         st.write("📊 Comparaison:")
         st.write("- Standard : Rapide mais flou")
         st.write("- Lanczos : Plus net, +20% temps")
+    max_size_mb = st.number_input(
+        "📦 Taille maximale de la vidéo (Mo, 0 = sans limite)",
+        min_value=0.0,
+        value=float(TARGET_SIZE_SETTINGS['max_mb']),
+        step=5.0,
+        help="Le CRF est choisi sur quelques extraits encodés pour tenir cette taille en un seul encodage"
+    )
 
 # Options avancées
 col1, col2 = st.columns(2)
@@ -299,160 +312,342 @@ if uploaded_videos:
     else:
         st.error("❌ Aucun fichier valide sélectionné")
 
-# Bouton de traitement
-if st.button("🎬 Créer la vidéo TikTok/Reels", type="primary"):
-    if not valid_videos:
-        st.error("Veuillez uploader au moins une vidéo")
-    else:
-        st.header("6. Traitement")
+# Signature des réglages qui déterminent le plan de montage : tant qu'elle
+# ne change pas, le plan en mémoire est réutilisé sans nouvelle analyse
+plan_signature = (
+    tuple((video.name, video.size) for video in valid_videos),
+    (reference_image.name, reference_image.size) if reference_image else None,
+    face_threshold, analysis_mode, avoid_text, remove_text_method,
+    face_detection_only, smart_crop, exclude_first_seconds,
+    output_duration, max_clips_per_video, min_clip_duration, max_clip_duration,
+    shuffle_clips, smart_shuffle,
+    (audio_file.name, audio_file.size) if audio_file else None,
+    audio_config.get('adapt_to_audio'), audio_config.get('extra_seconds', 0)
+)
+
+timeline_plan = st.session_state.get('timeline_plan')
+if timeline_plan and timeline_plan['signature'] != plan_signature:
+    # Réglages modifiés : le plan et son brouillon ne correspondent plus
+    st.session_state.timeline_plan = timeline_plan = None
+    st.session_state.draft_path = None
+
+
+def build_timeline_plan(prerender: bool = False) -> Optional[Dict]:
+    """
+    Importe et analyse les vidéos uploadées en pipeline, puis planifie le montage
+    
+    Args:
+        prerender: Rendre par anticipation les segments principaux pendant l'analyse
+    
+    Returns:
+        Dict: Plan de montage {'signature', 'edl', 'processed_files', 'text_net', 'prerendered'} ou None
+    """
+    global avoid_text
+    
+    # Estimation du temps
+    estimated_time = estimate_processing_time(
+        len(valid_videos), 
+        output_duration * len(valid_videos), 
+        target_face_encoding is not None
+    )
+    st.info(f"⏱️ Temps estimé: {estimated_time}")
+    
+    # Charger le modèle de détection de texte si nécessaire
+    text_net = None
+    if avoid_text:
+        model_path = download_east_model(st.session_state.temp_dir)
+        if model_path:
+            text_net = load_text_detection_model(model_path)
+            if text_net:
+                st.success(UI_MESSAGES['text_model_loaded'])
+            else:
+                avoid_text = False
+    
+    # Durée cible lue d'avance (ffprobe) : calée sur l'audio, le montage
+    # garde des segments de réserve plutôt que de boucler la vidéo
+    timeline_audio = audio_config if audio_config.get('audio_path') else None
+    target_duration = get_target_duration(output_duration, timeline_audio)
+    audio_driven = bool(timeline_audio and timeline_audio.get('adapt_to_audio'))
+    
+    def analyze(idx: int, video_info: Dict) -> List[Dict]:
+        """Sélection des segments d'une vidéo importée (analyse seule)"""
+        st.write(f"**Analyse de:** {video_info['title']} ({idx+1}/{len(valid_videos)})")
+        try:
+            segments = select_best_segments(
+                video_info['path'],
+                target_face_encoding=target_face_encoding,
+                max_clips_per_video=max_clips_per_video,
+                min_clip_duration=min_clip_duration,
+                max_clip_duration=max_clip_duration,
+                video_index=idx,
+                analysis_mode=analysis_mode,
+                avoid_text=avoid_text,
+                text_net=text_net,
+                face_detection_only=face_detection_only,
+                remove_text_method=remove_text_method,
+                smart_crop=smart_crop,
+                exclude_first_seconds=exclude_first_seconds,
+                face_threshold=face_threshold,
+                reserve_clips=max_clips_per_video if audio_driven else 0
+            )
+        except Exception as e:
+            st.error(f"❌ Erreur traitement vidéo {idx+1}: {str(e)}")
+            return []
         
-        # Estimation du temps
-        estimated_time = estimate_processing_time(
-            len(valid_videos), 
-            output_duration * len(valid_videos), 
-            target_face_encoding is not None
-        )
-        st.info(f"⏱️ Temps estimé: {estimated_time}")
+        # Libération mémoire après chaque vidéo
+        import gc
+        gc.collect()
+        st.info(f"✅ Vidéo {idx+1} analysée - {len(segments)} segments sélectionnés, mémoire libérée")
+        return segments
+    
+    def prerender_segment(segment: Dict) -> Optional[Dict]:
+        """Rendu anticipé par ffmpeg d'un segment principal"""
+        return render_segment(segment, output_dir=st.session_state.temp_dir, use_lanczos=use_lanczos)
+    
+    # Rendu anticipé sans suppression du texte (qui passe par le modèle partagé)
+    render = prerender_segment if prerender and not (remove_text_method and text_net is not None) else None
+    
+    # Import, analyse et rendu anticipé en pipeline : la vidéo suivante est
+    # importée pendant l'analyse, les segments analysés sont rendus en parallèle
+    st.subheader("Import et extraction des meilleurs moments")
+    processed_files, analyzed, prerendered = run_pipeline(
+        valid_videos,
+        st.session_state.temp_dir,
+        analyze,
+        render=render,
+        use_lanczos=use_lanczos,
+        render_budget=target_duration
+    )
+    
+    if not processed_files:
+        st.error("❌ Aucun fichier n'a pu être traité")
+        return None
+    
+    # Résumé global du traitement
+    st.markdown("### 📊 Résumé du traitement")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Vidéos traitées", len(processed_files))
+    
+    with col2:
+        total_size = sum(f.get('file_size_mb', 0) for f in processed_files)
+        st.metric("Taille totale", f"{total_size:.1f} MB")
+    
+    with col3:
+        total_duration = sum(f.get('duration', 0) for f in processed_files)
+        st.metric("Durée totale", format_duration(total_duration))
+    
+    st.markdown("---")
+    
+    segments_by_video = {idx: [seg for seg in segments if not seg.get('reserve')]
+                         for idx, segments in analyzed.items()}
+    reserve_by_video = {idx: [seg for seg in segments if seg.get('reserve')]
+                        for idx, segments in analyzed.items()}
+    
+    # Planification du montage après l'analyse : seules les frames conservées
+    # dans la vidéo finale sont encodées (les rendus anticipés qui
+    # correspondent au plan sont réutilisés, les autres sont ignorés)
+    ordered_segments = order_segments(segments_by_video, shuffle_clips, smart_shuffle)
+    planned_segments = plan_timeline(
+        ordered_segments,
+        target_duration,
+        reserve_segments=order_segments(reserve_by_video, shuffle_clips, smart_shuffle) if audio_driven else None,
+        loop=audio_driven
+    )
+    if not planned_segments:
+        return None
+    
+    # Liste de décisions de montage : contrat entre l'analyse et le rendu
+    edl = build_edl(
+        planned_segments,
+        output_duration=output_duration,
+        logo_config=logo_config,
+        audio_config=audio_config,
+        tagline_path=tagline_path,
+        use_lanczos=use_lanczos,
+        remove_text_method=remove_text_method if text_net is not None else None,
+        max_size_mb=max_size_mb
+    )
+    previous_edl = st.session_state.get('last_edl')
+    if previous_edl:
+        changes = diff_edl(previous_edl, edl)
+        if changes:
+            with st.expander(f"🔀 {len(changes)} différence(s) avec le plan précédent"):
+                for change in changes:
+                    st.text(change)
+        else:
+            st.info("🔀 Plan identique au précédent")
+    st.session_state.last_edl = edl
+    
+    return {
+        'signature': plan_signature,
+        'edl': edl,
+        'processed_files': processed_files,
+        'text_net': text_net,
+        'prerendered': prerendered
+    }
+
+
+def current_edl(plan: Dict) -> Dict:
+    """
+    EDL du plan avec les réglages de rendu actuels (logo, audio, tagline, resize, taille)
+    
+    Args:
+        plan: Plan de montage issu de build_timeline_plan
+    
+    Returns:
+        Dict: EDL à rendre
+    """
+    return {
+        **plan['edl'],
+        **edl_settings(logo_config, audio_config, tagline_path),
+        'use_lanczos': use_lanczos,
+        'max_size_mb': max_size_mb
+    }
+
+
+def render_final_video(plan: Dict):
+    """
+    Rend l'EDL du plan puis affiche la vidéo finale pleine qualité
+    
+    Args:
+        plan: Plan de montage issu de build_timeline_plan (ou EDL importée)
+    """
+    edl = current_edl(plan) if plan.get('signature') is not None else plan['edl']
+    clips = edl['clips']
+    
+    # Résumé
+    st.subheader("📊 Résumé du montage")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Clips distincts", len({clip.get('render_id', clip['order']) for clip in clips}))
+    with col2:
+        clips_with_face = sum(1 for clip in clips if clip.get('has_target_face') and not clip.get('repeat'))
+        st.metric("Clips avec visage", clips_with_face)
+    with col3:
+        st.metric("Vidéos sources", len({clip['source_path'] for clip in clips}))
+    
+    edl_path = save_edl(edl, os.path.join(st.session_state.temp_dir, "tiktok_reels_mix.edl.json"))
+    
+    # Rendu des clips puis assemblage de la vidéo finale
+    with st.spinner("Assemblage de la vidéo finale (format vertical 9:16)..."):
+        output_path = os.path.join(st.session_state.temp_dir, "tiktok_reels_mix.mp4")
         
-        # Traitement des vidéos uploadées
-        with st.spinner("Traitement des vidéos uploadées..."):
-            processed_files = process_uploaded_videos(valid_videos, st.session_state.temp_dir)
+        success = render_edl(
+            edl,
+            output_path,
+            text_net=plan.get('text_net'),
+            output_dir=st.session_state.temp_dir,
+            prerendered=plan.get('prerendered')
+        )
         
-        if processed_files:
-            # Résumé global du traitement
-            st.markdown("### 📊 Résumé du traitement")
-            col1, col2, col3 = st.columns(3)
+        if success:
+            st.success(UI_MESSAGES['video_created'])
+            st.balloons()
             
+            # Statistiques finales
+            col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Vidéos traitées", len(processed_files))
-            
+                st.metric("Nombre de clips", len(clips))
             with col2:
-                total_size = sum(f.get('file_size_mb', 0) for f in processed_files)
-                st.metric("Taille totale", f"{total_size:.1f} MB")
-            
+                st.metric("Format", f"{VIDEO_FORMAT['width']}x{VIDEO_FORMAT['height']} HD")
             with col3:
-                total_duration = sum(f.get('duration', 0) for f in processed_files)
-                st.metric("Durée totale", format_duration(total_duration))
-            
-            st.markdown("---")
-            # Charger le modèle de détection de texte si nécessaire
-            text_net = None
-            if avoid_text:
-                model_path = download_east_model(st.session_state.temp_dir)
-                if model_path:
-                    text_net = load_text_detection_model(model_path)
-                    if text_net:
-                        st.success(UI_MESSAGES['text_model_loaded'])
-                    else:
-                        avoid_text = False
+                st.metric("FPS", VIDEO_FORMAT['fps'])
             
-            # Extraction des clips (version originale)
-            all_clips = []
-            clips_by_video = {}
-            
-            st.subheader("Extraction des meilleurs moments")
-            
-            for idx, video_info in enumerate(processed_files):
-                st.write(f"**Analyse de:** {video_info['title']} ({idx+1}/{len(processed_files)})")
-                
-                # GESTION MÉMOIRE: Traiter une vidéo à la fois
-                try:
-                    clips = extract_best_clips_with_face(
-                        video_info['path'],
-                        target_face_encoding=target_face_encoding,
-                        max_clips_per_video=max_clips_per_video,
-                        min_clip_duration=min_clip_duration,
-                        max_clip_duration=max_clip_duration,
-                        video_index=idx,
-                        analysis_mode=analysis_mode,
-                        avoid_text=avoid_text,
-                        text_net=text_net,
-                        face_detection_only=face_detection_only,
-                        remove_text_method=remove_text_method,
-                        smart_crop=smart_crop,
-                        use_lanczos=use_lanczos,
-                        exclude_first_seconds=exclude_first_seconds,
-                        face_threshold=face_threshold
+            # Téléchargement
+            col1, col2 = st.columns(2)
+            with col1:
+                with open(output_path, 'rb') as f:
+                    st.download_button(
+                        label="⬇️ Télécharger la vidéo TikTok/Reels",
+                        data=f,
+                        file_name="tiktok_reels_mix.mp4",
+                        mime="video/mp4"
                     )
-                    
-                    clips_by_video[idx] = clips
-                    all_clips.extend(clips)
-                    
-                    # Libération mémoire après chaque vidéo
-                    import gc
-                    gc.collect()
-                    st.info(f"✅ Vidéo {idx+1} traitée - {len(clips)} clips extraits, mémoire libérée")
-                    
-                except Exception as e:
-                    st.error(f"❌ Erreur traitement vidéo {idx+1}: {str(e)}")
-                    clips_by_video[idx] = []
-                    continue
-            
-            if all_clips:
-                # Résumé
-                st.subheader("📊 Résumé de l'extraction")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Clips extraits", len(all_clips))
-                with col2:
-                    clips_with_face = sum(1 for clip_list in clips_by_video.values() for _ in clip_list)
-                    st.metric("Clips avec visage", clips_with_face)
-                with col3:
-                    st.metric("Vidéos analysées", len(processed_files))
-                
-                # Création de la vidéo finale
-                with st.spinner("Assemblage de la vidéo finale (format vertical 9:16)..."):
-                    output_path = os.path.join(st.session_state.temp_dir, "tiktok_reels_mix.mp4")
-                    
-                    success = create_final_video(
-                        all_clips,
-                        output_path,
-                        shuffle=shuffle_clips,
-                        smart_shuffle=smart_shuffle,
-                        clips_by_video=clips_by_video if smart_shuffle else None,
-                        logo_config=logo_config if logo_config.get('logo_path') else None,
-                        audio_config=audio_config if audio_config.get('audio_path') else None,
-                        tagline_path=tagline_path,
-                        output_duration=output_duration
+            with col2:
+                with open(edl_path, 'rb') as f:
+                    st.download_button(
+                        label="📝 Télécharger l'EDL (JSON)",
+                        data=f,
+                        file_name="tiktok_reels_mix.edl.json",
+                        mime="application/json",
+                        help="Liste de décisions de montage : re-rendu sans nouvelle analyse "
+                             "(python edit_decision_list.py render ...)"
                     )
-                    
-                    if success:
-                        st.success(UI_MESSAGES['video_created'])
-                        st.balloons()
-                        
-                        # Statistiques finales
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Nombre de clips", len(all_clips))
-                        with col2:
-                            st.metric("Format", f"{VIDEO_FORMAT['width']}x{VIDEO_FORMAT['height']} HD")
-                        with col3:
-                            st.metric("FPS", VIDEO_FORMAT['fps'])
-                        
-                        # Téléchargement
-                        with open(output_path, 'rb') as f:
-                            st.download_button(
-                                label="⬇️ Télécharger la vidéo TikTok/Reels",
-                                data=f,
-                                file_name="tiktok_reels_mix.mp4",
-                                mime="video/mp4"
-                            )
-                        
-                        # Aperçu
-                        st.video(output_path)
-                        
-                    # Nettoyage final
-                    import gc
-                    gc.collect()
-                    st.success(f"✅ Traitement terminé - mémoire libérée")
-                    
-            else:
-                st.error("Aucun clip n'a pu être extrait des vidéos")
+            
+            # Aperçu
+            st.video(output_path)
+            
+        # Nettoyage final
+        import gc
+        gc.collect()
+        st.success(f"✅ Traitement terminé - mémoire libérée")
+
+
+# Boutons de traitement : le brouillon et la vidéo finale partagent le même plan
+col1, col2 = st.columns(2)
+with col1:
+    draft_clicked = st.button(
+        "⚡ Aperçu brouillon (rapide)",
+        help=f"Aperçu {DRAFT_SETTINGS['width']}x{DRAFT_SETTINGS['height']} à {DRAFT_SETTINGS['fps']} fps "
+             f"du montage planifié, sans suppression du texte ni tagline"
+    )
+with col2:
+    create_clicked = st.button("🎬 Créer la vidéo TikTok/Reels", type="primary")
+
+if draft_clicked or create_clicked:
+    if not valid_videos:
+        st.error("Veuillez uploader au moins une vidéo")
+    else:
+        st.header("6. Traitement")
+        
+        if timeline_plan:
+            st.info(f"♻️ Plan de montage réutilisé ({len(timeline_plan['edl']['clips'])} segments), sans nouvelle analyse")
+        else:
+            timeline_plan = build_timeline_plan(prerender=create_clicked)
+            st.session_state.timeline_plan = timeline_plan
+        
+        if timeline_plan is None:
+            st.error("Aucun clip n'a pu être extrait des vidéos")
+        elif draft_clicked:
+            draft_path = os.path.join(st.session_state.temp_dir, "draft_preview.mp4")
+            with st.spinner("Rendu de l'aperçu brouillon..."):
+                if render_draft(
+                    edl_segments(timeline_plan['edl']),
+                    draft_path,
+                    logo_config=logo_config if logo_config.get('logo_path') else None,
+                    audio_config=audio_config if audio_config.get('audio_path') else None
+                ):
+                    st.session_state.draft_path = draft_path
+        else:
+            render_final_video(timeline_plan)
+
+# Aperçu brouillon du plan en mémoire et rendu final avec ce même plan
+draft_path = st.session_state.get('draft_path')
+if timeline_plan and draft_path and os.path.exists(draft_path) and not create_clicked:
+    st.subheader("⚡ Aperçu brouillon")
+    st.video(draft_path)
+    if st.button("✅ Rendre la version finale avec ce plan", type="primary"):
+        render_final_video(timeline_plan)
+
+# Re-rendu d'une EDL enregistrée, sans analyse des vidéos
+with st.expander("📝 Rendre une EDL enregistrée"):
+    edl_file = st.file_uploader("EDL (JSON)", type=['json'], key="edl_upload")
+    if edl_file and st.button("🎬 Rendre cette EDL"):
+        imported_edl = load_edl(edl_file.getvalue().decode('utf-8'))
+        if imported_edl:
+            st.info(f"📝 EDL chargée: {len(imported_edl['clips'])} clips, sans nouvelle analyse")
+            render_final_video({'signature': None, 'edl': imported_edl, 'text_net': None})
 
 # Nettoyage
 if st.button("🗑️ Nettoyer les fichiers temporaires"):
-    if cleanup_temp_files(st.session_state.temp_dir):
-        st.session_state.temp_dir = create_temp_directory()
+    release_job(st.session_state.temp_dir)
+    if end_job(st.session_state.temp_dir):
+        st.session_state.temp_dir = create_job('session')
+        set_current_job(st.session_state.temp_dir)
+        st.session_state.timeline_plan = None
+        st.session_state.draft_path = None
         st.success(UI_MESSAGES['temp_cleaned'])
 
 # Footer
@@ -8,6 +8,8 @@ import streamlit as st
 import time
 from typing import List, Dict, Optional, Tuple
 from constants import SUPPORTED_EXTENSIONS
+from video_ingest import ingest_video
+from upload_store import store_upload
 
 def create_temp_directory(base_path: Optional[str] = None) -> str:
     """
@@ -96,84 +98,96 @@ def save_uploaded_file(uploaded_file, temp_dir: str, filename: str) -> Optional[
 
 def validate_and_convert_video(file_path: str, temp_dir: str) -> Optional[str]:
     """
-    Valide et convertit une vidéo pour s'assurer qu'elle est compatible avec MoviePy
+    Valide une vidéo et la rend compatible (acceptée, remuxée ou transcodée)
     
     Args:
         file_path: Chemin du fichier vidéo
         temp_dir: Répertoire temporaire
     
     Returns:
-        str: Chemin du fichier converti ou original si OK
+        str: Chemin du fichier importé (original si accepté) ou None si erreur
     """
     try:
-        # Test initial avec MoviePy
-        test_clip = None
-        try:
-            from moviepy.editor import VideoFileClip
-            test_clip = VideoFileClip(file_path)
-            
-            # Test d'accès aux frames
-            test_frame = test_clip.get_frame(0.1)
-            if test_frame is not None:
-                test_clip.close()
-                st.success(f"✅ Vidéo compatible directement")
-                return file_path
-            else:
-                st.warning("⚠️ Vidéo retourne frames None, conversion nécessaire")
-                test_clip.close()
-                
-        except Exception as e:
-            st.warning(f"⚠️ Erreur MoviePy: {str(e)}, conversion nécessaire")
-            if test_clip:
-                test_clip.close()
+        ingested = ingest_video(file_path, temp_dir)
+        return ingested['path'] if ingested else None
+    except Exception as e:
+        st.error(f"❌ Erreur validation vidéo: {str(e)}")
+        return None
+
+def process_uploaded_video(uploaded_file, idx: int, temp_dir: str) -> Optional[Dict]:
+    """
+    Traite un fichier vidéo uploadé (stockage par contenu puis import)
+    
+    Args:
+        uploaded_file: Fichier uploadé Streamlit
+        idx: Position du fichier dans l'upload
+        temp_dir: Répertoire de la tâche
+    
+    Returns:
+        Dict: Informations de la vidéo importée ou None si erreur
+    """
+    try:
+        # Vérifier l'extension
+        filename = uploaded_file.name
+        _, ext = os.path.splitext(filename.lower())
         
-        # Conversion nécessaire
-        st.info("🔄 Conversion de la vidéo en format compatible...")
+        if ext not in SUPPORTED_EXTENSIONS:
+            st.error(f"❌ Format non supporté: {filename} ({ext})")
+            st.info(f"Formats supportés: {', '.join(SUPPORTED_EXTENSIONS)}")
+            return None
         
-        # Utiliser ffmpeg pour convertir en H.264 MP4 compatible
-        converted_path = os.path.join(temp_dir, f"converted_{os.path.basename(file_path)}")
+        # Stockage par contenu (écriture par blocs) puis import : accepté
+        # tel quel, remuxé ou transcodé, une seule fois par contenu
+        st.info(f"🔍 Validation de {filename}...")
+        ingested = store_upload(uploaded_file, temp_dir)
         
-        import subprocess
-        cmd = [
-            'ffmpeg', '-i', file_path,
-            '-c:v', 'libx264',  # Force H.264
-            '-c:a', 'aac',      # Force AAC audio
-            '-preset', 'fast',   # Conversion rapide
-            '-crf', '23',       # Qualité raisonnable
-            '-movflags', '+faststart',  # Optimisation web
-            '-y',               # Overwrite
-            converted_path
-        ]
+        if not ingested:
+            st.error(f"❌ Impossible de traiter {filename} - format incompatible")
+            return None
+        validated_path = ingested['path']
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Obtenir les informations du fichier validé
+        file_size_mb = os.path.getsize(validated_path) / 1024 / 1024
         
-        if result.returncode == 0 and os.path.exists(converted_path):
-            # Test du fichier converti
-            try:
-                test_clip = VideoFileClip(converted_path)
-                test_frame = test_clip.get_frame(0.1)
-                test_clip.close()
-                
-                if test_frame is not None:
-                    st.success("✅ Conversion réussie, vidéo compatible")
-                    return converted_path
-                else:
-                    st.error("❌ Vidéo convertie toujours incompatible")
-                    return None
-            except Exception as e:
-                st.error(f"❌ Vidéo convertie non fonctionnelle: {str(e)}")
-                return None
+        # Métadonnées du fichier importé (sondage ffprobe en cache)
+        info = ingested['info']
+        if info:
+            duration = info['duration']
+            fps = info['fps']
+            width, height = info['width'], info['height']
+            if info['rotation'] in (90, 270):
+                width, height = height, width
         else:
-            st.error(f"❌ Échec de conversion ffmpeg: {result.stderr}")
-            return None
-            
+            st.warning(f"⚠️ Métadonnées indisponibles pour {filename}")
+            duration = 0
+            fps = 'N/A'
+            width, height = 'N/A', 'N/A'
+        
+        st.success(f"✅ {filename} traité ({file_size_mb:.1f} MB)")
+        
+        return {
+            'path': validated_path,  # Utiliser le fichier validé
+            'title': os.path.splitext(filename)[0],
+            'original_filename': filename,
+            'duration': duration,
+            'index': idx,
+            'resolution': f"{width}x{height}",
+            'fps': fps,
+            'file_size_mb': file_size_mb,
+            'source': 'upload',
+            'converted': ingested['action'] != 'accept',
+            'ingest': ingested['action'],
+            'digest': ingested['digest']
+        }
+        
     except Exception as e:
-        st.error(f"❌ Erreur validation vidéo: {str(e)}")
+        st.error(f"❌ Erreur lors du traitement de {uploaded_file.name}: {str(e)}")
         return None
 
 def process_uploaded_videos(uploaded_files, temp_dir: str) -> List[Dict]:
     """
     Traite les fichiers vidéo uploadés avec validation et conversion si nécessaire
+    (stockage partagé par empreinte du contenu, voir upload_store)
     """
     processed_files = []
     
@@ -184,65 +198,9 @@ def process_uploaded_videos(uploaded_files, temp_dir: str) -> List[Dict]:
     st.info(f"📁 Traitement de {len(uploaded_files)} fichier(s) uploadé(s)...")
     
     for idx, uploaded_file in enumerate(uploaded_files):
-        try:
-            # Vérifier l'extension
-            filename = uploaded_file.name
-            _, ext = os.path.splitext(filename.lower())
-            
-            if ext not in SUPPORTED_EXTENSIONS:
-                st.error(f"❌ Format non supporté: {filename} ({ext})")
-                st.info(f"Formats supportés: {', '.join(SUPPORTED_EXTENSIONS)}")
-                continue
-            
-            # Sauvegarder le fichier
-            file_path = save_uploaded_file(uploaded_file, temp_dir, filename)
-            
-            if not file_path or not os.path.exists(file_path):
-                st.error(f"❌ Impossible de sauvegarder: {filename}")
-                continue
-            
-            # VALIDATION ET CONVERSION si nécessaire
-            st.info(f"🔍 Validation de {filename}...")
-            validated_path = validate_and_convert_video(file_path, temp_dir)
-            
-            if not validated_path:
-                st.error(f"❌ Impossible de traiter {filename} - format incompatible")
-                continue
-            
-            # Obtenir les informations du fichier validé
-            file_size_mb = os.path.getsize(validated_path) / 1024 / 1024
-            
-            # Extraire les métadonnées avec le fichier validé
-            try:
-                from moviepy.editor import VideoFileClip
-                with VideoFileClip(validated_path) as clip:
-                    duration = clip.duration
-                    fps = clip.fps
-                    width, height = clip.size
-            except Exception as e:
-                st.warning(f"⚠️ Erreur métadonnées: {str(e)}")
-                duration = 0
-                fps = 'N/A'
-                width, height = 'N/A', 'N/A'
-            
-            processed_files.append({
-                'path': validated_path,  # Utiliser le fichier validé
-                'title': os.path.splitext(filename)[0],
-                'original_filename': filename,
-                'duration': duration,
-                'index': idx,
-                'resolution': f"{width}x{height}",
-                'fps': fps,
-                'file_size_mb': file_size_mb,
-                'source': 'upload',
-                'converted': validated_path != file_path
-            })
-            
-            st.success(f"✅ {filename} traité ({file_size_mb:.1f} MB)")
-            
-        except Exception as e:
-            st.error(f"❌ Erreur lors du traitement de {uploaded_file.name}: {str(e)}")
-            continue
+        video_info = process_uploaded_video(uploaded_file, idx, temp_dir)
+        if video_info:
+            processed_files.append(video_info)
     
     if not processed_files:
         st.error("❌ Aucun fichier n'a pu être traité")
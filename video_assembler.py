@@ -6,58 +6,37 @@ Utilise une méthode de matérialisation systématique pour éviter les erreurs
 
 Fonctions principales :
 - create_final_video_ultra_safe : Crée la vidéo finale avec tous les éléments
-- safe_concatenate_with_materialization : Concaténation sécurisée des clips
+- safe_concatenate_with_materialization : Concaténation sécurisée des clips (concat demuxer, repli MoviePy)
 - materialize_clip : Matérialise un clip sur disque pour éviter les références cassées
-- smart_shuffle_clips : Mélange intelligent en alternant les sources
+- intermediate_paths : Fichiers intermédiaires des clips (descripteurs ou clips MoviePy)
 """
 import cv2
 import numpy as np
 import streamlit as st
 import random
-import time
 import os
-import tempfile
 from moviepy.editor import (
     VideoFileClip, concatenate_videoclips, CompositeVideoClip, 
     ImageClip, AudioFileClip, afx
 )
 from PIL import Image
 from typing import List, Dict, Optional, Tuple
-from constants import VIDEO_FORMAT, DEFAULT_SETTINGS, UI_MESSAGES, IS_RAILWAY
+from constants import VIDEO_FORMAT, DEFAULT_SETTINGS, UI_MESSAGES, COMPOSITION_SETTINGS
 from video_analyzer import analyze_video_segments_with_face
 from video_normalizer import prepare_clips_for_concatenation, verify_clips_compatibility
 from face_detector import get_face_regions_for_crop
 from text_detector import detect_text_regions, remove_text_with_crop, remove_text_with_inpainting
-
-
-def smart_shuffle_clips(clips_by_video: Dict[int, List[VideoFileClip]]) -> List[VideoFileClip]:
-    """
-    Mélange intelligent en alternant entre les vidéos
-    
-    Args:
-        clips_by_video: Clips groupés par vidéo
-    
-    Returns:
-        List[VideoFileClip]: Clips mélangés
-    """
-    shuffled_clips = []
-    
-    # Créer des listes de clips par vidéo
-    video_clip_lists = list(clips_by_video.values())
-    
-    # Mélanger chaque liste individuellement
-    for clip_list in video_clip_lists:
-        random.shuffle(clip_list)
-    
-    # Alterner entre les vidéos
-    max_clips = max(len(clips) for clips in video_clip_lists)
-    
-    for i in range(max_clips):
-        for video_clips in video_clip_lists:
-            if i < len(video_clips):
-                shuffled_clips.append(video_clips[i])
-    
-    return shuffled_clips
+from ffmpeg_composer import compose_final_video
+from ffmpeg_concat import concat_intermediates
+from ffmpeg_utils import register_intermediate, get_intermediate_path, get_intermediate_format, intermediate_codec_args
+from video_probe import probe_video, video_issues
+from tagline_prep import append_tagline
+from encode_progress import moviepy_progress_logger
+from scratch_space import scratch_path
+from timeline_planner import smart_shuffle_clips
+from clip_readers import is_clip_descriptor, acquire_reader, close_readers, reader_metrics
+from frame_writer import write_clip_frames
+from encoder_profiles import moviepy_encoding_params
 
 
 def materialize_clip(clip: VideoFileClip, name: str = "clip") -> Optional[VideoFileClip]:
@@ -77,39 +56,23 @@ def materialize_clip(clip: VideoFileClip, name: str = "clip") -> Optional[VideoF
         return None
     
     try:
-        # Créer un fichier temporaire unique
-        temp_path = os.path.join(tempfile.gettempdir(), f"materialized_{name}_{int(time.time()*1000)}.mp4")
+        # Créer un fichier temporaire unique, au format intermédiaire configuré
+        fmt = get_intermediate_format(clip.duration)
+        temp_path = scratch_path(f"materialized_{name}", fmt['extension'], fast=True)
         
         st.info(f"💾 Matérialisation de {name} sur disque...")
         
-        # Test préalable d'accès aux frames
-        try:
-            test_frame = clip.get_frame(0)
-            if test_frame is None:
-                st.warning(f"⚠️ {name}: get_frame retourne None, tentative de récupération...")
-                # Essayer de recréer le clip
-                if hasattr(clip, 'filename'):
-                    st.info(f"🔄 Rechargement depuis {clip.filename}")
-                    clip = VideoFileClip(clip.filename)
-                else:
-                    st.error(f"❌ {name}: Impossible de récupérer le clip")
-                    return None
-        except Exception as e:
-            st.error(f"❌ {name}: Erreur test frame: {str(e)}")
-            return None
-        
-        # Écrire le clip sur disque avec des paramètres ultra-légers
-        clip.write_videofile(
-            temp_path,
-            codec='libx264',
-            preset='ultrafast',
-            fps=VIDEO_FORMAT['fps'],
-            audio=False,
-            logger=None,
-            verbose=False,
-            threads=2,
-            ffmpeg_params=['-crf', '23']  # Qualité légèrement réduite pour la vitesse
+        # Écrire le clip sur disque au format intermédiaire configuré
+        # (frames envoyées à ffmpeg depuis leur mémoire, sans copie en bytes)
+        written = write_clip_frames(
+            clip, temp_path, VIDEO_FORMAT['fps'], intermediate_codec_args(clip.duration)
         )
+        if not written['success']:
+            st.error(f"❌ {name}: Encodage échoué ({written['error']})")
+            clip.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
         
         # Fermer le clip original
         clip.close()
@@ -126,31 +89,17 @@ def materialize_clip(clip: VideoFileClip, name: str = "clip") -> Optional[VideoF
         
         st.success(f"✅ {name} matérialisé: {file_size_mb:.1f} MB")
         
-        # Recharger le clip depuis le disque
-        materialized = VideoFileClip(temp_path)
-        
-        # Valider le clip rechargé
-        if materialized.duration <= 0:
-            st.error(f"❌ {name}: Durée invalide après matérialisation")
-            materialized.close()
+        # Valider le fichier écrit sur ses métadonnées, puis le recharger
+        issues = video_issues(probe_video(temp_path))
+        if issues:
+            st.error(f"❌ {name}: Intermédiaire invalide après matérialisation ({', '.join(issues)})")
             os.remove(temp_path)
             return None
         
-        # Test final d'accès aux frames
-        try:
-            test_frame = materialized.get_frame(0)
-            if test_frame is None:
-                st.error(f"❌ {name}: Frames inaccessibles après matérialisation")
-                materialized.close()
-                os.remove(temp_path)
-                return None
-        except Exception as e:
-            st.error(f"❌ {name}: Test frame échoué après matérialisation: {str(e)}")
-            materialized.close()
-            os.remove(temp_path)
-            return None
+        materialized = VideoFileClip(temp_path)
         
         st.success(f"✅ {name} rechargé et validé (durée: {materialized.duration:.1f}s)")
+        register_intermediate(materialized, temp_path)
         return materialized
         
     except Exception as e:
@@ -163,15 +112,50 @@ def materialize_clip(clip: VideoFileClip, name: str = "clip") -> Optional[VideoF
         return None
 
 
+def intermediate_paths(clips: List) -> List[str]:
+    """
+    Fichiers intermédiaires des clips du montage, dans l'ordre
+    
+    Les descripteurs (render_segment) et les clips extraits par ffmpeg
+    désignent déjà un fichier ; les autres clips MoviePy sont matérialisés,
+    une seule fois même s'ils reviennent plusieurs fois dans le montage.
+    
+    Args:
+        clips: Descripteurs de clips ou clips MoviePy
+    
+    Returns:
+        List[str]: Chemins des fichiers intermédiaires
+    """
+    paths = []
+    materialized_by_clip = {}
+    for i, clip in enumerate(clips):
+        if is_clip_descriptor(clip):
+            paths.append(clip['path'])
+            continue
+        if get_intermediate_path(clip):
+            paths.append(get_intermediate_path(clip))
+            continue
+        if id(clip) not in materialized_by_clip:
+            materialized = materialize_clip(clip, f"clip_{i+1}")
+            materialized_by_clip[id(clip)] = get_intermediate_path(materialized) if materialized else None
+            if materialized:
+                materialized.close()
+        if materialized_by_clip[id(clip)]:
+            paths.append(materialized_by_clip[id(clip)])
+        else:
+            st.warning(f"⚠️ Clip {i+1} ignoré (échec matérialisation)")
+    return paths
+
+
 def safe_concatenate_with_materialization(
-    clips: List[VideoFileClip], 
+    clips: List, 
     method: str = "compose"
 ) -> Optional[VideoFileClip]:
     """
     Concaténation ultra-sécurisée avec matérialisation systématique
     
     Args:
-        clips: Liste des clips à concaténer
+        clips: Descripteurs de clips ou clips MoviePy à concaténer
         method: Méthode de concaténation
     
     Returns:
@@ -181,30 +165,48 @@ def safe_concatenate_with_materialization(
         st.error("❌ Aucun clip à concaténer")
         return None
     
-    if len(clips) == 1:
-        st.info("📹 Un seul clip, matérialisation directe")
-        return materialize_clip(clips[0], "single_clip")
-    
-    st.header("🔗 Concaténation sécurisée avec matérialisation")
-    
-    # ÉTAPE 1: Matérialiser TOUS les clips individuellement d'abord
-    st.info(f"💾 Matérialisation préalable de {len(clips)} clips...")
-    materialized_clips = []
-    
-    for i, clip in enumerate(clips):
-        materialized = materialize_clip(clip, f"clip_{i+1}")
-        if materialized:
-            materialized_clips.append(materialized)
-        else:
-            st.warning(f"⚠️ Clip {i+1} ignoré (échec matérialisation)")
-    
-    if not materialized_clips:
+    # Intermédiaires uniformes joints par le démultiplexeur concat (copie de flux)
+    paths = intermediate_paths(clips)
+    if not paths:
         st.error("❌ Aucun clip n'a pu être matérialisé")
         return None
     
-    st.success(f"✅ {len(materialized_clips)}/{len(clips)} clips matérialisés")
+    concat_path = concat_intermediates(
+        paths,
+        scratch_path("materialized_concat", '.mp4', fast=True)
+    )
+    if concat_path:
+        concatenated = VideoFileClip(concat_path)
+        register_intermediate(concatenated, concat_path)
+        st.success(f"✅ Clips concaténés sans réencodage (durée: {concatenated.duration:.1f}s)")
+        return concatenated
+    
+    st.warning("⚠️ Repli sur la concaténation MoviePy")
+    
+    # Lecteurs empruntés au pool le temps de la concaténation, puis fermés :
+    # materialize_clip ferme les lecteurs qu'il reçoit
+    readers = [acquire_reader(path) for path in paths]
+    try:
+        if len(readers) == 1:
+            st.info("📹 Un seul clip, matérialisation directe")
+            return materialize_clip(readers[0], "single_clip")
+        return _concatenate_readers(readers, method)
+    finally:
+        for path in set(paths):
+            close_readers(path)
+
+
+def _close_clip_readers(clips: List) -> None:
+    """Ferme les lecteurs du pool ouverts sur les intermédiaires de ces clips"""
+    for path in {clip['path'] for clip in clips if is_clip_descriptor(clip)}:
+        close_readers(path)
+
+
+def _concatenate_readers(readers: List[VideoFileClip], method: str) -> Optional[VideoFileClip]:
+    """Concaténation MoviePy de clips déjà adossés à des intermédiaires (repli)"""
+    st.header("🔗 Concaténation sécurisée avec matérialisation")
+    materialized_clips = list(readers)
     
-    # ÉTAPE 2: Concaténer les clips matérialisés
     st.info(f"🔗 Concaténation de {len(materialized_clips)} clips matérialisés...")
     
     try:
@@ -213,32 +215,13 @@ def safe_concatenate_with_materialization(
         
         if concatenated is None:
             st.error("❌ concatenate_videoclips a retourné None")
-            # Nettoyer
-            for clip in materialized_clips:
-                clip.close()
             return None
         
         st.success(f"✅ Clips concaténés (durée: {concatenated.duration:.1f}s)")
         
-        # ÉTAPE 3: Matérialiser immédiatement le résultat
+        # Matérialiser immédiatement le résultat
         st.info("💾 Matérialisation du résultat final...")
-        final_materialized = materialize_clip(concatenated, "final_concatenated")
-        
-        # Nettoyer les clips intermédiaires
-        for clip in materialized_clips:
-            try:
-                clip.close()
-                # Supprimer le fichier temporaire si possible
-                if hasattr(clip, 'filename') and os.path.exists(clip.filename):
-                    if 'materialized_' in clip.filename:
-                        os.remove(clip.filename)
-            except:
-                pass
-        
-        if concatenated != final_materialized:
-            concatenated.close()
-        
-        return final_materialized
+        return materialize_clip(concatenated, "final_concatenated")
         
     except Exception as e:
         st.error(f"❌ Erreur concaténation: {str(e)}")
@@ -266,9 +249,10 @@ def safe_concatenate_with_materialization(
                                     new_clips.append(pair_materialized)
                                 pair_concat.close()
                             
-                            # Fermer les clips de la paire
-                            pair[0].close()
-                            pair[1].close()
+                            # Fermer les paires intermédiaires (les lecteurs du pool sont fermés par l'appelant)
+                            for clip in pair:
+                                if clip not in readers:
+                                    clip.close()
                         else:
                             # Clip impair restant
                             new_clips.append(materialized_clips[i])
@@ -277,23 +261,69 @@ def safe_concatenate_with_materialization(
                     
                     if len(materialized_clips) == 1:
                         st.success("✅ Concaténation par paires réussie")
-                        return materialized_clips[0]
+                        break
                 
             except Exception as e2:
                 st.error(f"❌ Échec concaténation par paires: {str(e2)}")
         
         # Dernier recours: retourner le premier clip
         if materialized_clips:
-            st.warning("⚠️ Retour du premier clip seulement")
+            if len(materialized_clips) > 1:
+                st.warning("⚠️ Retour du premier clip seulement")
             for clip in materialized_clips[1:]:
-                clip.close()
-            return materialized_clips[0]
+                if clip not in readers:
+                    clip.close()
+            first = materialized_clips[0]
+            # Un lecteur du pool est fermé par l'appelant : le matérialiser à part
+            return materialize_clip(first, "first_clip") if first in readers else first
         
         return None
 
 
+def reencode_with_tagline(
+    video_path: str,
+    tagline_path: str,
+    output_path: str,
+    encoding_params: Dict
+) -> bool:
+    """
+    Ajoute la tagline en réencodant toute la vidéo (repli de la copie de flux)
+    
+    Args:
+        video_path: Vidéo finale sans tagline
+        tagline_path: Chemin de la tagline
+        output_path: Vidéo finale avec tagline
+        encoding_params: Paramètres d'encodage MoviePy
+    
+    Returns:
+        bool: True si la vidéo a été écrite
+    """
+    from video_extractor import add_tagline
+    video = VideoFileClip(video_path)
+    try:
+        with_tagline = add_tagline(video, tagline_path)
+        params = dict(encoding_params)
+        params['logger'] = moviepy_progress_logger(
+            "Réencodage avec tagline", with_tagline.duration, VIDEO_FORMAT['fps']
+        )
+        if with_tagline.audio is not None:
+            params.pop('audio', None)
+            params.update({'audio_codec': 'aac', 'audio_bitrate': '128k'})
+        with_tagline.write_videofile(
+            output_path,
+            **params,
+            temp_audiofile=output_path.replace('.mp4', '_temp_audio.m4a')
+        )
+        return os.path.exists(output_path)
+    except Exception as e:
+        st.error(f"❌ Erreur ajout tagline: {str(e)}")
+        return False
+    finally:
+        video.close()
+
+
 def create_final_video_ultra_safe(
-    clips: List[VideoFileClip],
+    clips: List,
     output_path: str,
     shuffle: bool = True,
     smart_shuffle: bool = True,
@@ -301,10 +331,14 @@ def create_final_video_ultra_safe(
     logo_config: Optional[Dict] = None,
     audio_config: Optional[Dict] = None,
     tagline_path: Optional[str] = None,
-    output_duration: Optional[float] = None
+    output_duration: Optional[float] = None,
+    max_size_mb: Optional[float] = None
 ) -> bool:
     """
     Version ultra-sécurisée avec matérialisation systématique
+
+    La taille cible (max_size_mb) n'est tenue que par la composition ffmpeg ;
+    le repli MoviePy encode avec le profil final.
     """
     import gc
     
@@ -319,16 +353,46 @@ def create_final_video_ultra_safe(
         
         # Mélanger si demandé
         if smart_shuffle and clips_by_video and len(clips_by_video) > 1:
-            # Utiliser la fonction smart_shuffle_clips définie localement
             clips = smart_shuffle_clips(clips_by_video)
             st.info("🔀 Mélange intelligent appliqué")
         elif shuffle:
             random.shuffle(clips)
             st.info("🔀 Clips mélangés aléatoirement")
         
-        # Préparation et normalisation
-        st.info("🔧 Préparation des clips...")
-        prepared_clips = prepare_clips_for_concatenation(clips)
+        # Composition en une passe ffmpeg : un seul encodage pour tout le montage
+        if COMPOSITION_SETTINGS['backend'] == 'ffmpeg':
+            paths = intermediate_paths(clips)
+            if not paths:
+                st.error("❌ Aucun clip exploitable")
+                return False
+            
+            composed = compose_final_video(
+                paths,
+                output_path,
+                output_duration=output_duration,
+                logo_config=logo_config,
+                audio_config=audio_config,
+                tagline_path=tagline_path,
+                max_size_mb=max_size_mb
+            )
+            if composed:
+                # Descripteurs : lecteurs éventuels de ce montage fermés par le pool
+                for clip in clips:
+                    if not is_clip_descriptor(clip):
+                        clip.close()
+                _close_clip_readers(clips)
+                gc.collect()
+                return True
+            
+            st.warning("⚠️ Repli sur l'assemblage MoviePy")
+        
+        # Préparation et normalisation (les descripteurs désignent des
+        # intermédiaires déjà au format, harmonisés si besoin par concat_intermediates)
+        if all(is_clip_descriptor(clip) for clip in clips):
+            prepared_clips = clips
+        else:
+            st.info("🔧 Préparation des clips...")
+            prepared_clips = prepare_clips_for_concatenation(clips)
         
         if not prepared_clips:
             st.error("❌ Échec de la préparation des clips")
@@ -344,20 +408,12 @@ def create_final_video_ultra_safe(
             st.error("❌ Échec de l'assemblage des clips")
             return False
         
-        # Test de validité finale
-        try:
-            test_frame = final_video.get_frame(0)
-            if test_frame is None:
-                st.error("❌ La vidéo finale n'est pas fonctionnelle")
-                final_video.close()
-                return False
-            
-            st.success(f"✅ Vidéo assemblée et validée (durée: {final_video.duration:.1f}s)")
-            
-        except Exception as e:
-            st.error(f"❌ Erreur validation vidéo finale: {str(e)}")
+        # Test de validité finale (métadonnées, sans décodage)
+        if not final_video.duration or final_video.duration <= 0:
+            st.error("❌ La vidéo finale n'est pas fonctionnelle")
             final_video.close()
             return False
+        st.success(f"✅ Vidéo assemblée et validée (durée: {final_video.duration:.1f}s)")
         
         # Ajuster la durée si nécessaire
         if output_duration and not (audio_config and audio_config.get('adapt_to_audio')):
@@ -395,44 +451,26 @@ def create_final_video_ultra_safe(
         else:
             final_video = final_video.without_audio()
         
-        # Ajouter la tagline si configurée
-        if tagline_path and os.path.exists(tagline_path):
-            st.info("🏷️ Ajout de la tagline...")
-            try:
-                from video_extractor import add_tagline
-                final_video = add_tagline(final_video, tagline_path)
-                # Matérialiser après ajout tagline
-                final_video = materialize_clip(final_video, "final_with_tagline")
-                if not final_video:
-                    st.warning("⚠️ Tagline non ajoutée (échec matérialisation)")
-            except Exception as e:
-                st.warning(f"⚠️ Erreur ajout tagline: {str(e)}")
+        # La tagline (encodée une fois, en cache) est ajoutée après l'encodage
+        # final par copie de flux, sans réencoder le montage
+        append_tagline_after = bool(tagline_path and os.path.exists(tagline_path))
         
         # Test final avant encodage
-        try:
-            test_frame = final_video.get_frame(0)
-            if test_frame is None:
-                st.error("❌ Vidéo finale non fonctionnelle avant encodage")
-                final_video.close()
-                return False
-            st.success("✅ Vidéo finale validée pour encodage")
-        except Exception as e:
-            st.error(f"❌ Erreur test final: {str(e)}")
+        if not final_video.duration or final_video.duration <= 0 or min(final_video.size) <= 0:
+            st.error(f"❌ Vidéo finale non fonctionnelle avant encodage ({final_video.size}, {final_video.duration:.1f}s)")
             final_video.close()
             return False
+        st.success("✅ Vidéo finale validée pour encodage")
         
         # Encodage final
         st.info("💾 Encodage de la vidéo finale...")
         
         encoding_params = {
-            'codec': 'libx264',
+            **moviepy_encoding_params('final'),
             'fps': VIDEO_FORMAT['fps'],
-            'preset': 'ultrafast' if IS_RAILWAY else 'fast',
-            'threads': 2 if IS_RAILWAY else 4,
             'logger': None,
             'verbose': False,
             'write_logfile': False,
-            'bitrate': '4000k' if IS_RAILWAY else '6000k',
         }
         
         if final_video.audio is not None:
@@ -441,18 +479,34 @@ def create_final_video_ultra_safe(
         else:
             encoding_params['audio'] = False
         
-        # Progress bar
+        # Progression frame par frame (barre proglog de MoviePy)
         progress_bar = st.progress(0)
         progress_text = st.empty()
+        encoding_params['logger'] = moviepy_progress_logger(
+            "Encodage final", final_video.duration, VIDEO_FORMAT['fps'], progress_bar, progress_text
+        )
         
         try:
             # Écrire la vidéo finale
+            write_path = f"{os.path.splitext(output_path)[0]}_main.mp4" if append_tagline_after else output_path
             final_video.write_videofile(
-                output_path,
+                write_path,
                 **encoding_params,
-                temp_audiofile=output_path.replace('.mp4', '_temp_audio.m4a')
+                temp_audiofile=write_path.replace('.mp4', '_temp_audio.m4a')
             )
             
+            if append_tagline_after:
+                st.info("🏷️ Ajout de la tagline...")
+                has_soundtrack = bool(audio_config and audio_config.get('audio_path'))
+                try:
+                    if not append_tagline(write_path, tagline_path, output_path,
+                                          keep_tagline_audio=not has_soundtrack):
+                        st.warning("⚠️ Copie de flux impossible, réencodage avec la tagline")
+                        reencode_with_tagline(write_path, tagline_path, output_path, encoding_params)
+                finally:
+                    if os.path.exists(write_path):
+                        os.remove(write_path)
+            
             progress_bar.progress(100)
             progress_text.text("✅ Encodage terminé!")
             
@@ -491,9 +545,13 @@ def create_final_video_ultra_safe(
                     except:
                         pass
             
-            # Forcer la libération mémoire
+            # Fermer les lecteurs de ce montage restés dans le pool (le pool est
+            # partagé : ceux des autres sessions restent ouverts)
+            _close_clip_readers(clips)
+            metrics = reader_metrics()
+            st.info(f"🧹 Mémoire libérée - lecteurs vidéo: {metrics['opened']} ouvert(s) au total, "
+                    f"{metrics['peak_open']} simultanément au plus")
             gc.collect()
-            st.info("🧹 Mémoire libérée")
         
         return True
         
@@ -4,6 +4,8 @@ Module d'EXTRACTION de clips vidéo
 Ce module gère l'extraction des meilleurs moments depuis les vidéos sources.
 
 Fonctions principales :
+- select_best_segments : Analyse une vidéo et sélectionne ses meilleurs segments (sans rendu)
+- render_segment : Rend un segment planifié au format vertical (ffmpeg ou MoviePy)
 - extract_best_clips_with_face : Extrait les meilleurs clips avec détection faciale
 - resize_and_center_vertical : Redimensionne au format 9:16
 - add_logo_overlay : Ajoute un logo sur la vidéo
@@ -15,15 +17,24 @@ import numpy as np
 import streamlit as st
 import random
 from moviepy.editor import (
-    VideoFileClip, concatenate_videoclips, CompositeVideoClip, 
-    ImageClip, AudioFileClip, afx
+    VideoFileClip, concatenate_videoclips, AudioFileClip, afx
 )
-from PIL import Image
 from typing import List, Dict, Optional, Tuple
 from constants import VIDEO_FORMAT, DEFAULT_SETTINGS, UI_MESSAGES, IS_RAILWAY
 from video_analyzer import analyze_video_segments_with_face
 from face_detector import get_face_regions_for_crop
 from text_detector import detect_text_regions, remove_text_with_crop, remove_text_with_inpainting
+from crop_planner import compute_crop_window, is_full_frame
+from frame_transform import apply_crop_resize
+from ffmpeg_extractor import needs_python_frame_processing, extract_segment
+from video_probe import probe_video, probe_audio
+from ffmpeg_utils import get_intermediate_path, get_intermediate_format
+from logo_overlay import prepare_logo, logo_position, blend_logo
+from audio_prep import prepare_soundtrack
+from encode_progress import moviepy_progress_logger
+from scratch_space import current_job, scratch_path
+from clip_readers import make_clip_descriptor
+from encoder_profiles import stage_profile, moviepy_encoding_params
 
 def resize_and_center_vertical(
     clip: VideoFileClip,
@@ -58,7 +69,6 @@ def resize_and_center_vertical(
     
     target_width = VIDEO_FORMAT['width']
     target_height = VIDEO_FORMAT['height']
-    target_ratio = VIDEO_FORMAT['ratio']
     
     # Si on doit enlever le texte, le faire frame par frame
     if remove_text_method and text_net is not None:
@@ -77,102 +87,19 @@ def resize_and_center_vertical(
     
     # Dimensions originales
     orig_w, orig_h = clip.size
-    orig_ratio = orig_w / orig_h
-    
-    # Fonction de resize avec Lanczos
-    def apply_lanczos_resize(frame):
-        """
-        Applique un resize Lanczos de haute qualité à chaque frame
-        """
-        # Validation pour éviter les erreurs avec des frames None
-        if frame is None:
-            st.error("❌ Frame None détecté dans Lanczos resize!")
-            # Retourner une frame noire de la bonne taille
-            return np.zeros((target_height, target_width, 3), dtype=np.uint8)
-        
-        try:
-            # Vérifier que la frame a la bonne forme
-            if not isinstance(frame, np.ndarray) or len(frame.shape) != 3:
-                st.error(f"❌ Frame invalide: type={type(frame)}, shape={getattr(frame, 'shape', 'N/A')}")
-                return np.zeros((target_height, target_width, 3), dtype=np.uint8)
-            
-            # Utiliser cv2.INTER_LANCZOS4 pour la meilleure qualité
-            result = cv2.resize(frame, (target_width, target_height), interpolation=cv2.INTER_LANCZOS4)
-            return result
-        except Exception as e:
-            st.error(f"❌ Erreur Lanczos resize: {str(e)}")
-            return np.zeros((target_height, target_width, 3), dtype=np.uint8)
-    
-    # Si déjà au bon ratio
-    if abs(orig_ratio - target_ratio) < 0.1:
-        if use_lanczos:
-            clip = clip.fl_image(apply_lanczos_resize)
-        else:
-            clip = clip.resize((target_width, target_height))
-    
-    # Si horizontal (plus large que haut)
-    elif orig_ratio > target_ratio:
-        new_height = orig_h
-        new_width = int(orig_h * target_ratio)
-        
-        # Centrer sur les visages si disponibles
-        if face_regions and len(face_regions) > 0:
-            face_centers_x = [(r['x'] + r['width']//2) for r in face_regions]
-            avg_x = sum(face_centers_x) // len(face_centers_x)
-            x_start = avg_x - new_width // 2
-            x_start = max(0, min(x_start, orig_w - new_width))
-        else:
-            x_start = (orig_w - new_width) // 2
-        
-        # Cropper d'abord
-        clip = clip.crop(x1=x_start, y1=0, x2=x_start + new_width, y2=orig_h)
-        
-        # Puis resize avec Lanczos ou méthode standard
-        if use_lanczos:
-            clip = clip.fl_image(apply_lanczos_resize)
-        else:
-            clip = clip.resize((target_width, target_height))
     
-    # Si trop vertical
-    else:
-        new_width = orig_w
-        new_height = int(orig_w / target_ratio)
-        
-        # Garder les visages dans le cadre
-        if face_regions and len(face_regions) > 0:
-            face_tops = [r['y'] for r in face_regions]
-            face_bottoms = [r['y'] + r['height'] for r in face_regions]
-            min_y = min(face_tops)
-            max_y = max(face_bottoms)
-            
-            face_center_y = (min_y + max_y) // 2
-            y_start = face_center_y - new_height // 2
-            
-            if y_start < 0:
-                y_start = 0
-            elif y_start + new_height > orig_h:
-                y_start = orig_h - new_height
-            
-            if max_y - min_y > new_height * 0.8:
-                y_start = max(0, min_y - int(new_height * 0.1))
-        else:
-            y_start = (orig_h - new_height) // 2
-        
-        # Cropper d'abord
-        clip = clip.crop(x1=0, y1=y_start, x2=orig_w, y2=y_start + new_height)
-        
-        # Puis resize avec Lanczos ou méthode standard
-        if use_lanczos:
-            clip = clip.fl_image(apply_lanczos_resize)
-        else:
-            clip = clip.resize((target_width, target_height))
+    # Crop (partagé avec l'extraction ffmpeg) et resize fusionnés : une vue de
+    # la fenêtre redimensionnée dans un tampon réutilisé, sans copie intermédiaire
+    crop = compute_crop_window(orig_w, orig_h, face_regions)
+    if not (is_full_frame(crop, orig_w, orig_h) and (orig_w, orig_h) == (target_width, target_height)):
+        clip = apply_crop_resize(clip, crop, (target_width, target_height), use_lanczos=use_lanczos)
     
     # Retirer l'audio
     clip = clip.without_audio()
     
     return clip
 
-def extract_best_clips_with_face(
+def select_best_segments(
     video_path: str,
     target_face_encoding: Optional[np.ndarray] = None,
     max_clips_per_video: int = 3,
@@ -185,12 +112,12 @@ def extract_best_clips_with_face(
     face_detection_only: bool = False,
     remove_text_method: Optional[str] = None,
     smart_crop: bool = True,
-    use_lanczos: bool = False,  # Désactivé par défaut, surtout sur Railway
     exclude_first_seconds: float = 0,
-    face_threshold: float = 0.4
-) -> List[VideoFileClip]:
+    face_threshold: float = 0.4,
+    reserve_clips: int = 0
+) -> List[Dict]:
     """
-    Extrait les meilleurs clips d'une vidéo
+    Analyse une vidéo et sélectionne ses meilleurs segments sans rien rendre
     
     Args:
         video_path: Chemin de la vidéo
@@ -205,9 +132,10 @@ def extract_best_clips_with_face(
         face_detection_only: Extraire uniquement avec visage cible
         remove_text_method: Méthode de suppression de texte
         smart_crop: Crop intelligent sur les visages
+        reserve_clips: Segments suivants à retourner en réserve (marqués 'reserve')
     
     Returns:
-        List[VideoFileClip]: Liste des clips extraits
+        List[Dict]: Segments sélectionnés (source, bornes, fenêtre de crop, score)
     """
     video = VideoFileClip(video_path)
     duration = video.duration
@@ -227,7 +155,7 @@ def extract_best_clips_with_face(
         face_threshold=face_threshold
     )
     
-    clips = []
+    segments = []
     
     # OPTIMISATIONS SPÉCIFIQUES RAILWAY
     if IS_RAILWAY:
@@ -237,131 +165,234 @@ def extract_best_clips_with_face(
     else:
         st.info(f"💻 Mode local: {max_clips_per_video} clips par vidéo maximum")
     
-    for i, segment in enumerate(best_segments[:max_clips_per_video]):
-        # Filtrer si nécessaire
-        if face_detection_only and target_face_encoding is not None:
-            if not segment.get('has_target_face', False):
-                st.info(f"🚫 Segment {i+1} ignoré: pas de visage cible")
-                continue
-        
-        try:
+    try:
+        for i, segment in enumerate(best_segments[:max_clips_per_video + reserve_clips]):
+            # Filtrer si nécessaire
+            if face_detection_only and target_face_encoding is not None:
+                if not segment.get('has_target_face', False):
+                    st.info(f"🚫 Segment {i+1} ignoré: pas de visage cible")
+                    continue
+            
             # Vérifications
             if segment['start'] >= duration:
                 st.warning(f"Clip {i+1} ignoré: début après la fin de la vidéo")
                 continue
             
-            if segment['end'] > duration:
-                segment['end'] = duration
-            
             actual_start = max(0, segment['start'])
             actual_end = min(segment['end'], duration)
             
-            if actual_end > actual_start and actual_end - actual_start >= 1:
-                st.info(f"🎬 Création subclip {i+1}: {actual_start:.1f}s à {actual_end:.1f}s")
-                clip = video.subclip(actual_start, actual_end)
-                
-                # VALIDATION CRITIQUE du clip créé
-                if clip is None:
-                    st.error(f"❌ ERREUR: video.subclip() a retourné None pour clip {i+1}")
-                    continue
-                    
-                st.success(f"✅ Subclip {i+1} créé avec succès (durée: {clip.duration:.1f}s)")
-                
-                # Détection des visages pour le crop intelligent
-                face_regions = []
-                if smart_crop:
-                    try:
-                        st.info(f"🎯 Test d'accès frame pour crop intelligent clip {i+1}...")
-                        frame = clip.get_frame(0.1)
-                        if frame is None:
-                            st.warning(f"⚠️ Frame None retournée par clip {i+1}.get_frame(0.1)")
-                        else:
-                            st.success(f"✅ Frame OK pour clip {i+1}, shape: {frame.shape}")
-                            face_regions = get_face_regions_for_crop(frame, target_face_encoding, face_threshold)
-                            
-                            if face_regions:
-                                st.success(f"   🎯 {len(face_regions)} visage(s) détecté(s) pour le crop intelligent")
-                    except Exception as e:
-                        st.error(f"   ❌ ERREUR crop intelligent clip {i+1}: {str(e)}")
-                        st.warning(f"   ⚠️ Crop intelligent désactivé pour clip {i+1}")
-                
-                # Convertir au format vertical
+            if actual_end <= actual_start or actual_end - actual_start < 1:
+                continue
+            
+            # Détection des visages pour le crop intelligent
+            face_regions = []
+            if smart_crop:
                 try:
-                    # Vérifier que le clip est valide avant le resize
-                    if clip is None or not hasattr(clip, 'get_frame'):
-                        st.error(f"❌ Clip {i+1} invalide avant resize")
-                        continue
-                    
-                    # Tester l'accès à une frame pour valider le clip
-                    try:
-                        test_frame = clip.get_frame(0)
-                        if test_frame is None:
-                            st.error(f"❌ Clip {i+1} retourne des frames None")
-                            clip.close()
-                            continue
-                    except Exception as e:
-                        st.error(f"❌ Impossible d'accéder aux frames du clip {i+1}: {str(e)}")
-                        clip.close()
-                        continue
-                    
-                    clip = resize_and_center_vertical(
-                        clip,
-                        remove_text_method=remove_text_method if remove_text_method else None,
-                        text_net=text_net if remove_text_method else None,
-                        face_regions=face_regions if smart_crop else None,
-                        use_lanczos=use_lanczos
-                    )
-                    
-                    # HARMONISATION DES FORMATS pour vidéos uploadées mixtes
-                    if clip is not None:
-                        try:
-                            # Standardiser le FPS au format cible
-                            target_fps = VIDEO_FORMAT['fps']
-                            if hasattr(clip, 'fps') and clip.fps != target_fps:
-                                st.info(f"🔄 Harmonisation FPS clip {i+1}: {clip.fps} → {target_fps}")
-                                clip = clip.set_fps(target_fps)
-                            
-                            # S'assurer que le clip n'a pas d'audio (éviter les conflicts)
-                            if hasattr(clip, 'audio') and clip.audio is not None:
-                                clip = clip.without_audio()
-                                st.info(f"🔇 Audio retiré du clip {i+1}")
-                            
-                            # Validation finale du clip harmonisé
-                            if clip is not None and hasattr(clip, 'duration') and clip.duration > 0:
-                                # Test de frame pour s'assurer que le clip est fonctionnel
-                                test_frame = clip.get_frame(0.1)
-                                if test_frame is not None:
-                                    clips.append(clip)
-                                    st.success(f"✅ Clip {i+1} harmonisé et validé (FPS: {clip.fps})")
-                                else:
-                                    st.warning(f"⚠️ Clip {i+1} retourne frame None après harmonisation")
-                                    clip.close()
-                            else:
-                                st.warning(f"⚠️ Clip {i+1} invalide après harmonisation")
-                                if clip:
-                                    clip.close()
-                                    
-                        except Exception as e:
-                            st.error(f"❌ Erreur harmonisation clip {i+1}: {str(e)}")
-                            if clip:
-                                clip.close()
+                    frame = video.get_frame(min(actual_start + 0.1, actual_end))
+                    if frame is None:
+                        st.warning(f"⚠️ Frame None retournée pour le segment {i+1}")
                     else:
-                        st.warning(f"⚠️ Clip {i+1} invalide après conversion")
+                        face_regions = get_face_regions_for_crop(frame, target_face_encoding, face_threshold)
+                        
+                        if face_regions:
+                            st.success(f"   🎯 {len(face_regions)} visage(s) détecté(s) pour le crop intelligent")
                 except Exception as e:
-                    st.error(f"❌ Erreur conversion clip {i+1}: {str(e)}")
-                    if 'clip' in locals() and clip:
-                        try:
-                            clip.close()
-                        except:
-                            pass
-                
-                # Afficher les infos
-                face_indicator = "👤" if segment.get('has_target_face', False) else ""
-                text_indicator = "📝" if avoid_text and text_net is not None else ""
-                st.info(f"📹 Clip {i+1}: {segment['start']:.1f}s - {segment['end']:.1f}s (Score: {segment['score']:.0f}) {face_indicator} {text_indicator}")
-                
-        except Exception as e:
-            st.warning(f"Impossible d'extraire le clip {i+1}: {str(e)}")
+                    st.error(f"   ❌ ERREUR crop intelligent segment {i+1}: {str(e)}")
+                    st.warning(f"   ⚠️ Crop intelligent désactivé pour segment {i+1}")
+            
+            segments.append({
+                'source_path': video_path,
+                'source_size': tuple(video.size),
+                'start': actual_start,
+                'end': actual_end,
+                'crop': compute_crop_window(video.w, video.h, face_regions),
+                'face_regions': face_regions,
+                'video_index': video_index,
+                'clip_index': i,
+                'score': segment['score'],
+                'has_target_face': segment.get('has_target_face', False),
+                'reserve': i >= max_clips_per_video
+            })
+            
+            # Afficher les infos
+            face_indicator = "👤" if segment.get('has_target_face', False) else ""
+            text_indicator = "📝" if avoid_text and text_net is not None else ""
+            reserve_indicator = "(réserve)" if i >= max_clips_per_video else ""
+            st.info(f"📹 Segment {i+1}: {actual_start:.1f}s - {actual_end:.1f}s (Score: {segment['score']:.0f}) {face_indicator} {text_indicator} {reserve_indicator}")
+    finally:
+        video.close()
+    
+    return segments
+
+def render_segment(
+    segment: Dict,
+    output_dir: Optional[str] = None,
+    use_lanczos: bool = False,
+    remove_text_method: Optional[str] = None,
+    text_net: Optional[cv2.dnn_Net] = None
+) -> Optional[Dict]:
+    """
+    Rend un segment sélectionné au format vertical 9:16
+    
+    Sans traitement frame par frame, le rendu passe entièrement par ffmpeg
+    (copie de flux ou réencodage) ; sinon, chaîne MoviePy avec suppression du
+    texte, écrite dans un intermédiaire. Aucun lecteur ne reste ouvert : le
+    clip est décrit par son fichier (clip_readers).
+    
+    Args:
+        segment: Segment issu de select_best_segments (éventuellement raccourci)
+        output_dir: Répertoire des clips intermédiaires
+        use_lanczos: Utiliser Lanczos pour le resize
+        remove_text_method: Méthode de suppression de texte
+        text_net: Modèle de détection de texte
+    
+    Returns:
+        Dict: Descripteur du clip rendu (make_clip_descriptor) ou None si échec
+    """
+    if output_dir is None:
+        output_dir = current_job()
+    
+    video_path = segment['source_path']
+    start, end = segment['start'], segment['end']
+    label = f"v{segment['video_index']}_c{segment['clip_index']+1}"
+    
+    # Extraction native ffmpeg (seek + crop + scale + fps en une passe)
+    if not needs_python_frame_processing(remove_text_method, text_net):
+        extension = get_intermediate_format(end - start)['extension']
+        intermediate_path = scratch_path(f"extracted_{label}", extension, job_dir=output_dir)
+        extracted = extract_segment(
+            video_path, start, end, segment['crop'],
+            intermediate_path, use_lanczos=use_lanczos,
+            source_info=probe_video(video_path)
+        )
+        if extracted:
+            # Bornes planifiées inchangées : l'allongement éventuel de la copie
+            # (images clés extérieures) est décrit par le descripteur
+            info = probe_video(extracted['path'])
+            duration = info['duration'] if info else extracted['end'] - extracted['start']
+            if extracted['method'] == 'copy':
+                st.success(f"✅ Clip {label} découpé par copie de flux, sans réencodage "
+                           f"(calé sur images clés: {extracted['start']:.2f}s → {extracted['end']:.2f}s)")
+            else:
+                st.success(f"✅ Clip {label} réencodé par ffmpeg (durée: {duration:.1f}s)")
+            return make_clip_descriptor(extracted['path'], segment, duration, extracted['method'],
+                                        bounds=(extracted['start'], extracted['end']))
+        st.warning(f"⚠️ Clip {label}: repli sur le rendu MoviePy")
+    
+    # Convertir au format vertical (rendu MoviePy), puis écrire l'intermédiaire
+    from video_assembler import materialize_clip
+    source = None
+    clip = None
+    try:
+        source = VideoFileClip(video_path)
+        clip = source.subclip(start, end)
+        
+        clip = resize_and_center_vertical(
+            clip,
+            remove_text_method=remove_text_method,
+            text_net=text_net if remove_text_method else None,
+            face_regions=segment.get('face_regions') or None,
+            use_lanczos=use_lanczos
+        )
+        if clip is None:
+            st.warning(f"⚠️ Clip {label} invalide après conversion")
+            return None
+        
+        # HARMONISATION DES FORMATS pour vidéos uploadées mixtes
+        target_fps = VIDEO_FORMAT['fps']
+        if hasattr(clip, 'fps') and clip.fps != target_fps:
+            st.info(f"🔄 Harmonisation FPS clip {label}: {clip.fps} → {target_fps}")
+            clip = clip.set_fps(target_fps)
+        
+        materialized = materialize_clip(clip, label)
+        if materialized is None:
+            st.warning(f"⚠️ Clip {label} invalide après harmonisation")
+            return None
+        
+        path, duration = get_intermediate_path(materialized), materialized.duration
+        materialized.close()
+        st.success(f"✅ Clip {label} harmonisé et validé (FPS: {target_fps})")
+        return make_clip_descriptor(path, segment, duration, 'moviepy')
+        
+    except Exception as e:
+        st.error(f"❌ Erreur conversion clip {label}: {str(e)}")
+        return None
+    finally:
+        # La source et ses lecteurs (vidéo et audio) sont fermés dans tous les cas
+        for opened in (clip, source):
+            if opened is not None:
+                try:
+                    opened.close()
+                except:
+                    pass
+
+def extract_best_clips_with_face(
+    video_path: str,
+    target_face_encoding: Optional[np.ndarray] = None,
+    max_clips_per_video: int = 3,
+    min_clip_duration: float = 3,
+    max_clip_duration: float = 8,
+    video_index: int = 0,
+    analysis_mode: str = "🎯 Précis (3-5 min)",
+    avoid_text: bool = False,
+    text_net: Optional[cv2.dnn_Net] = None,
+    face_detection_only: bool = False,
+    remove_text_method: Optional[str] = None,
+    smart_crop: bool = True,
+    use_lanczos: bool = False,  # Désactivé par défaut, surtout sur Railway
+    exclude_first_seconds: float = 0,
+    face_threshold: float = 0.4,
+    output_dir: Optional[str] = None
+) -> List[Dict]:
+    """
+    Extrait les meilleurs clips d'une vidéo (sélection puis rendu de chaque segment)
+    
+    Args:
+        video_path: Chemin de la vidéo
+        target_face_encoding: Encoding du visage cible
+        max_clips_per_video: Nombre max de clips
+        min_clip_duration: Durée min d'un clip
+        max_clip_duration: Durée max d'un clip
+        video_index: Index de la vidéo
+        analysis_mode: Mode d'analyse
+        avoid_text: Éviter le texte
+        text_net: Modèle de détection de texte
+        face_detection_only: Extraire uniquement avec visage cible
+        remove_text_method: Méthode de suppression de texte
+        smart_crop: Crop intelligent sur les visages
+        output_dir: Répertoire des clips intermédiaires (extraction ffmpeg)
+    
+    Returns:
+        List[Dict]: Descripteurs des clips extraits
+    """
+    segments = select_best_segments(
+        video_path,
+        target_face_encoding=target_face_encoding,
+        max_clips_per_video=max_clips_per_video,
+        min_clip_duration=min_clip_duration,
+        max_clip_duration=max_clip_duration,
+        video_index=video_index,
+        analysis_mode=analysis_mode,
+        avoid_text=avoid_text,
+        text_net=text_net,
+        face_detection_only=face_detection_only,
+        remove_text_method=remove_text_method,
+        smart_crop=smart_crop,
+        exclude_first_seconds=exclude_first_seconds,
+        face_threshold=face_threshold
+    )
+    
+    clips = []
+    for segment in segments:
+        clip = render_segment(
+            segment,
+            output_dir=output_dir,
+            use_lanczos=use_lanczos,
+            remove_text_method=remove_text_method,
+            text_net=text_net
+        )
+        if clip is not None:
+            clips.append(clip)
     
     return clips
 
@@ -390,27 +421,16 @@ def add_logo_overlay(
         VideoFileClip: Vidéo avec logo
     """
     try:
-        # Charger et redimensionner le logo
-        logo_img = Image.open(logo_path)
-        video_width = VIDEO_FORMAT['width']
-        logo_width = int(video_width * size_percent / 100)
-        logo_height = int(logo_img.height * (logo_width / logo_img.width))
-        
-        # Créer le clip du logo
-        logo_clip = ImageClip(logo_path).resize((logo_width, logo_height))
-        logo_clip = logo_clip.set_duration(video.duration)
-        logo_clip = logo_clip.set_opacity(opacity)
-        
-        # Positionner le logo
-        if position == "Haut gauche":
-            logo_clip = logo_clip.set_position((margin, vertical_position))
-        elif position == "Haut droite":
-            logo_clip = logo_clip.set_position((video_width - logo_width - margin, vertical_position))
-        else:  # Haut centre
-            logo_clip = logo_clip.set_position(((video_width - logo_width) // 2, vertical_position))
-        
-        # Composer
-        video = CompositeVideoClip([video, logo_clip])
+        # Logo redimensionné et prémultiplié une seule fois (cache disque)
+        logo = prepare_logo(logo_path, size_percent, opacity)
+        if logo is None:
+            st.warning("⚠️ Impossible d'ajouter le logo: fichier illisible")
+            return video
+        
+        x, y = logo_position(position, logo['width'], margin, vertical_position)
+        
+        # Mélange limité à la zone du logo, frame par frame
+        video = video.fl_image(lambda frame: blend_logo(frame, logo, x, y))
         st.success("✅ Logo ajouté en overlay!")
         
     except Exception as e:
@@ -436,48 +456,49 @@ def add_audio_to_video(
         volume: Volume de l'audio
         fade_in: Durée du fondu d'entrée
         fade_out: Durée du fondu de sortie
-        adapt_to_audio: Adapter la durée de la vidéo à l'audio
+        adapt_to_audio: Couper la vidéo planifiée à la durée de l'audio
         extra_seconds: Secondes supplémentaires après l'audio
     
     Returns:
         VideoFileClip: Vidéo avec audio
     """
     try:
-        # Charger l'audio
-        audio_clip = AudioFileClip(audio_path)
-        
-        # Ajuster le volume
-        audio_clip = audio_clip.volumex(volume)
-        
-        # Appliquer les fondus
-        if fade_in > 0:
-            audio_clip = audio_clip.audio_fadein(fade_in)
-        if fade_out > 0:
-            audio_clip = audio_clip.audio_fadeout(fade_out)
-        
-        # Gérer la durée
+        # Gérer la durée (durée de l'audio lue par ffprobe, sans décoder)
         video_duration = video.duration
-        audio_duration = audio_clip.duration
+        audio_info = probe_audio(audio_path)
+        audio_duration = audio_info['duration'] if audio_info else AudioFileClip(audio_path).duration
         
         if adapt_to_audio:
             target_duration = audio_duration + extra_seconds
             
+            # Le montage est déjà planifié à la durée de l'audio (réserve,
+            # répétitions de plan_timeline) : il n'est jamais bouclé ici
             if video_duration < target_duration:
-                # Boucler la vidéo
-                n_loops = int(target_duration / video_duration) + 1
-                video_clips = [video] * n_loops
-                looped_video = concatenate_videoclips(video_clips)
-                video = looped_video.subclip(0, target_duration)
-                st.info(f"🔄 Vidéo ajustée à {target_duration:.1f}s")
+                st.warning(f"⚠️ Montage planifié plus court que l'audio "
+                           f"({video_duration:.1f}s / {target_duration:.1f}s): audio coupé")
             elif video_duration > target_duration:
                 # Couper la vidéo
                 video = video.subclip(0, target_duration)
                 st.info(f"✂️ Vidéo coupée à {target_duration:.1f}s")
+        elif audio_duration > video_duration:
+            st.info("✂️ Audio coupé à la durée de la vidéo")
+        
+        # Bande son mixée une fois (volume, fondus, découpe) puis lue telle quelle
+        prepared_path = prepare_soundtrack(
+            audio_path, volume=volume, fade_in=fade_in, fade_out=fade_out,
+            main_duration=video.duration, total_duration=video.duration
+        )
+        if prepared_path:
+            audio_clip = AudioFileClip(prepared_path)
         else:
-            # Adapter l'audio à la vidéo
-            if audio_clip.duration > video_duration:
-                audio_clip = audio_clip.subclip(0, video_duration)
-                st.info("✂️ Audio coupé à la durée de la vidéo")
+            # Repli : chaîne d'effets MoviePy évaluée à l'écriture
+            audio_clip = AudioFileClip(audio_path).volumex(volume)
+            if fade_in > 0:
+                audio_clip = audio_clip.audio_fadein(fade_in)
+            if fade_out > 0:
+                audio_clip = audio_clip.audio_fadeout(fade_out)
+            if audio_clip.duration > video.duration:
+                audio_clip = audio_clip.subclip(0, video.duration)
         
         # Attacher l'audio
         video = video.set_audio(audio_clip)
@@ -598,30 +619,16 @@ def create_final_video(
             try:
                 st.info(f"🔍 Test concaténation clip {i+1}/{len(optimized_clips)}...")
                 
-                # Tests approfondis
+                # Tests sur les métadonnées (la source a été validée à l'import)
                 if not hasattr(clip, 'get_frame') or not hasattr(clip, 'duration'):
                     st.error(f"❌ Clip {i+1}: attributs manquants")
                     continue
                 
-                # Test d'accès à plusieurs frames
-                test_times = [0, min(0.5, clip.duration/2), min(1.0, clip.duration-0.1)]
-                frame_ok = True
-                
-                for test_time in test_times:
-                    if test_time < 0 or test_time >= clip.duration:
-                        continue
-                    try:
-                        frame = clip.get_frame(test_time)
-                        if frame is None:
-                            st.error(f"❌ Clip {i+1}: frame None à t={test_time:.1f}s")
-                            frame_ok = False
-                            break
-                    except Exception as e:
-                        st.error(f"❌ Clip {i+1}: erreur frame t={test_time:.1f}s - {str(e)}")
-                        frame_ok = False
-                        break
+                metadata_ok = bool(clip.duration and clip.duration > 0 and min(clip.size) > 0)
+                if not metadata_ok:
+                    st.error(f"❌ Clip {i+1}: métadonnées invalides ({clip.size}, {clip.duration}s)")
                 
-                if frame_ok:
+                if metadata_ok:
                     # Test de preview pour s'assurer que MoviePy peut gérer le clip
                     try:
                         preview = clip.subclip(0, min(0.1, clip.duration))
@@ -750,10 +757,9 @@ def create_final_video(
                 st.error("❌ ERREUR FATALE: final_video n'a pas de méthode get_frame")
                 return False
             
-            # Test d'accès à une frame pour valider
-            test_frame = final_video.get_frame(0.1)
-            if test_frame is None:
-                st.error("❌ ERREUR FATALE: final_video.get_frame(0.1) retourne None")
+            # Validation sur les métadonnées de la concaténation
+            if not final_video.duration or final_video.duration <= 0:
+                st.error("❌ ERREUR FATALE: final_video a une durée nulle")
                 return False
             
             st.success(f"✅ Vidéo finale VALIDÉE après concaténation ({final_video.duration:.1f}s)")
@@ -782,40 +788,20 @@ def create_final_video(
         if tagline_path:
             final_video = add_tagline(final_video, tagline_path)
         
-        # ENCODAGE ADAPTATIF LOCAL vs RAILWAY
-        if IS_RAILWAY:
-            st.info("🚂 Encodage Railway (optimisé mémoire)...")
-            encoding_params = {
-                'codec': 'libx264',
-                'fps': VIDEO_FORMAT['fps'],
-                'preset': 'ultrafast',  # Plus rapide = moins de RAM
-                'threads': 2,  # Réduit pour Railway
-                'logger': None,  # Pas de logs pour économiser RAM
-                'write_logfile': False,
-                'bitrate': '3000k',  # Compromise qualité/taille pour Railway
-            }
-            
-            # Résolution adaptée Railway
-            if final_video.duration > 30:
-                encoding_params['bitrate'] = '2000k'
-                st.warning("🚂 Vidéo longue: bitrate réduit sur Railway")
+        # ENCODAGE ADAPTATIF selon la durée (profils ENCODER_STAGES legacy_final_*)
+        if final_video.duration <= 30:
+            stage = 'legacy_final_short'
+        elif final_video.duration <= 60:
+            stage = 'legacy_final'
         else:
-            st.info("💻 Encodage local (haute qualité)...")
-            encoding_params = {
-                'codec': 'libx264',
-                'fps': VIDEO_FORMAT['fps'],
-                'preset': 'medium',  # Meilleure qualité en local
-                'threads': 8,  # Plus de threads en local
-                'logger': 'bar',
-                'write_logfile': False,
-                'bitrate': VIDEO_FORMAT['bitrate'],  # Pleine qualité
-            }
-            
-            # Qualité maximale pour vidéos courtes en local
-            if final_video.duration <= 60:
-                encoding_params['preset'] = 'slow'  # Qualité maximale
-                encoding_params['bitrate'] = '8000k'  # Très haute qualité
-                st.info("🎯 Vidéo courte: qualité maximale en local")
+            stage = 'legacy_final_long'
+        profile_name, _ = stage_profile(stage)
+        st.info(f"🎛️ Profil d'encodage: {profile_name} ({final_video.duration:.0f}s)")
+        encoding_params = {
+            **moviepy_encoding_params(stage),
+            'fps': VIDEO_FORMAT['fps'],
+            'write_logfile': False,
+        }
         
         if final_video.audio is not None:
             if IS_RAILWAY:
@@ -831,11 +817,9 @@ def create_final_video(
         progress_bar = st.progress(0)
         progress_text = st.empty()
         
-        def progress_callback(frame, total_frames):
-            if total_frames > 0:
-                progress = int((frame / total_frames) * 100)
-                progress_bar.progress(progress)
-                progress_text.text(f"Encodage: {progress}%")
+        encoding_params['logger'] = moviepy_progress_logger(
+            "Encodage final", final_video.duration, VIDEO_FORMAT['fps'], progress_bar, progress_text
+        )
         
         # Écrire la vidéo
         final_video.write_videofile(
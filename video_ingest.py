@@ -0,0 +1,200 @@
+"""
+Module d'import des vidéos uploadées
+====================================
+Choisit, à partir des métadonnées ffprobe, le traitement le moins coûteux
+qui rend une vidéo exploitable par le pipeline :
+
+- accept : conteneur MP4/MOV, codec copiable, cadence constante → fichier gardé tel quel
+- remux : codec copiable dans un autre conteneur (MKV, WEBM, AVI...) → copie de
+  flux vers MP4 (l'audio seul est réencodé s'il n'est pas admis en MP4)
+- transcode : codec non copiable, cadence variable ou fichier illisible →
+  réencodage H.264 à cadence constante
+
+Le chemin choisi est affiché pour chaque fichier et émis comme mesure
+structurée (encode_progress.emit_metrics).
+
+Fonctions principales :
+- plan_ingest : Décide du traitement d'une vidéo
+- build_ingest_command : Construit la commande ffmpeg du remux ou du transcodage
+- ingest_video : Importe une vidéo (décision, exécution, validation)
+"""
+import os
+import time
+import streamlit as st
+from typing import List, Dict, Optional
+from constants import INGEST_SETTINGS, VIDEO_FORMAT
+from ffmpeg_utils import ffmpeg_base_command, run_ffmpeg
+from encoder_profiles import encoder_args
+from video_probe import probe_video, probe_audio, validate_video
+from encode_progress import emit_metrics
+from scratch_space import scratch_path
+
+
+def is_variable_frame_rate(info: Dict) -> bool:
+    """
+    Indique si un flux vidéo est à cadence variable (cadence moyenne ≠ nominale)
+
+    Args:
+        info: Métadonnées ffprobe (probe_video)
+
+    Returns:
+        bool: True si la cadence est variable
+    """
+    fps, r_fps = info.get('fps', 0), info.get('r_fps', 0)
+    if fps <= 0 or r_fps <= 0:
+        return False
+    return abs(fps - r_fps) / r_fps > INGEST_SETTINGS['vfr_tolerance']
+
+
+def plan_ingest(path: str) -> Dict:
+    """
+    Décide du traitement d'une vidéo uploadée
+
+    Args:
+        path: Chemin du fichier uploadé
+
+    Returns:
+        Dict: {'action': 'accept'|'remux'|'transcode', 'reasons', 'info', 'audio_codec', 'copy_audio'}
+    """
+    validation = validate_video(path)
+    info = validation['info']
+    audio = probe_audio(path) if info and info.get('has_audio') else None
+    audio_codec = audio['codec'] if audio else None
+    copy_audio = audio_codec is None or audio_codec in INGEST_SETTINGS['mp4_audio_codecs']
+
+    decision = {'info': info, 'audio_codec': audio_codec, 'copy_audio': copy_audio}
+
+    # Réencodage obligatoire : flux illisible, codec ou pixels non copiables, cadence variable
+    reasons = list(validation['issues'])
+    if info:
+        if info['codec'] not in INGEST_SETTINGS['copy_codecs']:
+            reasons.append(f"codec {info['codec']} non copiable")
+        if info['pix_fmt'] not in INGEST_SETTINGS['copy_pix_fmts']:
+            reasons.append(f"pixels {info['pix_fmt']}")
+        if is_variable_frame_rate(info):
+            reasons.append(f"cadence variable ({info['fps']:.2f}/{info['r_fps']:.2f} fps)")
+    if reasons:
+        return {**decision, 'action': 'transcode', 'reasons': reasons}
+
+    # Conteneur ou audio à changer : copie de flux
+    container = set(info.get('format_name', '').split(','))
+    if not container & set(INGEST_SETTINGS['accept_formats']):
+        reasons.append(f"conteneur {info.get('format_name')}")
+    elif not copy_audio:
+        reasons.append(f"audio {audio_codec} non admis en MP4")
+    if reasons:
+        return {**decision, 'action': 'remux', 'reasons': reasons}
+
+    return {**decision, 'action': 'accept', 'reasons': []}
+
+
+def build_ingest_command(
+    path: str,
+    output_path: str,
+    decision: Dict
+) -> List[str]:
+    """
+    Construit la commande ffmpeg du remux ou du transcodage
+
+    Args:
+        path: Fichier uploadé
+        output_path: Fichier MP4 à écrire
+        decision: Décision de plan_ingest ('remux' ou 'transcode')
+
+    Returns:
+        List[str]: Commande ffmpeg
+    """
+    cmd = ffmpeg_base_command() + ['-i', path, '-map', '0:v:0', '-map', '0:a:0?']
+
+    if decision['action'] == 'remux':
+        cmd += ['-c:v', 'copy']
+    else:
+        # Cadence constante à la cadence du montage (sources de téléphones à cadence variable)
+        cmd += encoder_args('ingest') + ['-r', str(VIDEO_FORMAT['fps'])]
+
+    cmd += ['-c:a', 'copy'] if decision['copy_audio'] else ['-c:a', 'aac', '-b:a', '192k']
+    cmd += ['-movflags', '+faststart', output_path]
+    return cmd
+
+
+def _run_ingest(path: str, decision: Dict, output_dir: Optional[str]) -> Optional[str]:
+    """Exécute un remux ou un transcodage et valide le fichier produit"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output_path = scratch_path(f"{decision['action']}_{stem}", '.mp4', job_dir=output_dir)
+    success, stderr = run_ffmpeg(build_ingest_command(path, output_path, decision))
+
+    if not success or not os.path.exists(output_path):
+        st.warning(f"⚠️ {decision['action']} échoué: {stderr.strip()[-300:]}")
+        return None
+
+    validation = validate_video(output_path)
+    if not validation['valid']:
+        st.warning(f"⚠️ Fichier issu du {decision['action']} invalide: {', '.join(validation['issues'])}")
+        os.remove(output_path)
+        return None
+    return output_path
+
+
+def ingest_video(path: str, output_dir: Optional[str] = None) -> Optional[Dict]:
+    """
+    Importe une vidéo uploadée par le traitement le moins coûteux
+
+    Un remux qui échoue est repris en transcodage. Le fichier uploadé est
+    supprimé s'il a été remplacé.
+
+    Args:
+        path: Fichier uploadé
+        output_dir: Répertoire de la tâche (défaut: tâche courante)
+
+    Returns:
+        Dict: {'path', 'action', 'reasons', 'info', 'elapsed'} ou None si échec
+    """
+    name = os.path.basename(path)
+    start = time.perf_counter()
+    decision = plan_ingest(path)
+
+    output_path = path
+    if decision['action'] != 'accept':
+        st.info(f"🔄 {name}: {decision['action']} ({', '.join(decision['reasons'])})")
+        output_path = _run_ingest(path, decision, output_dir)
+        if output_path is None and decision['action'] == 'remux':
+            decision = {**decision, 'action': 'transcode', 'reasons': decision['reasons'] + ["remux échoué"]}
+            output_path = _run_ingest(path, decision, output_dir)
+
+    elapsed = time.perf_counter() - start
+    emit_metrics({
+        'stage': 'ingest',
+        'time': time.time(),
+        'file': name,
+        'action': decision['action'],
+        'reasons': decision['reasons'],
+        'elapsed': round(elapsed, 3),
+        'size_mb': round(os.path.getsize(path) / 1024 / 1024, 2),
+        'success': output_path is not None,
+        'pid': os.getpid()
+    })
+
+    if output_path is None:
+        st.error(f"❌ {name}: import impossible ({', '.join(decision['reasons'])})")
+        return None
+
+    labels = {
+        'accept': "acceptée telle quelle",
+        'remux': "remuxée par copie de flux",
+        'transcode': "transcodée en H.264"
+    }
+    st.success(f"✅ {name}: {labels[decision['action']]} en {elapsed:.1f}s")
+
+    if output_path != path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    return {
+        'path': output_path,
+        'action': decision['action'],
+        'reasons': decision['reasons'],
+        'info': probe_video(output_path),
+        'elapsed': elapsed
+    }
@@ -1,12 +1,34 @@
 """
 Module de normalisation des clips vidéo
 Assure que tous les clips ont exactement les mêmes propriétés avant concaténation
+(vérification sur les métadonnées, sans décoder de frames)
 """
 import streamlit as st
 import numpy as np
 from moviepy.editor import VideoFileClip
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 from constants import VIDEO_FORMAT
+from video_probe import probe_video
+
+
+def clip_properties(clip) -> Optional[Tuple[Tuple[int, int], float, float]]:
+    """
+    Taille, cadence et durée d'un clip, lues dans ses métadonnées
+    
+    Args:
+        clip: Clip MoviePy ou descripteur de clip (sondé avec ffprobe)
+    
+    Returns:
+        Tuple: ((largeur, hauteur), fps, durée) ou None si indisponibles
+    """
+    if isinstance(clip, dict):
+        info = probe_video(clip['path'])
+        if not info:
+            return None
+        return (info['width'], info['height']), info['fps'], info['duration']
+    if clip is None or not hasattr(clip, 'size'):
+        return None
+    return tuple(clip.size), getattr(clip, 'fps', None) or 30, getattr(clip, 'duration', None) or 0
 
 
 def normalize_clip_size(clip: VideoFileClip, target_size: Tuple[int, int] = None) -> VideoFileClip:
@@ -103,24 +125,16 @@ def normalize_clips_batch(clips: List[VideoFileClip]) -> List[VideoFileClip]:
                 normalized = normalized.without_audio()
                 st.info(f"   🔇 Audio retiré")
             
-            # Vérification finale
-            if normalized.size != target_size:
+            # Vérification finale (métadonnées du clip normalisé)
+            if tuple(normalized.size) != target_size:
                 st.error(f"❌ Échec normalisation clip {i+1}: taille {normalized.size}")
                 continue
-            
-            # Test d'accès aux frames
-            try:
-                test_frame = normalized.get_frame(0)
-                if test_frame is None:
-                    st.error(f"❌ Clip {i+1} normalisé retourne None")
-                    continue
-                
-                normalized_clips.append(normalized)
-                st.success(f"✅ Clip {i+1} normalisé avec succès")
-                
-            except Exception as e:
-                st.error(f"❌ Clip {i+1} non fonctionnel après normalisation: {str(e)}")
+            if not normalized.duration or normalized.duration <= 0:
+                st.error(f"❌ Clip {i+1} normalisé sans durée")
                 continue
+            
+            normalized_clips.append(normalized)
+            st.success(f"✅ Clip {i+1} normalisé avec succès")
                 
         except Exception as e:
             st.error(f"❌ Erreur normalisation clip {i+1}: {str(e)}")
@@ -146,9 +160,11 @@ def verify_clips_compatibility(clips: List[VideoFileClip]) -> bool:
         return False
     
     # Récupérer les propriétés du premier clip comme référence
-    first_clip = clips[0]
-    ref_size = first_clip.size
-    ref_fps = getattr(first_clip, 'fps', 30)
+    reference = clip_properties(clips[0])
+    if reference is None:
+        st.warning("⚠️ Clip 1: métadonnées indisponibles")
+        return False
+    ref_size, ref_fps, _ = reference
     
     st.info(f"🔍 Vérification de compatibilité ({len(clips)} clips)")
     st.info(f"   Référence: {ref_size} @ {ref_fps} FPS")
@@ -157,27 +173,28 @@ def verify_clips_compatibility(clips: List[VideoFileClip]) -> bool:
     
     for i, clip in enumerate(clips):
         issues = []
+        properties = clip_properties(clip)
         
-        # Vérifier la taille
-        if clip.size != ref_size:
-            issues.append(f"Taille: {clip.size} ≠ {ref_size}")
+        if properties is None:
+            issues.append("métadonnées indisponibles")
             all_compatible = False
-        
-        # Vérifier le FPS
-        clip_fps = getattr(clip, 'fps', 30)
-        if abs(clip_fps - ref_fps) > 1:  # Tolérance de 1 FPS
-            issues.append(f"FPS: {clip_fps} ≠ {ref_fps}")
-            all_compatible = False
-        
-        # Vérifier l'accès aux frames
-        try:
-            frame = clip.get_frame(0)
-            if frame is None:
-                issues.append("get_frame retourne None")
+        else:
+            size, clip_fps, duration = properties
+            
+            # Vérifier la taille
+            if size != ref_size:
+                issues.append(f"Taille: {size} ≠ {ref_size}")
+                all_compatible = False
+            
+            # Vérifier le FPS
+            if abs(clip_fps - ref_fps) > 1:  # Tolérance de 1 FPS
+                issues.append(f"FPS: {clip_fps} ≠ {ref_fps}")
+                all_compatible = False
+            
+            # Vérifier la durée
+            if duration <= 0:
+                issues.append("Durée nulle")
                 all_compatible = False
-        except Exception as e:
-            issues.append(f"Erreur get_frame: {str(e)}")
-            all_compatible = False
         
         # Afficher le résultat
         if issues:
@@ -214,8 +231,9 @@ def prepare_clips_for_concatenation(clips: List[VideoFileClip]) -> List[VideoFil
     st.info("🔧 Normalisation nécessaire...")
     normalized = normalize_clips_batch(clips)
     
-    # Étape 3: Vérifier à nouveau
-    if verify_clips_compatibility(normalized):
+    # Étape 3: normalize_clips_batch n'a gardé que les clips à la taille et
+    # à la cadence cibles, une seconde vérification serait redondante
+    if normalized:
         st.success("✅ Clips normalisés et prêts pour la concaténation")
         return normalized
     else:
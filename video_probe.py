@@ -0,0 +1,304 @@
+"""
+Module de sondage ffprobe
+Lit les métadonnées de flux et l'index des images clés sans décoder de frames ;
+la validation des vidéos s'appuie sur ces métadonnées, avec au plus un test
+de décodage (une seule frame) par fichier source
+"""
+import os
+import json
+import subprocess
+from typing import List, Dict, Optional
+from constants import FFMPEG_BINARIES
+
+# Caches par (chemin, mtime, taille) pour ne sonder chaque fichier qu'une fois
+_probe_cache: Dict[tuple, Dict] = {}
+_keyframe_cache: Dict[tuple, List[float]] = {}
+_decode_cache: Dict[tuple, bool] = {}
+
+
+def _file_key(path: str) -> Optional[tuple]:
+    """Clé de cache d'un fichier (None si le fichier n'existe pas)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """Convertit un débit ffprobe ('30000/1001') en float"""
+    if not rate or rate == '0/0':
+        return 0.0
+    if '/' in rate:
+        num, den = rate.split('/', 1)
+        return float(num) / float(den) if float(den) else 0.0
+    return float(rate)
+
+
+def _parse_rotation(stream: Dict) -> int:
+    """Extrait la rotation d'affichage d'un flux vidéo (degrés, 0-359)"""
+    rotation = stream.get('tags', {}).get('rotate')
+    if rotation is None:
+        for side_data in stream.get('side_data_list', []):
+            if 'rotation' in side_data:
+                rotation = side_data['rotation']
+                break
+    try:
+        return int(float(rotation or 0)) % 360
+    except (TypeError, ValueError):
+        return 0
+
+
+def probe_video(path: str) -> Optional[Dict]:
+    """
+    Sonde un fichier vidéo avec ffprobe
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        Dict: Métadonnées du premier flux vidéo (codec, taille, fps, durée,
+        rotation, format de pixels, présence d'audio) ou None si illisible
+    """
+    key = _file_key(path)
+    if key is None:
+        return None
+    if key in _probe_cache:
+        return _probe_cache[key]
+
+    cmd = [
+        FFMPEG_BINARIES['ffprobe'], '-v', 'error',
+        '-print_format', 'json',
+        '-show_streams', '-show_format',
+        '-show_data_hash', 'sha256',
+        path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        data = json.loads(result.stdout or '{}')
+    except (OSError, ValueError):
+        return None
+
+    streams = data.get('streams', [])
+    video_streams = [s for s in streams if s.get('codec_type') == 'video']
+    if not video_streams:
+        return None
+
+    stream = video_streams[0]
+    fmt = data.get('format', {})
+    duration = stream.get('duration') or fmt.get('duration') or 0
+
+    info = {
+        'codec': stream.get('codec_name'),
+        'profile': stream.get('profile'),
+        'level': stream.get('level'),
+        'extradata_hash': stream.get('extradata_hash'),
+        'width': int(stream.get('width', 0)),
+        'height': int(stream.get('height', 0)),
+        'pix_fmt': stream.get('pix_fmt'),
+        'fps': _parse_rate(stream.get('avg_frame_rate')),
+        'r_fps': _parse_rate(stream.get('r_frame_rate')),
+        'time_base': stream.get('time_base'),
+        'has_b_frames': int(stream.get('has_b_frames', 0)),
+        'duration': float(duration),
+        'start_time': float(fmt.get('start_time') or 0),
+        'rotation': _parse_rotation(stream),
+        'has_audio': any(s.get('codec_type') == 'audio' for s in streams),
+        'format_name': fmt.get('format_name', '')
+    }
+
+    _probe_cache[key] = info
+    return info
+
+
+def remember_probe(path: str, info: Dict) -> None:
+    """
+    Enregistre des métadonnées déjà connues (stockage des uploads) dans le cache
+
+    Args:
+        path: Chemin du fichier
+        info: Métadonnées au format de probe_video
+    """
+    key = _file_key(path)
+    if key is not None and info:
+        _probe_cache[key] = info
+
+
+def probe_audio(path: str) -> Optional[Dict]:
+    """
+    Sonde le premier flux audio d'un fichier avec ffprobe
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        Dict: Métadonnées audio (codec, fréquence, canaux, durée) ou None
+    """
+    key = _file_key(path)
+    if key is None:
+        return None
+    cache_key = key + ('audio',)
+    if cache_key in _probe_cache:
+        return _probe_cache[cache_key]
+
+    cmd = [
+        FFMPEG_BINARIES['ffprobe'], '-v', 'error',
+        '-select_streams', 'a:0',
+        '-print_format', 'json',
+        '-show_streams', '-show_format',
+        path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        data = json.loads(result.stdout or '{}')
+    except (OSError, ValueError):
+        return None
+
+    streams = data.get('streams', [])
+    if not streams:
+        return None
+
+    stream = streams[0]
+    fmt = data.get('format', {})
+    duration = stream.get('duration') or fmt.get('duration') or 0
+
+    info = {
+        'codec': stream.get('codec_name'),
+        'sample_rate': int(stream.get('sample_rate', 0)),
+        'channels': int(stream.get('channels', 0)),
+        'duration': float(duration)
+    }
+
+    _probe_cache[cache_key] = info
+    return info
+
+
+def get_keyframe_times(path: str) -> List[float]:
+    """
+    Retourne les instants des images clés du flux vidéo
+
+    Lit uniquement les en-têtes de paquets (pas de décodage). Les instants
+    sont relatifs au début du conteneur, comme l'option -ss de ffmpeg.
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        List[float]: Instants des images clés triés (secondes)
+    """
+    key = _file_key(path)
+    if key is None:
+        return []
+    if key in _keyframe_cache:
+        return _keyframe_cache[key]
+
+    cmd = [
+        FFMPEG_BINARIES['ffprobe'], '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError:
+        return []
+    if result.returncode != 0:
+        return []
+
+    info = probe_video(path)
+    offset = info['start_time'] if info else 0.0
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 2 or 'K' not in parts[1]:
+            continue
+        try:
+            keyframes.append(float(parts[0]) - offset)
+        except ValueError:
+            continue
+
+    keyframes.sort()
+    _keyframe_cache[key] = keyframes
+    return keyframes
+
+
+def video_issues(info: Optional[Dict]) -> List[str]:
+    """
+    Problèmes détectés dans les métadonnées d'un flux vidéo
+
+    Args:
+        info: Métadonnées ffprobe (probe_video)
+
+    Returns:
+        List[str]: Problèmes (vide si la vidéo est exploitable)
+    """
+    if not info:
+        return ["aucun flux vidéo lisible"]
+    issues = []
+    if not info.get('codec'):
+        issues.append("codec inconnu")
+    if info.get('width', 0) <= 0 or info.get('height', 0) <= 0:
+        issues.append(f"dimensions invalides ({info.get('width')}x{info.get('height')})")
+    if info.get('fps', 0) <= 0 and info.get('r_fps', 0) <= 0:
+        issues.append("cadence inconnue")
+    if info.get('duration', 0) <= 0:
+        issues.append("durée nulle ou inconnue")
+    if not info.get('pix_fmt'):
+        issues.append("format de pixels inconnu")
+    return issues
+
+
+def check_decodable(path: str) -> bool:
+    """
+    Décode la première frame vidéo d'un fichier (une seule fois par fichier)
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        bool: True si une frame a pu être décodée
+    """
+    key = _file_key(path)
+    if key is None:
+        return False
+    if key in _decode_cache:
+        return _decode_cache[key]
+
+    cmd = [
+        FFMPEG_BINARIES['ffmpeg'], '-v', 'error', '-nostdin',
+        '-i', path,
+        '-map', '0:v:0', '-frames:v', '1',
+        '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        decodable = result.returncode == 0
+    except OSError:
+        decodable = False
+
+    _decode_cache[key] = decodable
+    return decodable
+
+
+def validate_video(path: str, decode_check: bool = True) -> Dict:
+    """
+    Valide une vidéo à partir de ses métadonnées ffprobe
+
+    Args:
+        path: Chemin du fichier
+        decode_check: Tester aussi le décodage d'une frame (sources uploadées)
+
+    Returns:
+        Dict: {'valid', 'info', 'issues'}
+    """
+    info = probe_video(path)
+    issues = video_issues(info)
+    if not issues and decode_check and not check_decodable(path):
+        issues.append("première frame non décodable")
+    return {'valid': not issues, 'info': info, 'issues': issues}